@@ -0,0 +1,26 @@
+"""
+Define benchmarks for the hot paths of the API.
+
+"""
+import sys
+
+from sqlalchemy import inspect
+from swarm_intelligence_app.models import db
+
+
+def reset_database(uri, drop):
+    """
+    Create the tables of the models in the database of the app.
+
+    A database that already has tables is only dropped if drop is set, so
+    that a benchmark does not wipe a database by accident.
+
+    """
+    if inspect(db.engine).get_table_names():
+        if not drop:
+            sys.exit('The database %s is not empty, use --drop to drop its '
+                     'tables.' % uri)
+
+        db.drop_all()
+
+    db.create_all()
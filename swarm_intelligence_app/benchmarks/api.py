@@ -0,0 +1,341 @@
+"""
+Benchmark the hot endpoints of the API.
+
+The benchmark generates large organizations, drives requests through the
+test client of the app and reports the p50, p95 and p99 latency and the
+number of SQL statements per request of each scenario. The results can be
+saved as JSON and compared with a stored baseline:
+
+    python -m swarm_intelligence_app.benchmarks.api run --output base.json
+    python -m swarm_intelligence_app.benchmarks.api run --output new.json
+    python -m swarm_intelligence_app.benchmarks.api compare base.json \\
+        new.json
+
+The comparison exits with status 1 if a scenario got slower than the
+threshold or executes more statements than before.
+
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+import jwt
+
+from sqlalchemy import event
+from swarm_intelligence_app.app import create_app
+from swarm_intelligence_app.benchmarks import reset_database
+from swarm_intelligence_app.common.generator import WORDS, generate
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.user import User as UserModel
+
+
+def percentile(values, percent):
+    """
+    Return a percentile of sorted values with the nearest-rank method.
+
+    """
+    return values[max(0, math.ceil(len(values) * percent / 100) - 1)]
+
+
+def get_token(app, google_id):
+    """
+    Return an access token for a user.
+
+    """
+    return jwt.encode({'sub': google_id}, app.config['SI_JWT_SECRET'],
+                      algorithm='HS256').decode('utf-8')
+
+
+def seed(args):
+    """
+    Generate the organizations and return the data that the scenarios use.
+
+    The user of the benchmark is an admin of all organizations.
+
+    """
+    user = UserModel('benchmark', 'Bench', 'Mark', 'bench@mark.com')
+    db.session.add(user)
+    db.session.flush()
+
+    organization_ids = generate(
+        organizations=args.organizations, partners=args.partners,
+        depth=args.depth, branching=args.branching,
+        roles_per_circle=args.roles_per_circle, seed=args.seed,
+        user_id=user.id)
+    db.session.commit()
+
+    organization_id = organization_ids[0]
+    circle_ids = [row[0] for row in db.session.query(RoleModel.id).filter(
+        RoleModel.organization_id == organization_id).filter(
+        RoleModel.type == RoleType.circle).order_by(RoleModel.id)]
+    role_ids = [row[0] for row in db.session.query(RoleModel.id).filter(
+        RoleModel.organization_id == organization_id).filter(
+        RoleModel.type == RoleType.custom).order_by(RoleModel.id)]
+    partner_ids = [row[0] for row in db.session.query(
+        PartnerModel.id).filter(
+        PartnerModel.organization_id == organization_id).order_by(
+        PartnerModel.id)]
+
+    return {
+        'organization_id': organization_id,
+        'circle_ids': circle_ids,
+        'role_ids': role_ids,
+        'partner_ids': partner_ids
+    }
+
+
+def get_scenarios(data, rng):
+    """
+    Return the name, method, expected status and request function of each
+    scenario.
+
+    Each request function takes the number of the request and returns its
+    path and JSON body.
+
+    """
+    organization_id = data['organization_id']
+    circle_ids = data['circle_ids']
+    role_ids = data['role_ids']
+    partner_ids = data['partner_ids']
+
+    return [
+        ('GET /me/organizations', 'GET', 200,
+         lambda i: ('/me/organizations', None)),
+        ('GET /organizations/{id}/members', 'GET', 200,
+         lambda i: ('/organizations/%d/members' % organization_id, None)),
+        ('GET /organizations/{id}/admins', 'GET', 200,
+         lambda i: ('/organizations/%d/admins' % organization_id, None)),
+        ('GET /circles/{id}/roles', 'GET', 200,
+         lambda i: ('/circles/%d/roles' % rng.choice(circle_ids), None)),
+        ('GET /circles/{id}/members', 'GET', 200,
+         lambda i: ('/circles/%d/members' % rng.choice(circle_ids), None)),
+        ('GET /roles/{id}/members', 'GET', 200,
+         lambda i: ('/roles/%d/members' % rng.choice(role_ids), None)),
+        ('GET /organizations/{id}/search', 'GET', 200,
+         lambda i: ('/organizations/%d/search?q=%s' % (
+             organization_id, rng.choice(WORDS)[:4]), None)),
+        ('PUT /roles/{id}/members/{id}', 'PUT', 204,
+         lambda i: ('/roles/%d/members/%d' % (
+             role_ids[i % len(role_ids)], rng.choice(partner_ids)), None)),
+        ('POST /me/organizations', 'POST', 201,
+         lambda i: ('/me/organizations', {'name': 'Benchmark %d' % i}))
+    ]
+
+
+def run_scenario(client, headers, method, status, request, warmup,
+                 requests):
+    """
+    Run the requests of a scenario and return their statistics.
+
+    """
+    statements = []
+    latencies = []
+    errors = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for i in range(warmup + requests):
+        path, body = request(i)
+
+        if i == warmup:
+            event.listen(db.engine, 'before_cursor_execute', count)
+
+        start = time.perf_counter()
+        response = client.open(path, method=method, headers=headers,
+                               data=None if body is None else
+                               json.dumps(body),
+                               content_type='application/json')
+        elapsed = time.perf_counter() - start
+
+        if i >= warmup:
+            latencies.append(elapsed * 1000)
+            errors += response.status_code != status
+
+    event.remove(db.engine, 'before_cursor_execute', count)
+    latencies.sort()
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'mean_ms': sum(latencies) / len(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'queries_per_request': len(statements) / requests
+    }
+
+
+def print_results(results):
+    """
+    Print the statistics of each scenario.
+
+    """
+    print('%-34s %9s %9s %9s %9s %7s' % ('scenario', 'p50 ms', 'p95 ms',
+                                         'p99 ms', 'queries', 'errors'))
+
+    for name, result in results.items():
+        print('%-34s %9.2f %9.2f %9.2f %9.1f %7d' % (
+            name, result['p50_ms'], result['p95_ms'], result['p99_ms'],
+            result['queries_per_request'], result['errors']))
+
+
+def run(args):
+    """
+    Run the benchmark and optionally save its results.
+
+    """
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SI_RESPONSE_CACHE'] = args.response_cache
+
+    with app.app_context():
+        reset_database(args.uri, args.drop)
+
+        data = seed(args)
+        client = app.test_client()
+        headers = {'Authorization': 'Bearer ' + get_token(app, 'benchmark')}
+        rng = random.Random(args.seed)
+        results = {}
+
+        for name, method, status, request in get_scenarios(data, rng):
+            if args.scenario and not any(text in name
+                                         for text in args.scenario):
+                continue
+
+            results[name] = run_scenario(client, headers, method, status,
+                                         request, args.warmup,
+                                         args.requests)
+
+        roles = db.session.query(db.func.count(RoleModel.id)).scalar()
+
+    print('%s, %d roles, %d partners per organization, %d requests' % (
+        args.uri, roles, args.partners, args.requests))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'meta': {
+                    'uri': args.uri,
+                    'python': platform.python_version(),
+                    'organizations': args.organizations,
+                    'partners': args.partners,
+                    'depth': args.depth,
+                    'branching': args.branching,
+                    'roles_per_circle': args.roles_per_circle,
+                    'requests': args.requests,
+                    'response_cache': args.response_cache,
+                    'seed': args.seed
+                },
+                'results': results
+            }, f, indent=2, sort_keys=True)
+
+
+def compare(args):
+    """
+    Compare the results of a run with a baseline.
+
+    Returns 1 if a scenario regressed, otherwise 0.
+
+    """
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+
+    with open(args.results) as f:
+        results = json.load(f)['results']
+
+    regressed = False
+
+    print('%-34s %-5s %9s %9s %8s' % ('scenario', '', 'baseline', 'current',
+                                      'change'))
+
+    for name in sorted(set(baseline) & set(results)):
+        for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'):
+            before, after = baseline[name][key], results[name][key]
+            change = (after - before) / before * 100 if before else 0.0
+
+            if key == 'queries_per_request':
+                worse = after > before
+            else:
+                worse = change > args.threshold
+
+            regressed = regressed or worse
+            print('%-34s %-5s %9.2f %9.2f %+7.1f%%%s' % (
+                name, key.split('_')[0], before, after, change,
+                ' !' if worse else ''))
+
+    for name in sorted(set(baseline) ^ set(results)):
+        print('%-34s only in %s' % (
+            name, 'baseline' if name in baseline else 'results'))
+
+    return 1 if regressed else 0
+
+
+def main():
+    """
+    Run the command given on the command line.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser('run', help='run the benchmark')
+    run_parser.add_argument('--uri', default='sqlite://',
+                            help='database URI (default: in-memory SQLite)')
+    run_parser.add_argument('--drop', action='store_true',
+                            help='drop the tables of a database that is not '
+                                 'empty')
+    run_parser.add_argument('--organizations', type=int, default=3,
+                            help='number of organizations (default: 3)')
+    run_parser.add_argument('--partners', type=int, default=1000,
+                            help='partners per organization (default: 1000)')
+    run_parser.add_argument('--depth', type=int, default=4,
+                            help='levels of circles (default: 4)')
+    run_parser.add_argument('--branching', type=int, default=4,
+                            help='sub-circles per circle (default: 4)')
+    run_parser.add_argument('--roles-per-circle', type=int, default=10,
+                            help='custom roles per circle (default: 10)')
+    run_parser.add_argument('--requests', type=int, default=200,
+                            help='requests per scenario (default: 200)')
+    run_parser.add_argument('--warmup', type=int, default=20,
+                            help='unmeasured requests per scenario '
+                                 '(default: 20)')
+    run_parser.add_argument('--response-cache', default='none',
+                            choices=('none', 'local'),
+                            help='response cache (default: none)')
+    run_parser.add_argument('--scenario', action='append',
+                            help='run only scenarios containing this text')
+    run_parser.add_argument('--seed', type=int, default=0,
+                            help='seed of the data and requests '
+                                 '(default: 0)')
+    run_parser.add_argument('--output',
+                            help='file to save the results to as JSON')
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='compare results with a baseline')
+    compare_parser.add_argument('baseline', help='results of the baseline')
+    compare_parser.add_argument('results', help='results to compare')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help='allowed slowdown in percent '
+                                     '(default: 10)')
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
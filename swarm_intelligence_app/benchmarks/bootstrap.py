@@ -0,0 +1,197 @@
+"""
+Benchmark the creation of organizations and circles.
+
+The benchmark compares the legacy flush-per-object sequence with the
+bootstrap routine. By default it runs against SQLite and adds a simulated
+round trip time to every statement, which models a remote MySQL server. A
+real server can be given with --uri, in which case --rtt should be 0.
+
+    python -m swarm_intelligence_app.benchmarks.bootstrap --rtt 5
+
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import event
+from swarm_intelligence_app.app import create_app
+from swarm_intelligence_app.benchmarks import reset_database
+from swarm_intelligence_app.common.bootstrap import bootstrap_circle, \
+    bootstrap_organization
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.circle import Circle as CircleModel
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.user import User as UserModel
+
+
+def legacy_organization(name, user):
+    """
+    Create an organization the way it was created before bootstrapping.
+
+    """
+    organization = OrganizationModel(name)
+    partner = PartnerModel(PartnerType.admin, user.firstname, user.lastname,
+                           user.email, user, organization)
+    db.session.add(partner)
+    db.session.flush()
+
+    role = RoleModel(RoleType.circle, 'General', "General's Purpose", None,
+                     organization.id)
+    db.session.add(role)
+    db.session.flush()
+
+    db.session.add(CircleModel(role.id, None))
+    db.session.flush()
+
+    lead_link = None
+    for type, name, purpose in ((RoleType.lead_link, 'Lead Link',
+                                 "Lead Link's Purpose"),
+                                (RoleType.secretary, 'Secretary',
+                                 "Secretary's Purpose"),
+                                (RoleType.facilitator, 'Facilitator',
+                                 "Facilitator's Purpose")):
+        core_role = RoleModel(type, name, purpose, role.id, organization.id)
+        db.session.add(core_role)
+        db.session.flush()
+        lead_link = lead_link or core_role
+
+    partner.memberships.append(role)
+    partner.memberships.append(lead_link)
+
+
+def legacy_circle(role):
+    """
+    Add circle properties the way they were added before bootstrapping.
+
+    """
+    role.type = RoleType.circle
+    db.session.add(CircleModel(role.id, None))
+    db.session.flush()
+
+    for type, name, purpose in ((RoleType.lead_link, 'Lead Link',
+                                 "Lead Link's Purpose"),
+                                (RoleType.secretary, 'Secretary',
+                                 "Secretary's Purpose"),
+                                (RoleType.facilitator, 'Facilitator',
+                                 "Facilitator's Purpose")):
+        db.session.add(RoleModel(type, name, purpose, role.id,
+                                 role.organization_id))
+
+
+def create_custom_role(organization_id):
+    """
+    Return a new custom role that can be turned into a circle.
+
+    """
+    role = RoleModel(RoleType.custom, 'Custom', 'Custom Purpose', None,
+                     organization_id)
+    db.session.add(role)
+    db.session.commit()
+    return role
+
+
+def measure(name, runs, f):
+    """
+    Run a function and report its latency and number of statements.
+
+    """
+    statements = []
+    latencies = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+
+    try:
+        for i in range(runs):
+            start = time.perf_counter()
+            f(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    latencies.sort()
+    print('%-24s %8.2f ms p50 %8.2f ms p95 %6.1f statements' % (
+        name, statistics.median(latencies),
+        latencies[int(len(latencies) * 0.95) - 1],
+        len(statements) / runs))
+
+
+def main():
+    """
+    Run the benchmark.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--uri', default='sqlite://',
+                        help='database URI (default: in-memory SQLite)')
+    parser.add_argument('--drop', action='store_true',
+                        help='drop the tables of a database that is not '
+                             'empty')
+    parser.add_argument('--rtt', type=float, default=5.0,
+                        help='simulated round trip time in ms (default: 5)')
+    parser.add_argument('--runs', type=int, default=50,
+                        help='number of runs per variant (default: 50)')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    with app.app_context():
+        reset_database(args.uri, args.drop)
+
+        def delay(conn, cursor, statement, parameters, context,
+                  executemany):
+            time.sleep(args.rtt / 1000)
+
+        if args.rtt:
+            event.listen(db.engine, 'before_cursor_execute', delay)
+
+        user = UserModel('benchmark', 'Bench', 'Mark', 'bench@mark.com')
+        db.session.add(user)
+        db.session.commit()
+
+        def run_legacy_organization(i):
+            legacy_organization('Legacy %d' % i, user)
+            db.session.commit()
+
+        def run_bootstrap_organization(i):
+            bootstrap_organization('Bootstrap %d' % i, user)
+            db.session.commit()
+
+        organization_id = bootstrap_organization('Circles', user)['id']
+        db.session.commit()
+
+        legacy_roles = [create_custom_role(organization_id)
+                        for i in range(args.runs)]
+        bootstrap_roles = [create_custom_role(organization_id)
+                           for i in range(args.runs)]
+
+        def run_legacy_circle(i):
+            legacy_circle(legacy_roles[i])
+            db.session.commit()
+
+        def run_bootstrap_circle(i):
+            role = bootstrap_roles[i]
+            role.type = RoleType.circle
+            bootstrap_circle(role.id, role.organization_id)
+            db.session.commit()
+
+        print('%s, %.1f ms simulated round trip time, %d runs' % (
+            args.uri, args.rtt, args.runs))
+        measure('legacy organization', args.runs, run_legacy_organization)
+        measure('bootstrap organization', args.runs,
+                run_bootstrap_organization)
+        measure('legacy circle', args.runs, run_legacy_circle)
+        measure('bootstrap circle', args.runs, run_bootstrap_circle)
+
+
+if __name__ == '__main__':
+    main()
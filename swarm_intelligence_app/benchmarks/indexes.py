@@ -0,0 +1,162 @@
+"""
+Benchmark the lookups that the indexes of the migrations speed up.
+
+The benchmark generates about a million rows, reverts the migrations to the
+given version, which drops their indexes, and measures the members, admins,
+invitations and circle roles lookups. It then applies the migrations again
+and repeats the measurement:
+
+    python -m swarm_intelligence_app.benchmarks.indexes
+
+On MySQL, InnoDB keeps an index for every foreign key, so only the
+composite indexes are dropped and the difference is smaller.
+
+"""
+import argparse
+import random
+import time
+
+from swarm_intelligence_app.app import create_app
+from swarm_intelligence_app.benchmarks import reset_database
+from swarm_intelligence_app.benchmarks.api import get_token, run_scenario
+from swarm_intelligence_app.common import migration
+from swarm_intelligence_app.common.generator import count_rows, generate
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.user import User as UserModel
+
+
+def seed(args):
+    """
+    Generate the organizations and return their ids and the ids of their
+    circles.
+
+    """
+    user = UserModel('benchmark', 'Bench', 'Mark', 'bench@mark.com')
+    db.session.add(user)
+    db.session.flush()
+
+    organization_ids = generate(
+        organizations=args.organizations, partners=args.partners,
+        depth=args.depth, branching=args.branching,
+        roles_per_circle=args.roles_per_circle,
+        invitations=args.invitations, seed=args.seed, user_id=user.id)
+    db.session.commit()
+
+    circle_ids = [row[0] for row in db.session.query(RoleModel.id).filter(
+        RoleModel.type == RoleType.circle)]
+
+    return organization_ids, circle_ids
+
+
+def get_scenarios(organization_ids, circle_ids, rng):
+    """
+    Return the name, method, expected status and request function of each
+    lookup.
+
+    """
+    return [
+        ('GET /organizations/{id}/members', 'GET', 200,
+         lambda i: ('/organizations/%d/members' % rng.choice(
+             organization_ids), None)),
+        ('GET /organizations/{id}/admins', 'GET', 200,
+         lambda i: ('/organizations/%d/admins' % rng.choice(
+             organization_ids), None)),
+        ('GET /organizations/{id}/invitations', 'GET', 200,
+         lambda i: ('/organizations/%d/invitations' % rng.choice(
+             organization_ids), None)),
+        ('GET /circles/{id}/roles', 'GET', 200,
+         lambda i: ('/circles/%d/roles' % rng.choice(circle_ids), None))
+    ]
+
+
+def measure(client, headers, args, organization_ids, circle_ids):
+    """
+    Run the lookups and return their statistics.
+
+    """
+    rng = random.Random(args.seed)
+
+    return [(name, run_scenario(client, headers, method, status, request,
+                                args.warmup, args.requests))
+            for name, method, status, request in get_scenarios(
+                organization_ids, circle_ids, rng)]
+
+
+def main():
+    """
+    Run the benchmark.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--uri', default='sqlite://',
+                        help='database URI (default: in-memory SQLite)')
+    parser.add_argument('--drop', action='store_true',
+                        help='drop the tables of a database that is not '
+                             'empty')
+    parser.add_argument('--version', type=int, default=1,
+                        help='version to revert to (default: 1)')
+    parser.add_argument('--organizations', type=int, default=50,
+                        help='number of organizations (default: 50)')
+    parser.add_argument('--partners', type=int, default=5000,
+                        help='partners per organization (default: 5000)')
+    parser.add_argument('--invitations', type=int, default=5000,
+                        help='invitations per organization (default: 5000)')
+    parser.add_argument('--depth', type=int, default=4,
+                        help='levels of circles (default: 4)')
+    parser.add_argument('--branching', type=int, default=4,
+                        help='sub-circles per circle (default: 4)')
+    parser.add_argument('--roles-per-circle', type=int, default=10,
+                        help='custom roles per circle (default: 10)')
+    parser.add_argument('--requests', type=int, default=50,
+                        help='requests per lookup (default: 50)')
+    parser.add_argument('--warmup', type=int, default=5,
+                        help='unmeasured requests per lookup (default: 5)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the data and requests (default: 0)')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SI_RESPONSE_CACHE'] = 'none'
+
+    with app.app_context():
+        reset_database(args.uri, args.drop)
+        migration.upgrade(db.engine)
+
+        organization_ids, circle_ids = seed(args)
+        rows = sum(count for name, count in count_rows())
+        client = app.test_client()
+        headers = {'Authorization': 'Bearer ' + get_token(app, 'benchmark')}
+
+        db.session.remove()
+        reverted = migration.downgrade(db.engine, args.version)
+        before = measure(client, headers, args, organization_ids, circle_ids)
+
+        db.session.remove()
+        start = time.perf_counter()
+        migration.upgrade(db.engine)
+        elapsed = time.perf_counter() - start
+        after = measure(client, headers, args, organization_ids, circle_ids)
+
+    print('%s, %d rows, reverted versions %s, upgrade took %.2f s' % (
+        args.uri, rows, ', '.join(map(str, reverted)) or 'none', elapsed))
+    print('%-38s %10s %10s %10s %10s %8s' % (
+        'lookup', 'p50 before', 'p50 after', 'p95 before', 'p95 after',
+        'speedup'))
+
+    for (name, old), (_, new) in zip(before, after):
+        print('%-38s %10.2f %10.2f %10.2f %10.2f %7.1fx' % (
+            name, old['p50_ms'], new['p50_ms'], old['p95_ms'],
+            new['p95_ms'], old['p50_ms'] / new['p50_ms']))
+
+    errors = sum(result['errors'] for name, result in before + after)
+
+    if errors:
+        print('%d requests failed' % errors)
+
+
+if __name__ == '__main__':
+    main()
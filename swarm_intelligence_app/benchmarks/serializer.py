@@ -0,0 +1,151 @@
+"""
+Benchmark the serialization of large role listings.
+
+The benchmark seeds a circle with 10,000 roles and compares the hand-written
+serialization of ORM instances with the compiled serializers, both on ORM
+instances and on plain rows, and the json module with the JSON encoder of
+the API.
+
+    python -m swarm_intelligence_app.benchmarks.serializer --roles 10000
+
+"""
+import argparse
+import json
+import time
+
+from swarm_intelligence_app.app import create_app
+from swarm_intelligence_app.benchmarks import reset_database
+from swarm_intelligence_app.common.bootstrap import bootstrap_organization
+from swarm_intelligence_app.common.serializer import dumps, get_serializer, \
+    orjson
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.user import User as UserModel
+
+
+def legacy_serialize(role):
+    """
+    Return the representation of a role the way it was built by hand.
+
+    """
+    return {
+        'id': role.id,
+        'type': role.type.value,
+        'name': role.name,
+        'purpose': role.purpose,
+        'parent_circle_id': role.parent_circle_id,
+        'organization_id': role.organization_id
+    }
+
+
+def seed(count):
+    """
+    Return the id of a circle with the given number of roles.
+
+    """
+    user = UserModel('benchmark', 'Bench', 'Mark', 'bench@mark.com')
+    db.session.add(user)
+    db.session.flush()
+
+    organization_id = bootstrap_organization('Benchmark', user)['id']
+    circle_id = db.session.query(RoleModel.id).filter(
+        RoleModel.organization_id == organization_id).filter(
+        RoleModel.parent_circle_id.is_(None)).scalar()
+
+    db.session.execute(RoleModel.__table__.insert(), [{
+        'type': RoleType.custom,
+        'name': 'Role %d' % i,
+        'purpose': 'Purpose of role %d' % i,
+        'parent_circle_id': circle_id,
+        'organization_id': organization_id
+    } for i in range(count)])
+    db.session.commit()
+
+    return circle_id
+
+
+def measure(name, runs, count, f):
+    """
+    Run a function and report the number of rows per second.
+
+    """
+    best = None
+
+    for i in range(runs):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    print('%-36s %10.0f rows/s %8.2f ms' % (name, count / best,
+                                            best * 1000))
+
+
+def main():
+    """
+    Run the benchmark.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--uri', default='sqlite://',
+                        help='database URI (default: in-memory SQLite)')
+    parser.add_argument('--drop', action='store_true',
+                        help='drop the tables of a database that is not '
+                             'empty')
+    parser.add_argument('--roles', type=int, default=10000,
+                        help='number of roles (default: 10000)')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='number of runs per variant (default: 5)')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    with app.app_context():
+        reset_database(args.uri, args.drop)
+
+        circle_id = seed(args.roles)
+        count = args.roles + 3
+        serializer = get_serializer(RoleModel)
+
+        def instances():
+            return RoleModel.query.filter(
+                RoleModel.parent_circle_id == circle_id).order_by(
+                RoleModel.id).all()
+
+        def rows():
+            return db.session.query(*serializer.columns).filter(
+                RoleModel.parent_circle_id == circle_id).order_by(
+                RoleModel.id).all()
+
+        print('%s, %d roles, %s' % (
+            args.uri, count, 'orjson' if orjson else 'json fallback'))
+
+        measure('query instances, by hand', args.runs, count,
+                lambda: [legacy_serialize(i) for i in instances()])
+        measure('query instances, compiled', args.runs, count,
+                lambda: [serializer.dump(i) for i in instances()])
+        measure('query rows, compiled', args.runs, count,
+                lambda: serializer.dump_rows(rows()))
+
+        data = serializer.dump_rows(rows())
+
+        measure('encode, json module (indent=4)', args.runs, count,
+                lambda: json.dumps(data, indent=4))
+        measure('encode, json module', args.runs, count,
+                lambda: json.dumps(data))
+        measure('encode, API encoder', args.runs, count,
+                lambda: dumps(data))
+
+        measure('end to end, before', args.runs, count,
+                lambda: json.dumps([legacy_serialize(i)
+                                    for i in instances()], indent=4))
+        measure('end to end, after', args.runs, count,
+                lambda: dumps(serializer.dump_rows(rows())))
+
+
+if __name__ == '__main__':
+    main()
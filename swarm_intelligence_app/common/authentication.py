@@ -2,10 +2,15 @@
 Define any authentication functions for the application.
 
 """
+import time
+
 import jwt
 
 from flask import abort, current_app, g
 from flask_httpauth import HTTPTokenAuth
+from sqlalchemy.orm import make_transient_to_detached
+from swarm_intelligence_app.common.cache import LRUCache
+from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.user import User as UserModel
 
 auth = HTTPTokenAuth('Bearer')
@@ -33,23 +38,111 @@ def get_mock_user():
     return mock_users
 
 
+def get_auth_caches():
+    """
+    Return the caches of decoded tokens and authenticated users.
+
+    The caches are created once per app, so that each process keeps its own
+    bounded set of tokens (keyed by token) and users (keyed by google id).
+
+    """
+    caches = current_app.extensions.get('si_auth_cache')
+
+    if caches is None:
+        size = current_app.config['SI_AUTH_CACHE_SIZE']
+        ttl = current_app.config['SI_AUTH_CACHE_TTL']
+        caches = {
+            'tokens': LRUCache(size, ttl),
+            'users': LRUCache(size, ttl)
+        }
+        current_app.extensions['si_auth_cache'] = caches
+
+    return caches
+
+
+def get_auth_cache_stats():
+    """
+    Return the hit and miss counters of the authentication caches.
+
+    """
+    return {name: cache.stats for name, cache in get_auth_caches().items()}
+
+
+def invalidate_user(google_id):
+    """
+    Remove a user from the cache of authenticated users.
+
+    This must be called whenever a user is updated or deleted, so that the
+    next request of the user reads the user from the database again.
+
+    """
+    get_auth_caches()['users'].delete(google_id)
+
+
+def detach_user(user):
+    """
+    Return a detached copy of a user that can be kept across sessions.
+
+    """
+    copy = UserModel.__mapper__.class_manager.new_instance()
+
+    for attribute in UserModel.__mapper__.column_attrs:
+        setattr(copy, attribute.key, getattr(user, attribute.key))
+
+    make_transient_to_detached(copy)
+
+    return copy
+
+
+def load_user(google_id):
+    """
+    Return the active user with the given google id.
+
+    A cached user is merged into the current session without emitting a
+    query. Otherwise the user is read from the database and cached.
+
+    """
+    cache = get_auth_caches()['users']
+    cached = cache.get(google_id)
+
+    if cached is not None:
+        return db.session.merge(cached, load=False)
+
+    user = UserModel.query.filter_by(
+        google_id=google_id, is_active=True).first()
+
+    if user is not None:
+        cache.set(google_id, detach_user(user))
+
+    return user
+
+
 @auth.verify_token
 def verify_token(token):
     """
     Validate a JSON Web Token.
 
     """
-    try:
-        payload = jwt.decode(token, current_app.config['SI_JWT_SECRET'])
-    except jwt.ExpiredSignatureError:
-        print('The access token has expired.')
-        abort(401)
-    except jwt.exceptions.InvalidTokenError:
-        print('The access token is not valid.')
-        abort(400)
+    cache = get_auth_caches()['tokens']
+    payload = cache.get(token)
 
-    user = UserModel.query.filter_by(
-        google_id=payload['sub'], is_active=True).first()
+    if payload is None:
+        try:
+            payload = jwt.decode(token, current_app.config['SI_JWT_SECRET'])
+        except jwt.ExpiredSignatureError:
+            print('The access token has expired.')
+            abort(401)
+        except jwt.exceptions.InvalidTokenError:
+            print('The access token is not valid.')
+            abort(400)
+
+        # never keep a token in the cache beyond its expiration time
+        ttl = cache.ttl
+        if 'exp' in payload:
+            ttl = min(ttl, payload['exp'] - time.time())
+        cache.set(token, payload, ttl)
+
+    user = load_user(payload['sub'])
 
     if user is None:
         print('The user is not found or is deleted.')
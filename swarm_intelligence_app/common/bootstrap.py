@@ -0,0 +1,107 @@
+"""
+Define any functions to create the initial structure of organizations.
+
+"""
+from swarm_intelligence_app.common import closure
+from swarm_intelligence_app.common import search
+from swarm_intelligence_app.common.serializer import get_serializer
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.circle import Circle as CircleModel
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.role_member import role_member
+
+ANCHOR_CIRCLE = ('General', "General's Purpose")
+CORE_ROLES = (
+    (RoleType.lead_link, 'Lead Link', "Lead Link's Purpose"),
+    (RoleType.secretary, 'Secretary', "Secretary's Purpose"),
+    (RoleType.facilitator, 'Facilitator', "Facilitator's Purpose")
+)
+
+
+def bootstrap_circle(role_id,
+                     organization_id):
+    """
+    Add circle properties and the core roles to a role.
+
+    The circle is inserted with one statement and the lead link, secretary
+    and facilitator roles with one multi-row insert. The core roles are
+    added to the closure of the circle hierarchy and to the search index.
+    The caller must commit the session.
+
+    """
+    db.session.execute(CircleModel.__table__.insert(),
+                       {'id': role_id, 'strategy': None})
+
+    db.session.execute(RoleModel.__table__.insert(), [
+        {
+            'type': type,
+            'name': name,
+            'purpose': purpose,
+            'parent_circle_id': role_id,
+            'organization_id': organization_id
+        } for type, name, purpose in CORE_ROLES])
+
+    closure.insert_circle_roles(role_id)
+    search.index_roles(RoleModel.parent_circle_id == role_id)
+
+
+def bootstrap_organization(name,
+                           user):
+    """
+    Create an organization with an anchor circle and the user as its admin.
+
+    The organization, the partner, the anchor circle and its core roles are
+    inserted with one statement per table. The memberships of the partner in
+    the anchor circle and its lead link are inserted with a single
+    INSERT ... SELECT, so that the id of the lead link is never read back.
+    The roles are added to the search index. Returns the representation of
+    the organization, which is built from the inserted values instead of
+    being read back. The caller must commit the session.
+
+    """
+    organization = {'name': name}
+    organization_id = organization['id'] = db.session.execute(
+        OrganizationModel.__table__.insert(),
+        organization).inserted_primary_key[0]
+
+    partner_id = db.session.execute(PartnerModel.__table__.insert(), {
+        'type': PartnerType.admin,
+        'firstname': user.firstname,
+        'lastname': user.lastname,
+        'email': user.email,
+        'is_active': True,
+        'user_id': user.id,
+        'organization_id': organization_id
+    }).inserted_primary_key[0]
+
+    circle_name, circle_purpose = ANCHOR_CIRCLE
+    anchor_circle_id = db.session.execute(RoleModel.__table__.insert(), {
+        'type': RoleType.circle,
+        'name': circle_name,
+        'purpose': circle_purpose,
+        'parent_circle_id': None,
+        'organization_id': organization_id
+    }).inserted_primary_key[0]
+
+    closure.insert_role(anchor_circle_id, None)
+    search.insert('role', anchor_circle_id, organization_id, circle_name,
+                  circle_purpose)
+    bootstrap_circle(anchor_circle_id, organization_id)
+
+    memberships = db.select([db.literal(partner_id), RoleModel.id]).where(
+        db.or_(RoleModel.id == anchor_circle_id,
+               db.and_(RoleModel.parent_circle_id == anchor_circle_id,
+                       RoleModel.type == RoleType.lead_link)))
+
+    db.session.execute(role_member.insert().from_select(
+        ['partner_id', 'role_id'], memberships))
+
+    serializer = get_serializer(OrganizationModel)
+
+    return serializer.dump_row([organization[attribute]
+                                for attribute in serializer.attributes])
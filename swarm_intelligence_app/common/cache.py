@@ -0,0 +1,115 @@
+"""
+Define caches that are shared across the requests of a process.
+
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Define a bounded, thread-safe cache with least-recently-used eviction.
+
+    Each entry expires after a time to live, which defaults to the ttl of the
+    cache and can be shortened per entry. Lookups are counted as hits or
+    misses, so that the effectiveness of a cache can be checked at runtime.
+
+    """
+    def __init__(self,
+                 maxsize=1024,
+                 ttl=60):
+        """
+        Initialize a cache.
+
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        Return the number of entries in the cache.
+
+        """
+        return len(self._entries)
+
+    def __repr__(self):
+        """
+        Return a readable representation of a cache.
+
+        """
+        return '<LRUCache %r/%r>' % (len(self._entries), self.maxsize)
+
+    def get(self, key, default=None):
+        """
+        Return the value cached for a key or the default value.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires = entry
+
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Cache a value for a key.
+
+        """
+        if ttl is None:
+            ttl = self.ttl
+
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        Remove the value cached for a key.
+
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Remove all values from the cache.
+
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self):
+        """
+        Return the size and the hit and miss counters of the cache.
+
+        """
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses
+        }
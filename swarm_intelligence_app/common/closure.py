@@ -0,0 +1,166 @@
+"""
+Define any functions to maintain the closure of the circle hierarchy.
+
+The closure table holds a row for every pair of a role and one of its
+ancestor circles, together with their distance in the hierarchy. Each role
+is also its own ancestor with a distance of 0. This allows to read all
+descendants of a circle or all ancestors of a role with a single indexed
+query, regardless of the depth of the hierarchy. The functions add their
+statements to the session; the caller must commit it.
+
+"""
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_closure import role_closure
+
+COLUMNS = ['ancestor_id', 'descendant_id', 'depth']
+
+
+def insert_role(role_id,
+                parent_circle_id):
+    """
+    Add a new role to the closure.
+
+    The role is added below all ancestors of its parent circle with a single
+    INSERT ... SELECT.
+
+    """
+    own_row = db.select([db.literal(role_id), db.literal(role_id),
+                         db.literal(0)])
+
+    if parent_circle_id is None:
+        rows = own_row
+    else:
+        rows = db.union_all(
+            db.select([role_closure.c.ancestor_id, db.literal(role_id),
+                       role_closure.c.depth + 1]).where(
+                role_closure.c.descendant_id == parent_circle_id),
+            own_row)
+
+    db.session.execute(role_closure.insert().from_select(COLUMNS, rows))
+
+
+def insert_circle_roles(circle_id):
+    """
+    Add all roles of a circle that are not part of the closure yet.
+
+    This is used after roles were inserted in bulk, without reading their
+    ids back.
+
+    """
+    child = db.alias(RoleModel.__table__, 'child')
+    known = db.select([role_closure.c.descendant_id]).where(
+        role_closure.c.ancestor_id == circle_id)
+    new_roles = db.and_(child.c.parent_circle_id == circle_id,
+                        child.c.id.notin_(known))
+
+    ancestors = db.select([role_closure.c.ancestor_id, child.c.id,
+                           role_closure.c.depth + 1]).where(
+        role_closure.c.descendant_id == child.c.parent_circle_id).where(
+        new_roles)
+
+    db.session.execute(role_closure.insert().from_select(
+        COLUMNS, ancestors))
+
+    own_row = db.exists().where(db.and_(
+        role_closure.c.ancestor_id == child.c.id,
+        role_closure.c.descendant_id == child.c.id))
+    own_rows = db.select([child.c.id, child.c.id, db.literal(0)]).where(
+        child.c.parent_circle_id == circle_id).where(~own_row)
+
+    db.session.execute(role_closure.insert().from_select(
+        COLUMNS, own_rows))
+
+
+def insert_roles_after(organization_id,
+                       after_id):
+    """
+    Add all roles of an organization with an id greater than after_id.
+
+    This is used after all roles of a level of the hierarchy were inserted
+    in bulk. Their parent circles must be part of the closure already.
+
+    """
+    child = db.alias(RoleModel.__table__, 'child')
+    new_roles = db.and_(child.c.organization_id == organization_id,
+                        child.c.id > after_id)
+
+    ancestors = db.select([role_closure.c.ancestor_id, child.c.id,
+                           role_closure.c.depth + 1]).where(
+        role_closure.c.descendant_id == child.c.parent_circle_id).where(
+        new_roles)
+
+    db.session.execute(role_closure.insert().from_select(
+        COLUMNS, ancestors))
+
+    own_rows = db.select([child.c.id, child.c.id, db.literal(0)]).where(
+        new_roles)
+
+    db.session.execute(role_closure.insert().from_select(
+        COLUMNS, own_rows))
+
+
+def delete_descendants(role_id,
+                       include_self=True):
+    """
+    Remove the descendants of a role from the closure.
+
+    If include_self is set, the role itself is removed as well. The ids of
+    the descendants are read first, since MySQL cannot delete from a table
+    that is read by a subquery of the same statement.
+
+    """
+    query = db.select([role_closure.c.descendant_id]).where(
+        role_closure.c.ancestor_id == role_id)
+
+    if not include_self:
+        query = query.where(role_closure.c.depth > 0)
+
+    ids = [row[0] for row in db.session.execute(query)]
+
+    if ids:
+        db.session.execute(role_closure.delete().where(
+            role_closure.c.descendant_id.in_(ids)))
+
+
+def rebuild(organization_id=None):
+    """
+    Rebuild the closure from the parent circle ids.
+
+    The closure is derived one level of the hierarchy at a time: each level
+    is inserted with a single INSERT ... SELECT from the rows of the level
+    above, so that no recursive query is needed. This fills the closure of
+    databases that were created before it was maintained, and of
+    organizations whose roles were imported in bulk. If an organization id
+    is given, only the closure of its roles is rebuilt.
+
+    """
+    roles = db.select([RoleModel.id, RoleModel.id, db.literal(0)])
+    child = db.alias(RoleModel.__table__, 'child')
+    delete = role_closure.delete()
+
+    if organization_id is not None:
+        roles = roles.where(RoleModel.organization_id == organization_id)
+        delete = delete.where(role_closure.c.descendant_id.in_(
+            db.select([RoleModel.id]).where(
+                RoleModel.organization_id == organization_id)))
+
+    db.session.execute(delete)
+    db.session.execute(role_closure.insert().from_select(COLUMNS, roles))
+
+    depth = 0
+    inserted = True
+
+    while inserted:
+        children = db.select([role_closure.c.ancestor_id, child.c.id,
+                              role_closure.c.depth + 1]).where(
+            child.c.parent_circle_id == role_closure.c.descendant_id).where(
+            role_closure.c.depth == depth)
+
+        if organization_id is not None:
+            children = children.where(
+                child.c.organization_id == organization_id)
+
+        inserted = db.session.execute(role_closure.insert().from_select(
+            COLUMNS, children)).rowcount > 0
+        depth += 1
@@ -0,0 +1,458 @@
+"""
+Define the background deletion of organizations.
+
+Deleting an organization only marks it as deleted and records a deletion
+job. A worker deletes the rows of the organization afterwards, in the order
+of their dependencies and in chunks of bounded size. Each chunk is deleted
+in its own transaction, so that no lock is held for long and a large
+organization never has to fit into memory. The ids of a chunk are read
+before they are deleted, since MySQL cannot delete from a table that is
+read by a subquery of the same statement.
+
+A job records its step and the number of rows it has deleted. The steps
+are idempotent, so that a job whose worker died is resumed by another
+worker once its lease has expired. The workers run in their own process:
+
+    python -m swarm_intelligence_app.common.deletion
+
+"""
+import argparse
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import abort, current_app
+from swarm_intelligence_app.common.response_cache import get_backend, \
+    get_organization_id
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.accountability import Accountability as \
+    AccountabilityModel
+from swarm_intelligence_app.models.circle import Circle as CircleModel
+from swarm_intelligence_app.models.domain import Domain as DomainModel
+from swarm_intelligence_app.models.invitation import \
+    Invitation as InvitationModel
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.organization_deletion import \
+    DeletionStatus
+from swarm_intelligence_app.models.organization_deletion import \
+    OrganizationDeletion as OrganizationDeletionModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.models.role_member import role_member
+from swarm_intelligence_app.models.search_posting import search_posting
+
+logger = logging.getLogger(__name__)
+
+
+def check_organization(f):
+    """
+    Abort with 404 if the requested node belongs to a deleted organization.
+
+    An organization is also marked as deleted while it is imported, so the
+    nodes of a half-imported organization are not found either. The
+    decorator must be applied below the authentication decorator and the
+    cache decorator; cached responses stay valid, since deleting an
+    organization bumps its generation.
+
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        organization_id = get_organization_id(get_backend(), kwargs)
+
+        if organization_id is not None and db.session.query(
+                OrganizationModel.is_deleted).filter(
+                OrganizationModel.id == organization_id).scalar():
+            abort(404)
+
+        return f(*args, **kwargs)
+
+    return decorated
+
+
+def get_roles(organization_id):
+    """
+    Return a query on the ids of the roles of an organization.
+
+    """
+    return db.select([RoleModel.id]).where(
+        RoleModel.organization_id == organization_id)
+
+
+def delete_chunk(query,
+                 statement):
+    """
+    Read a chunk of ids and apply a statement to them.
+
+    Returns the number of ids and the number of affected rows.
+
+    """
+    ids = [row[0] for row in db.session.execute(query)]
+
+    if not ids:
+        return 0, 0
+
+    return len(ids), db.session.execute(statement(ids)).rowcount
+
+
+def delete_search_postings(organization_id,
+                           size):
+    """
+    Delete the search postings of a chunk of entities.
+
+    """
+    in_organization = search_posting.c.organization_id == organization_id
+    return delete_chunk(
+        db.select([search_posting.c.entity_id]).where(
+            in_organization).distinct().limit(size),
+        lambda ids: search_posting.delete().where(in_organization).where(
+            search_posting.c.entity_id.in_(ids)))
+
+
+def delete_closure(organization_id,
+                   size):
+    """
+    Delete the closure rows of a chunk of roles.
+
+    """
+    return delete_chunk(
+        db.select([role_closure.c.descendant_id]).where(
+            role_closure.c.descendant_id.in_(
+                get_roles(organization_id))).distinct().limit(size),
+        lambda ids: role_closure.delete().where(
+            role_closure.c.descendant_id.in_(ids)))
+
+
+def delete_role_members(organization_id,
+                        size):
+    """
+    Delete the members of a chunk of roles.
+
+    """
+    return delete_chunk(
+        db.select([role_member.c.role_id]).where(
+            role_member.c.role_id.in_(
+                get_roles(organization_id))).distinct().limit(size),
+        lambda ids: role_member.delete().where(
+            role_member.c.role_id.in_(ids)))
+
+
+def delete_policies(organization_id,
+                    size):
+    """
+    Delete a chunk of policies.
+
+    """
+    domains = db.select([DomainModel.id]).where(
+        DomainModel.role_id.in_(get_roles(organization_id)))
+
+    return delete_chunk(
+        db.select([PolicyModel.id]).where(
+            PolicyModel.domain_id.in_(domains)).limit(size),
+        lambda ids: PolicyModel.__table__.delete().where(
+            PolicyModel.id.in_(ids)))
+
+
+def delete_domains(organization_id,
+                   size):
+    """
+    Delete a chunk of domains.
+
+    """
+    return delete_chunk(
+        db.select([DomainModel.id]).where(
+            DomainModel.role_id.in_(get_roles(organization_id))).limit(size),
+        lambda ids: DomainModel.__table__.delete().where(
+            DomainModel.id.in_(ids)))
+
+
+def delete_accountabilities(organization_id,
+                            size):
+    """
+    Delete a chunk of accountabilities.
+
+    """
+    return delete_chunk(
+        db.select([AccountabilityModel.id]).where(
+            AccountabilityModel.role_id.in_(
+                get_roles(organization_id))).limit(size),
+        lambda ids: AccountabilityModel.__table__.delete().where(
+            AccountabilityModel.id.in_(ids)))
+
+
+def detach_roles(organization_id,
+                 size):
+    """
+    Detach a chunk of roles from their parent circles.
+
+    Roles and circles refer to each other, so the roles are detached before
+    the circles are deleted. No rows are deleted by this step.
+
+    """
+    count, rows = delete_chunk(
+        db.select([RoleModel.id]).where(
+            RoleModel.organization_id == organization_id).where(
+            RoleModel.parent_circle_id.isnot(None)).limit(size),
+        lambda ids: RoleModel.__table__.update().where(
+            RoleModel.id.in_(ids)).values(parent_circle_id=None))
+
+    return count, 0
+
+
+def delete_circles(organization_id,
+                   size):
+    """
+    Delete a chunk of circles.
+
+    """
+    return delete_chunk(
+        db.select([CircleModel.id]).where(
+            CircleModel.id.in_(get_roles(organization_id))).limit(size),
+        lambda ids: CircleModel.__table__.delete().where(
+            CircleModel.id.in_(ids)))
+
+
+def delete_roles(organization_id,
+                 size):
+    """
+    Delete a chunk of roles.
+
+    """
+    return delete_chunk(
+        get_roles(organization_id).limit(size),
+        lambda ids: RoleModel.__table__.delete().where(
+            RoleModel.id.in_(ids)))
+
+
+def delete_partners(organization_id,
+                    size):
+    """
+    Delete a chunk of partners.
+
+    """
+    return delete_chunk(
+        db.select([PartnerModel.id]).where(
+            PartnerModel.organization_id == organization_id).limit(size),
+        lambda ids: PartnerModel.__table__.delete().where(
+            PartnerModel.id.in_(ids)))
+
+
+def delete_invitations(organization_id,
+                       size):
+    """
+    Delete a chunk of invitations.
+
+    """
+    return delete_chunk(
+        db.select([InvitationModel.id]).where(
+            InvitationModel.organization_id == organization_id).limit(size),
+        lambda ids: InvitationModel.__table__.delete().where(
+            InvitationModel.id.in_(ids)))
+
+
+def delete_organization(organization_id,
+                        size):
+    """
+    Delete the organization itself.
+
+    """
+    rows = db.session.execute(OrganizationModel.__table__.delete().where(
+        OrganizationModel.id == organization_id)).rowcount
+
+    return rows, rows
+
+
+STEPS = (
+    ('search postings', delete_search_postings),
+    ('role closure', delete_closure),
+    ('role members', delete_role_members),
+    ('policies', delete_policies),
+    ('domains', delete_domains),
+    ('accountabilities', delete_accountabilities),
+    ('role parents', detach_roles),
+    ('circles', delete_circles),
+    ('roles', delete_roles),
+    ('partners', delete_partners),
+    ('invitations', delete_invitations),
+    ('organization', delete_organization)
+)
+
+
+def claim(worker_id,
+          lease):
+    """
+    Lease the oldest pending deletion to a worker and return it or None.
+
+    """
+    now = datetime.utcnow()
+    table = OrganizationDeletionModel.__table__
+    available = db.or_(table.c.leased_until.is_(None),
+                       table.c.leased_until < now)
+
+    id = db.session.execute(db.select([table.c.id]).where(
+        table.c.status == DeletionStatus.pending).where(available).order_by(
+        table.c.id).limit(1)).scalar()
+
+    if id is None:
+        return None
+
+    result = db.session.execute(table.update().where(
+        table.c.id == id).where(available).values(
+        leased_by=worker_id, leased_until=now + timedelta(seconds=lease)))
+    db.session.commit()
+
+    if result.rowcount != 1:
+        return None
+
+    return OrganizationDeletionModel.query.get(id)
+
+
+def run(deletion,
+        worker_id):
+    """
+    Run the steps of a deletion.
+
+    Every chunk is committed together with the progress of the deletion and
+    a renewed lease. A step is done once it reads fewer ids than the chunk
+    size. Returns False if the deletion has been leased to another worker in
+    the meantime.
+
+    """
+    config = current_app.config
+    size = config['SI_DELETION_CHUNK_SIZE']
+    lease = config['SI_DELETION_LEASE']
+    table = OrganizationDeletionModel.__table__
+
+    for step, delete in STEPS:
+        while True:
+            count, rows = delete(deletion.organization_id, size)
+            leased = db.session.execute(table.update().where(
+                table.c.id == deletion.id).where(
+                table.c.leased_by == worker_id).values(
+                step=step, deleted_rows=table.c.deleted_rows + rows,
+                leased_until=datetime.utcnow() + timedelta(seconds=lease)))
+
+            if leased.rowcount != 1:
+                db.session.rollback()
+                return False
+
+            db.session.commit()
+
+            if rows:
+                logger.info('Deleted %d rows of %s of organization %d.',
+                            rows, step, deletion.organization_id)
+
+            if count < size:
+                break
+
+    db.session.execute(table.update().where(table.c.id == deletion.id).values(
+        status=DeletionStatus.done, finished_at=datetime.utcnow(),
+        leased_by=None, leased_until=None))
+    db.session.commit()
+
+    return True
+
+
+def run_pending():
+    """
+    Run all pending deletions and return their number.
+
+    """
+    worker_id = str(uuid.uuid4())
+    lease = current_app.config['SI_DELETION_LEASE']
+    count = 0
+
+    while True:
+        deletion = claim(worker_id, lease)
+
+        if deletion is None:
+            return count
+
+        count += run(deletion, worker_id)
+
+
+class DeletionWorker:
+    """
+    Define a thread that runs the pending deletions.
+
+    A worker that finds no pending deletion waits for the poll interval
+    before it looks again.
+
+    """
+    def __init__(self,
+                 app):
+        """
+        Initialize a worker for an app.
+
+        """
+        self.app = app
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        Start the thread of the worker.
+
+        """
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name='deletion',
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the thread of the worker after its current deletion.
+
+        """
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        """
+        Run pending deletions until the worker is stopped.
+
+        """
+        with self.app.app_context():
+            interval = self.app.config['SI_DELETION_POLL_INTERVAL']
+
+            try:
+                while not self.stopped.is_set():
+                    try:
+                        run_pending()
+                    except Exception:
+                        logger.exception('Cannot run the deletions.')
+                        db.session.rollback()
+
+                    self.stopped.wait(interval)
+            finally:
+                db.session.remove()
+
+
+def main():
+    """
+    Run a worker until it is interrupted.
+
+    """
+    # imported here, since importing the app creates an app
+    from swarm_intelligence_app.app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    worker = DeletionWorker(create_app())
+    worker.start()
+
+    try:
+        worker.stopped.wait()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Define any functions for entity tags and conditional requests.
+
+"""
+from flask import abort, request
+from sqlalchemy.orm.exc import StaleDataError
+from swarm_intelligence_app.models import db
+from werkzeug.http import quote_etag
+
+
+def get_etag(*entities):
+    """
+    Return a strong entity tag for the given entities.
+
+    The tag is built from the type, the id and the version of each entity.
+    The version of an entity is incremented on every update, so that the tag
+    changes whenever the representation of the entities changes.
+
+    """
+    return '-'.join('%s.%s.%s' % (type(entity).__name__.lower(), entity.id,
+                                  entity.version) for entity in entities)
+
+
+def get_representation_etag(etag):
+    """
+    Return the entity tag of the representation that a request selects.
+
+    Sparse fieldsets and expanded relationships change the representation of
+    the entities, so the selected fields and relationships become part of
+    the tag.
+
+    """
+    for name in ('fields', 'expand'):
+        value = request.args.get(name)
+
+        if value:
+            items = {item.strip() for item in value.split(',')} - {''}
+            etag = '%s;%s=%s' % (etag, name, ':'.join(sorted(items)))
+
+    return etag
+
+
+def etag_headers(etag):
+    """
+    Return the headers that announce an entity tag.
+
+    """
+    return {'ETag': quote_etag(get_representation_etag(etag))}
+
+
+def is_not_modified(etag):
+    """
+    Return whether the client's If-None-Match header matches an entity tag.
+
+    """
+    return request.if_none_match.contains(get_representation_etag(etag))
+
+
+def check_if_match(etag):
+    """
+    Abort with 412 if the client's If-Match header does not match a tag.
+
+    The tags of representations with sparse fieldsets or expanded
+    relationships match the tag of their entity, since a write only depends
+    on the entity itself.
+
+    """
+    if_match = request.if_match
+
+    if not if_match or if_match.star_tag:
+        return
+
+    if etag not in {tag.split(';', 1)[0] for tag in if_match.as_set()}:
+        abort(412, 'The resource has been modified.')
+
+
+def commit():
+    """
+    Commit the session or abort with 412 if an entity changed concurrently.
+
+    Updates are only applied if the version of an entity has not changed
+    since the entity was read, which makes conditional requests safe without
+    holding any locks.
+
+    """
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        abort(412, 'The resource has been modified.')
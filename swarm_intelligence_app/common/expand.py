@@ -0,0 +1,185 @@
+"""
+Define any functions to embed related nodes in the representation of a node.
+
+The expand parameter of a request is a comma-separated list of relationships
+of the requested node. Nested relationships are separated by dots, e.g.
+'domains.policies,accountabilities,members'. The relationships that a model
+can expand are declared in its expandable_relationships attribute. Each
+relationship is loaded eagerly with a subquery, so that an expanded node is
+read with one query per relationship, regardless of the number of related
+nodes.
+
+"""
+import hashlib
+from operator import attrgetter
+
+from flask import abort, request
+from sqlalchemy.orm import subqueryload
+from swarm_intelligence_app.common.etag import get_etag
+from swarm_intelligence_app.common.serializer import get_serializer
+
+MAX_DEPTH = 3
+
+
+def get_related_model(model,
+                      name):
+    """
+    Return the model that a relationship of a model refers to.
+
+    """
+    return getattr(model, name).property.mapper.class_
+
+
+def get_requested_expansion(*models):
+    """
+    Return the tree of relationships selected by the expand parameter.
+
+    Each key of the tree is the name of a relationship and each value the
+    tree of its own expanded relationships. Relationships on the first level
+    must belong to one of the given models. Aborts with 400 if a
+    relationship cannot be expanded or if it is nested too deeply.
+
+    """
+    value = request.args.get('expand')
+    expansion = {}
+
+    if not value:
+        return expansion
+
+    for path in value.split(','):
+        names = [name.strip() for name in path.split('.')]
+
+        if not names[0]:
+            continue
+
+        if len(names) > MAX_DEPTH:
+            abort(400, 'Relationships cannot be expanded deeper than %d '
+                       'levels.' % MAX_DEPTH)
+
+        current_models = models
+        tree = expansion
+
+        for name in names:
+            model = next((model for model in current_models
+                          if name in model.expandable_relationships), None)
+
+            if model is None:
+                abort(400, 'Unknown relationship: %s.' % path.strip())
+
+            current_models = (get_related_model(model, name),)
+            tree = tree.setdefault(name, {})
+
+    return expansion
+
+
+def get_model_expansion(model,
+                        expansion):
+    """
+    Return the part of an expansion that belongs to a model.
+
+    """
+    return {name: tree for name, tree in expansion.items()
+            if name in model.expandable_relationships}
+
+
+def get_loader_options(model,
+                       expansion,
+                       loader=None):
+    """
+    Return the query options that eagerly load the relationships of a model.
+
+    If a loader is given, the relationships are loaded relative to it.
+
+    """
+    options = []
+
+    for name, tree in sorted(expansion.items()):
+        attribute = getattr(model, name)
+
+        if loader is None:
+            option = subqueryload(attribute)
+        else:
+            option = loader.subqueryload(attribute)
+
+        options.append(option)
+        options.extend(get_loader_options(get_related_model(model, name),
+                                          tree, option))
+
+    return options
+
+
+def get_related(instance,
+                name):
+    """
+    Return the nodes of a relationship of a node ordered by their id.
+
+    """
+    value = getattr(instance, name)
+
+    if value is None:
+        return []
+
+    if isinstance(value, list):
+        return sorted(value, key=attrgetter('id'))
+
+    return [value]
+
+
+def expand(data,
+           instance,
+           expansion):
+    """
+    Add the expanded relationships of a node to its representation.
+
+    """
+    for name, tree in expansion.items():
+        related = [expand(get_serializer(type(item)).dump(item), item, tree)
+                   for item in get_related(instance, name)]
+
+        if getattr(type(instance), name).property.uselist:
+            data[name] = related
+        else:
+            data[name] = related[0] if related else None
+
+    return data
+
+
+def get_expanded_entities(instance,
+                          expansion):
+    """
+    Return all nodes that are embedded in the representation of a node.
+
+    """
+    entities = []
+
+    for name, tree in sorted(expansion.items()):
+        for item in get_related(instance, name):
+            entities.append(item)
+            entities.extend(get_expanded_entities(item, tree))
+
+    return entities
+
+
+def get_expanded_etag(etag,
+                      instances,
+                      expansion):
+    """
+    Return the entity tag of nodes together with their expanded nodes.
+
+    The tags of the expanded nodes are hashed, so that the tag has a fixed
+    length. The tag changes whenever an expanded node is updated, added or
+    removed.
+
+    """
+    entities = []
+
+    for instance in instances:
+        entities.extend(get_expanded_entities(
+            instance, get_model_expansion(type(instance), expansion)))
+
+    if not entities:
+        return etag
+
+    digest = hashlib.sha1(get_etag(*entities).encode('utf-8')).hexdigest()
+
+    return '%s;%s' % (etag, digest[:20])
@@ -0,0 +1,193 @@
+"""
+Define the export of an organization as a stream of JSON lines.
+
+An export starts with a header that holds the version of its format and
+continues with one line per row of the organization: the organization
+itself and its invitations, partners, roles, circles, domains, policies,
+accountabilities and role members, in this order. Each line holds the type
+and the columns of its row:
+
+    {"type": "role", "data": {"id": 2, "type": "circle", ...}}
+
+The role closure and the search postings are derived from these rows, so
+they are not exported. The users are not exported either: a partner only
+refers to its user by the id of the user.
+
+Each table is read with a server-side cursor in chunks of
+SI_EXPORT_CHUNK_SIZE rows, and each chunk is encoded and handed on before
+the next one is read, so that the memory of an export does not grow with
+the size of the organization. All tables are read in the transaction of
+the session, which gives a consistent snapshot on MySQL. An organization is
+exported from the command line with:
+
+    python -m swarm_intelligence_app.common.export 1 --gzip \\
+        --output organization.ndjson.gz
+
+"""
+import argparse
+import json
+import sys
+import zlib
+from enum import Enum
+
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.accountability import Accountability as \
+    AccountabilityModel
+from swarm_intelligence_app.models.circle import Circle as CircleModel
+from swarm_intelligence_app.models.domain import Domain as DomainModel
+from swarm_intelligence_app.models.invitation import \
+    Invitation as InvitationModel
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_member import role_member
+
+FORMAT_VERSION = 1
+
+
+def get_sections(organization_id):
+    """
+    Return the type of the rows and a query on the rows of each table of an
+    organization, in the order of the export.
+
+    """
+    roles = db.select([RoleModel.id]).where(
+        RoleModel.organization_id == organization_id)
+    domains = db.select([DomainModel.id]).where(
+        DomainModel.role_id.in_(roles))
+
+    return (
+        ('organization', OrganizationModel.__table__.select().where(
+            OrganizationModel.id == organization_id)),
+        ('invitation', InvitationModel.__table__.select().where(
+            InvitationModel.organization_id == organization_id).order_by(
+            InvitationModel.id)),
+        ('partner', PartnerModel.__table__.select().where(
+            PartnerModel.organization_id == organization_id).order_by(
+            PartnerModel.id)),
+        ('role', RoleModel.__table__.select().where(
+            RoleModel.organization_id == organization_id).order_by(
+            RoleModel.id)),
+        ('circle', CircleModel.__table__.select().where(
+            CircleModel.id.in_(roles)).order_by(CircleModel.id)),
+        ('domain', DomainModel.__table__.select().where(
+            DomainModel.role_id.in_(roles)).order_by(DomainModel.id)),
+        ('policy', PolicyModel.__table__.select().where(
+            PolicyModel.domain_id.in_(domains)).order_by(PolicyModel.id)),
+        ('accountability', AccountabilityModel.__table__.select().where(
+            AccountabilityModel.role_id.in_(roles)).order_by(
+            AccountabilityModel.id)),
+        ('role_member', role_member.select().where(
+            role_member.c.role_id.in_(roles)).order_by(
+            role_member.c.role_id, role_member.c.partner_id))
+    )
+
+
+def encode(record_type,
+           data):
+    """
+    Return the line of a row.
+
+    Enums are written as their names.
+
+    """
+    return json.dumps({
+        'type': record_type,
+        'data': {key: value.name if isinstance(value, Enum) else value
+                 for key, value in data.items()}
+    }, separators=(',', ':')) + '\n'
+
+
+def export(organization_id,
+           size):
+    """
+    Yield the lines of the export of an organization in chunks of at most
+    size rows, encoded as UTF-8.
+
+    """
+    yield encode('export', {
+        'version': FORMAT_VERSION,
+        'organization_id': organization_id
+    }).encode()
+
+    for record_type, query in get_sections(organization_id):
+        result = db.session.execute(query.execution_options(
+            stream_results=True))
+        keys = result.keys()
+
+        while True:
+            rows = result.fetchmany(size)
+
+            if not rows:
+                break
+
+            yield ''.join(encode(record_type, dict(zip(keys, row)))
+                          for row in rows).encode()
+
+
+def compress(chunks):
+    """
+    Yield the chunks of a stream compressed as a single gzip member.
+
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def main():
+    """
+    Write the export of an organization to a file or stdout.
+
+    """
+    # imported here, since importing the app creates an app
+    from swarm_intelligence_app.app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('organization_id', type=int,
+                        help='id of the organization to export')
+    parser.add_argument('--output',
+                        help='file to write to (default: stdout)')
+    parser.add_argument('--gzip', action='store_true',
+                        help='compress the export with gzip')
+    parser.add_argument('--uri',
+                        help='database URI (default: from the config)')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    if args.uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+
+    with app.app_context():
+        if OrganizationModel.query.get(args.organization_id) is None:
+            parser.error('organization %d does not exist' %
+                         args.organization_id)
+
+        chunks = export(args.organization_id,
+                        app.config['SI_EXPORT_CHUNK_SIZE'])
+
+        if args.gzip:
+            chunks = compress(chunks)
+
+        output = open(args.output, 'wb') if args.output else \
+            sys.stdout.buffer
+
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if args.output:
+                output.close()
+
+
+if __name__ == '__main__':
+    main()
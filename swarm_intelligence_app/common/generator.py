@@ -0,0 +1,432 @@
+"""
+Define a generator of large, synthetic organizations.
+
+The shape of the organizations is configurable: the number of partners, the
+depth and the branching factor of the circle hierarchy, the roles per
+circle, the domains, policies and accountabilities per role and the
+pending invitations. All rows of a table are inserted with multi-row
+inserts, and the ids of each level of the hierarchy are read back with a
+single query, so that 100,000 rows are loaded within seconds. The search
+index of an organization is built once its rows are inserted. The
+generated data depends on the seed only.
+
+The generator can seed a database from the command line:
+
+    python -m swarm_intelligence_app.common.generator --partners 1000 \\
+        --depth 4 --branching 4 --roles-per-circle 10
+
+"""
+import argparse
+import random
+import time
+import uuid
+
+from swarm_intelligence_app.common import closure
+from swarm_intelligence_app.common import search
+from swarm_intelligence_app.common.bootstrap import CORE_ROLES
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.accountability import Accountability as \
+    AccountabilityModel
+from swarm_intelligence_app.models.circle import Circle as CircleModel
+from swarm_intelligence_app.models.domain import Domain as DomainModel
+from swarm_intelligence_app.models.invitation import \
+    Invitation as InvitationModel
+from swarm_intelligence_app.models.invitation import InvitationStatus
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.models.role_member import role_member
+from swarm_intelligence_app.models.search_posting import search_posting
+from swarm_intelligence_app.models.user import User as UserModel
+
+CHUNK_SIZE = 10000
+
+FIRSTNAMES = ('Ada', 'Alan', 'Barbara', 'Claude', 'Donald', 'Edsger',
+              'Frances', 'Grace', 'John', 'Ken', 'Margaret', 'Niklaus')
+LASTNAMES = ('Dijkstra', 'Hopper', 'Knuth', 'Liskov', 'Lovelace', 'McCarthy',
+             'Hamilton', 'Shannon', 'Allen', 'Thompson', 'Turing', 'Wirth')
+WORDS = ('align', 'budget', 'coach', 'community', 'customer', 'deliver',
+         'design', 'develop', 'document', 'event', 'facilitate', 'finance',
+         'hiring', 'infrastructure', 'legal', 'maintain', 'marketing',
+         'meeting', 'onboarding', 'operations', 'partner', 'plan', 'product',
+         'quality', 'release', 'report', 'research', 'review', 'sales',
+         'security', 'strategy', 'support', 'training', 'website')
+
+TABLES = (
+    ('users', UserModel.__table__),
+    ('organizations', OrganizationModel.__table__),
+    ('partners', PartnerModel.__table__),
+    ('invitations', InvitationModel.__table__),
+    ('roles', RoleModel.__table__),
+    ('circles', CircleModel.__table__),
+    ('role closure', role_closure),
+    ('domains', DomainModel.__table__),
+    ('policies', PolicyModel.__table__),
+    ('accountabilities', AccountabilityModel.__table__),
+    ('role members', role_member),
+    ('search postings', search_posting)
+)
+
+
+def insert_rows(table,
+                rows):
+    """
+    Insert rows into a table with one multi-row insert per chunk.
+
+    """
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[start:start + CHUNK_SIZE])
+
+
+def get_max_id(model):
+    """
+    Return the greatest id of a model or 0.
+
+    Rows that are inserted afterwards have greater ids, so that they can be
+    read back with a single range query. This requires that no other
+    process inserts rows while the generator runs.
+
+    """
+    return db.session.query(db.func.max(model.id)).scalar() or 0
+
+
+def get_text(rng,
+             count):
+    """
+    Return a random text of the given number of words.
+
+    """
+    return ' '.join(rng.choice(WORDS) for i in range(count)).capitalize()
+
+
+def generate_users(count,
+                   seed):
+    """
+    Return the id, names and email of the given number of users.
+
+    The users of a seed are only created once, so that all organizations of
+    a seed share the same users.
+
+    """
+    rng = random.Random('users-%d' % seed)
+    prefix = 'generated-%d-' % seed
+    columns = [UserModel.id, UserModel.firstname, UserModel.lastname,
+               UserModel.email, UserModel.google_id]
+
+    def read():
+        return {row[-1]: row[:-1] for row in db.session.query(
+            *columns).filter(UserModel.google_id.like(prefix + '%'))}
+
+    users = read()
+    rows = []
+
+    for i in range(count):
+        firstname = rng.choice(FIRSTNAMES)
+        lastname = rng.choice(LASTNAMES)
+
+        if prefix + str(i) not in users:
+            rows.append({
+                'google_id': prefix + str(i),
+                'firstname': firstname,
+                'lastname': lastname,
+                'email': 'user%d.%d@example.org' % (i, seed),
+                'is_active': True
+            })
+
+    if rows:
+        insert_rows(UserModel.__table__, rows)
+        users = read()
+
+    return [users[prefix + str(i)] for i in range(count)]
+
+
+def generate_partners(organization_id,
+                      users):
+    """
+    Insert a partner for each user and return the ids of the partners.
+
+    Every fiftieth partner is an admin, and the first partner is always one.
+
+    """
+    insert_rows(PartnerModel.__table__, [{
+        'type': PartnerType.member if i % 50 else PartnerType.admin,
+        'firstname': firstname,
+        'lastname': lastname,
+        'email': email,
+        'is_active': True,
+        'user_id': user_id,
+        'organization_id': organization_id
+    } for i, (user_id, firstname, lastname, email) in enumerate(users)])
+
+    return [row[0] for row in db.session.query(PartnerModel.id).filter(
+        PartnerModel.organization_id == organization_id).order_by(
+        PartnerModel.id)]
+
+
+def generate_roles(rng,
+                   organization_id,
+                   depth,
+                   branching,
+                   roles_per_circle):
+    """
+    Insert the circle hierarchy and return the ids of all roles.
+
+    Every circle has the core roles and the given number of custom roles.
+    Circles above the given depth also have the given number of sub-circles.
+    All roles of a level are inserted at once and added to the closure of
+    the hierarchy with two statements.
+
+    """
+    anchor_circle_id = db.session.execute(RoleModel.__table__.insert(), {
+        'type': RoleType.circle,
+        'name': 'General',
+        'purpose': get_text(rng, 6),
+        'parent_circle_id': None,
+        'organization_id': organization_id
+    }).inserted_primary_key[0]
+
+    db.session.execute(CircleModel.__table__.insert(),
+                       {'id': anchor_circle_id, 'strategy': None})
+    closure.insert_role(anchor_circle_id, None)
+
+    role_ids = [anchor_circle_id]
+    circle_ids = [anchor_circle_id]
+    level = 1
+
+    while circle_ids:
+        rows = []
+
+        for circle_id in circle_ids:
+            rows.extend({
+                'type': type,
+                'name': name,
+                'purpose': purpose,
+                'parent_circle_id': circle_id,
+                'organization_id': organization_id
+            } for type, name, purpose in CORE_ROLES)
+
+            for i in range(roles_per_circle):
+                rows.append({
+                    'type': RoleType.custom,
+                    'name': get_text(rng, 2),
+                    'purpose': get_text(rng, 8),
+                    'parent_circle_id': circle_id,
+                    'organization_id': organization_id
+                })
+
+            if level < depth:
+                for i in range(branching):
+                    rows.append({
+                        'type': RoleType.circle,
+                        'name': get_text(rng, 2),
+                        'purpose': get_text(rng, 8),
+                        'parent_circle_id': circle_id,
+                        'organization_id': organization_id
+                    })
+
+        after_id = get_max_id(RoleModel)
+        insert_rows(RoleModel.__table__, rows)
+        closure.insert_roles_after(organization_id, after_id)
+
+        roles = db.session.query(RoleModel.id, RoleModel.type).filter(
+            RoleModel.organization_id == organization_id).filter(
+            RoleModel.id > after_id).order_by(RoleModel.id).all()
+
+        circle_ids = [id for id, type in roles if type == RoleType.circle]
+        insert_rows(CircleModel.__table__, [
+            {'id': id, 'strategy': get_text(rng, 6)} for id in circle_ids])
+
+        role_ids.extend(id for id, type in roles)
+        level += 1
+
+    return role_ids
+
+
+def generate_organization(rng,
+                          name,
+                          users,
+                          depth,
+                          branching,
+                          roles_per_circle,
+                          domains_per_role,
+                          policies_per_domain,
+                          accountabilities_per_role,
+                          members_per_role,
+                          invitations):
+    """
+    Insert an organization and return its id.
+
+    The caller must commit the session.
+
+    """
+    organization_id = db.session.execute(
+        OrganizationModel.__table__.insert(),
+        {'name': name}).inserted_primary_key[0]
+
+    partner_ids = generate_partners(organization_id, users)
+    role_ids = generate_roles(rng, organization_id, depth, branching,
+                              roles_per_circle)
+
+    after_id = get_max_id(DomainModel)
+    insert_rows(DomainModel.__table__, [
+        {'title': get_text(rng, 3), 'role_id': role_id}
+        for role_id in role_ids for i in range(domains_per_role)])
+
+    domain_ids = [row[0] for row in db.session.query(DomainModel.id).join(
+        RoleModel, RoleModel.id == DomainModel.role_id).filter(
+        RoleModel.organization_id == organization_id).filter(
+        DomainModel.id > after_id).order_by(DomainModel.id)]
+
+    insert_rows(PolicyModel.__table__, [
+        {
+            'title': get_text(rng, 3),
+            'description': get_text(rng, 12),
+            'domain_id': domain_id
+        } for domain_id in domain_ids for i in range(policies_per_domain)])
+
+    insert_rows(AccountabilityModel.__table__, [
+        {'title': get_text(rng, 4), 'role_id': role_id}
+        for role_id in role_ids for i in range(accountabilities_per_role)])
+
+    insert_rows(InvitationModel.__table__, [
+        {
+            'code': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'email': 'invitee%d.%d@example.org' % (i, organization_id),
+            'status': InvitationStatus.pending,
+            'organization_id': organization_id
+        } for i in range(invitations)])
+
+    # the first partner is an admin and a member of the anchor circle
+    memberships = {(partner_ids[0], role_ids[0])} if partner_ids else set()
+
+    for role_id in role_ids:
+        for partner_id in rng.sample(partner_ids,
+                                     min(members_per_role, len(partner_ids))):
+            memberships.add((partner_id, role_id))
+
+    insert_rows(role_member, [
+        {'partner_id': partner_id, 'role_id': role_id}
+        for partner_id, role_id in sorted(memberships)])
+
+    search.rebuild(organization_id)
+
+    return organization_id
+
+
+def generate(organizations=1,
+             partners=100,
+             depth=3,
+             branching=3,
+             roles_per_circle=5,
+             domains_per_role=1,
+             policies_per_domain=1,
+             accountabilities_per_role=2,
+             members_per_role=1,
+             invitations=10,
+             seed=0,
+             user_id=None):
+    """
+    Insert organizations of the given shape and return their ids.
+
+    The organizations of a seed share the same users. If a user id is
+    given, the user takes the place of the first generated user and is an
+    admin of every organization. The caller must commit the session.
+
+    """
+    users = generate_users(partners, seed)
+
+    if user_id is not None and users:
+        user = db.session.query(UserModel.id, UserModel.firstname,
+                                UserModel.lastname, UserModel.email).filter(
+            UserModel.id == user_id).one()
+        users = [tuple(user)] + users[1:]
+
+    return [generate_organization(
+        random.Random('organization-%d-%d' % (seed, i)),
+        'Generated %d-%d' % (seed, i), users, depth, branching,
+        roles_per_circle, domains_per_role, policies_per_domain,
+        accountabilities_per_role, members_per_role, invitations)
+        for i in range(organizations)]
+
+
+def count_rows():
+    """
+    Return the number of rows of each table that the generator fills.
+
+    """
+    return [(name, db.session.query(db.func.count()).select_from(
+        table).scalar()) for name, table in TABLES]
+
+
+def main():
+    """
+    Seed the database of the app.
+
+    """
+    # imported here, since importing the app creates an app
+    from swarm_intelligence_app.app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--uri',
+                        help='database URI (default: from the config)')
+    parser.add_argument('--organizations', type=int, default=1,
+                        help='number of organizations (default: 1)')
+    parser.add_argument('--partners', type=int, default=100,
+                        help='partners per organization (default: 100)')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='levels of circles (default: 3)')
+    parser.add_argument('--branching', type=int, default=3,
+                        help='sub-circles per circle (default: 3)')
+    parser.add_argument('--roles-per-circle', type=int, default=5,
+                        help='custom roles per circle (default: 5)')
+    parser.add_argument('--domains-per-role', type=int, default=1,
+                        help='domains per role (default: 1)')
+    parser.add_argument('--policies-per-domain', type=int, default=1,
+                        help='policies per domain (default: 1)')
+    parser.add_argument('--accountabilities-per-role', type=int, default=2,
+                        help='accountabilities per role (default: 2)')
+    parser.add_argument('--members-per-role', type=int, default=1,
+                        help='partners per role (default: 1)')
+    parser.add_argument('--invitations', type=int, default=10,
+                        help='invitations per organization (default: 10)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed of the generated data (default: 0)')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    if args.uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+
+    with app.app_context():
+        db.create_all()
+        before = dict(count_rows())
+        start = time.perf_counter()
+
+        organization_ids = generate(
+            args.organizations, args.partners, args.depth, args.branching,
+            args.roles_per_circle, args.domains_per_role,
+            args.policies_per_domain, args.accountabilities_per_role,
+            args.members_per_role, args.invitations, args.seed)
+        db.session.commit()
+
+        elapsed = time.perf_counter() - start
+        total = 0
+
+        for name, count in count_rows():
+            total += count - before[name]
+            print('%-20s %10d' % (name, count - before[name]))
+
+        print('%-20s %10d rows in %.2f s (%.0f rows/s)' % (
+            'total', total, elapsed, total / elapsed))
+        print('organizations: %s' % ', '.join(map(str, organization_ids)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+"""
+Define any functions to verify Google ID tokens.
+
+"""
+import json
+import logging
+import re
+import threading
+import time
+
+import jwt
+import requests
+
+from flask import current_app
+
+TOKENINFO_URL = 'https://www.googleapis.com/oauth2/v3/tokeninfo'
+
+ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+logger = logging.getLogger(__name__)
+
+
+class URLKeySource:
+    """
+    Define a source that fetches a JSON Web Key Set over HTTP.
+
+    The lifetime of the fetched keys is taken from the max-age directive of
+    the response's Cache-Control header.
+
+    """
+    def __init__(self,
+                 url,
+                 default_max_age=3600):
+        """
+        Initialize a key source.
+
+        """
+        self.url = url
+        self.default_max_age = default_max_age
+
+    def fetch(self):
+        """
+        Return the key set and the number of seconds it may be cached.
+
+        """
+        response = requests.get(self.url, timeout=5)
+        response.raise_for_status()
+
+        max_age = self.default_max_age
+        match = re.search(r'max-age=(\d+)',
+                          response.headers.get('Cache-Control', ''))
+        if match is not None:
+            max_age = int(match.group(1))
+
+        return response.json(), max_age
+
+
+class FileKeySource:
+    """
+    Define a source that reads a JSON Web Key Set from a local file.
+
+    """
+    def __init__(self,
+                 path,
+                 default_max_age=3600):
+        """
+        Initialize a key source.
+
+        """
+        self.path = path
+        self.default_max_age = default_max_age
+
+    def fetch(self):
+        """
+        Return the key set and the number of seconds it may be cached.
+
+        """
+        with open(self.path) as file:
+            return json.load(file), self.default_max_age
+
+
+def create_key_source(url):
+    """
+    Return a key source for an http(s) URL, a file:// URL or a file path.
+
+    """
+    if url.startswith('http://') or url.startswith('https://'):
+        return URLKeySource(url)
+
+    if url.startswith('file://'):
+        url = url[len('file://'):]
+
+    return FileKeySource(url)
+
+
+class KeySet:
+    """
+    Define a cache of the public keys that Google signs ID tokens with.
+
+    Keys are fetched from a key source and kept for the lifetime announced
+    by the source. Shortly before the keys expire, they are refreshed in a
+    background thread while the current keys are still served. Only if the
+    keys have expired or an unknown key id is requested, the keys are
+    refreshed synchronously.
+
+    """
+    def __init__(self,
+                 source,
+                 refresh_margin=300,
+                 min_refresh_interval=60):
+        """
+        Initialize a key set.
+
+        """
+        self.source = source
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._expires = 0
+        self._fetched = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh(self):
+        """
+        Fetch the keys from the key source.
+
+        """
+        jwks, max_age = self.source.fetch()
+
+        keys = {}
+        for jwk in jwks.get('keys', []):
+            if jwk.get('kty') != 'RSA' or 'kid' not in jwk:
+                continue
+            keys[jwk['kid']] = jwt.algorithms.RSAAlgorithm.from_jwk(
+                json.dumps(jwk))
+
+        with self._lock:
+            self._keys = keys
+            self._fetched = time.monotonic()
+            self._expires = self._fetched + max_age
+
+    def _refresh_in_background(self):
+        """
+        Refresh the keys in a daemon thread, unless a refresh is running.
+
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning('Cannot refresh the Google signing keys: %s',
+                               e)
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get(self, kid):
+        """
+        Return the public key with the given key id or None.
+
+        """
+        now = time.monotonic()
+
+        may_refresh = now - self._fetched >= self.min_refresh_interval
+
+        if now >= self._expires or (kid not in self._keys and may_refresh):
+            self.refresh()
+        elif now >= self._expires - self.refresh_margin:
+            self._refresh_in_background()
+
+        return self._keys.get(kid)
+
+
+def get_key_set():
+    """
+    Return the key set of the current app.
+
+    """
+    key_set = current_app.extensions.get('si_google_keys')
+
+    if key_set is None:
+        key_set = KeySet(
+            create_key_source(current_app.config['SI_GOOGLE_CERTS_URL']))
+        current_app.extensions['si_google_keys'] = key_set
+
+    return key_set
+
+
+def verify_locally(token):
+    """
+    Verify an ID token against the cached signing keys of Google.
+
+    """
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+    except jwt.exceptions.InvalidTokenError:
+        return None
+
+    try:
+        key = get_key_set().get(kid)
+    except Exception as e:
+        logger.warning('Cannot fetch the Google signing keys: %s', e)
+        return None
+
+    if key is None:
+        return None
+
+    try:
+        data = jwt.decode(token, key, algorithms=['RS256'],
+                          audience=current_app.config['SI_GOOGLE_CLIENT_ID'])
+    except jwt.exceptions.InvalidTokenError:
+        return None
+
+    if data.get('iss') not in ISSUERS:
+        return None
+
+    return data
+
+
+def verify_remotely(token):
+    """
+    Verify an ID token using Google's tokeninfo endpoint.
+
+    """
+    try:
+        response = requests.get(TOKENINFO_URL, params={'id_token': token},
+                                timeout=5)
+    except requests.RequestException as e:
+        logger.warning('Cannot reach the Google tokeninfo endpoint: %s', e)
+        return None
+
+    if response.status_code != 200:
+        return None
+
+    data = response.json()
+    if data.get('aud') != current_app.config['SI_GOOGLE_CLIENT_ID']:
+        return None
+
+    return data
+
+
+def verify_google_token(token):
+    """
+    Verify a Google ID token and return its claims.
+
+    Depending on the SI_GOOGLE_TOKEN_VERIFICATION setting, the token is
+    verified locally ('local') or by Google's tokeninfo endpoint
+    ('tokeninfo'). If the token is not valid, None is returned.
+
+    """
+    if current_app.config['SI_GOOGLE_TOKEN_VERIFICATION'] == 'tokeninfo':
+        return verify_remotely(token)
+
+    return verify_locally(token)
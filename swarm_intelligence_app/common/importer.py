@@ -0,0 +1,658 @@
+"""
+Define the import of an organization from an export.
+
+An import reads the lines of an export one at a time and creates a new
+organization with copies of its rows. The rows of a type are collected in
+batches of SI_IMPORT_BATCH_SIZE rows and inserted with one multi-row insert
+per batch, in the order of the export: invitations, partners, roles,
+circles, domains, policies, accountabilities and role members, so that each
+row only refers to rows that have been inserted already. A row that lacks a
+required column or has an invalid value fails the import.
+
+The rows get new ids. The ids of a batch are read back with a single
+query on the rows of the batch with an id greater than the ids of the
+previous batch, and the ids that later rows refer to are mapped to the new
+ones. Only these maps are kept in memory. Invitations get new codes, since
+the codes are unique. Roles and circles refer to each other, so the parent
+circles of the roles are set once all circles are inserted. The role
+closure and the search index are built at the end.
+
+An export cannot vouch for the users of its partners, so users are never
+created and the user rows of older exports are skipped. A partner is only
+imported as the partner of the importing user if it has the user's email
+address. Every other partner is replaced with a pending invitation for its
+email address, whose email is written to the outbox, and its role
+memberships are dropped; the partner is added again once the invitation is
+accepted. Only an operator who trusts an export can match its partners
+with the existing users of their email addresses instead.
+
+The import is committed at checkpoints of SI_IMPORT_CHECKPOINT rows, so
+that no transaction grows with the size of the organization. The new
+organization is marked as deleted until the import is finished. If an
+import fails, the rows since the last checkpoint are rolled back and the
+committed rows are left to the deletion worker. An export is imported from
+the command line with:
+
+    python -m swarm_intelligence_app.common.importer organization.ndjson.gz
+
+An operator matches the partners with the existing users with the
+--match-users option.
+
+"""
+import argparse
+import gzip
+import io
+import json
+import sys
+import uuid
+
+from swarm_intelligence_app.common import closure
+from swarm_intelligence_app.common import outbox
+from swarm_intelligence_app.common import search
+from swarm_intelligence_app.common.export import FORMAT_VERSION
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.accountability import Accountability as \
+    AccountabilityModel
+from swarm_intelligence_app.models.circle import Circle as CircleModel
+from swarm_intelligence_app.models.domain import Domain as DomainModel
+from swarm_intelligence_app.models.invitation import \
+    Invitation as InvitationModel
+from swarm_intelligence_app.models.invitation import InvitationStatus
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.organization_deletion import \
+    OrganizationDeletion as OrganizationDeletionModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_member import role_member
+from swarm_intelligence_app.models.user import User as UserModel
+
+RECORD_TYPES = ('organization', 'user', 'invitation', 'partner', 'role',
+                'circle', 'domain', 'policy', 'accountability',
+                'role_member')
+
+
+def get_columns(table,
+                data):
+    """
+    Return the values of the columns of a table in a row, except its id.
+
+    """
+    return {column.name: data.get(column.name) for column in table.columns
+            if column.name != 'id'}
+
+
+def is_valid(column,
+             value):
+    """
+    Return whether a value of a row can be inserted into a column.
+
+    """
+    if value is None:
+        return column.nullable
+
+    enum_class = getattr(column.type, 'enum_class', None)
+
+    if enum_class is not None:
+        return isinstance(value, enum_class) or \
+            value in enum_class.__members__
+
+    if isinstance(column.type, db.String):
+        return isinstance(value, str) and (
+            column.type.length is None or len(value) <= column.type.length)
+
+    return True
+
+
+class Importer:
+    """
+    Define the state of an import.
+
+    """
+    def __init__(self,
+                 batch_size,
+                 checkpoint,
+                 name=None,
+                 user=None,
+                 match_users=False):
+        """
+        Initialize an import.
+
+        If a name is given, it replaces the name of the organization. If a
+        user is given, the partner with the user's email address becomes
+        the user's partner, and the user becomes an admin of the
+        organization if there is no such partner. If users are matched, the
+        partners become the partners of the existing users of their email
+        addresses.
+
+        """
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint
+        self.name = name
+        self.user = user
+        self.match_users = match_users
+        self.organization_id = None
+        self.organization_name = None
+        self.record_type = None
+        self.batch = []
+        self.uncommitted = 0
+        self.rows = {}
+        self.ids = {'invitation': {}, 'partner': {}, 'role': {},
+                    'domain': {}}
+        self.last_ids = {}
+        self.parents = []
+        self.user_ids = set()
+        self.invited_emails = set()
+
+    def add(self,
+            record_type,
+            data):
+        """
+        Add a row of the export.
+
+        """
+        if record_type not in RECORD_TYPES:
+            raise ValueError('The type %s is not known.' % record_type)
+
+        if any(isinstance(value, (dict, list)) for value in data.values()):
+            raise ValueError('A %s row has an invalid value.' % record_type)
+
+        if record_type != self.record_type:
+            self.flush()
+
+            if self.record_type is not None and \
+                    RECORD_TYPES.index(record_type) <= \
+                    RECORD_TYPES.index(self.record_type):
+                raise ValueError('The %s rows are not in the order of the '
+                                 'export.' % record_type)
+
+            if self.record_type is None and record_type != 'organization':
+                raise ValueError('The export has no organization.')
+
+            self.record_type = record_type
+
+        self.batch.append(data)
+
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Insert the collected rows and commit if a checkpoint is reached.
+
+        """
+        if not self.batch:
+            return
+
+        rows = self.batch
+        self.batch = []
+        getattr(self, 'insert_' + self.record_type)(rows)
+
+        self.rows[self.record_type] = \
+            self.rows.get(self.record_type, 0) + len(rows)
+        self.uncommitted += len(rows)
+
+        if self.uncommitted >= self.checkpoint:
+            db.session.commit()
+            self.uncommitted = 0
+
+    def finish(self):
+        """
+        Insert the remaining rows, link the roles to their parent circles,
+        add the user, build the closure and the search index and reveal the
+        organization.
+
+        """
+        self.flush()
+
+        if self.organization_id is None:
+            raise ValueError('The export has no organization.')
+
+        statement = RoleModel.__table__.update().where(
+            RoleModel.id == db.bindparam('role_id')).values(
+            parent_circle_id=db.bindparam('circle_id'))
+
+        for start in range(0, len(self.parents), self.batch_size):
+            db.session.execute(statement, [{
+                'role_id': role_id,
+                'circle_id': self.get_id('role', parent_circle_id)
+            } for role_id, parent_circle_id in
+                self.parents[start:start + self.batch_size]])
+
+        if self.user is not None and self.user.id not in self.user_ids:
+            db.session.execute(PartnerModel.__table__.insert(), {
+                'type': PartnerType.admin,
+                'firstname': self.user.firstname,
+                'lastname': self.user.lastname,
+                'email': self.user.email,
+                'is_active': True,
+                'user_id': self.user.id,
+                'organization_id': self.organization_id
+            })
+
+        closure.rebuild(self.organization_id)
+        search.rebuild(self.organization_id)
+
+        db.session.execute(OrganizationModel.__table__.update().where(
+            OrganizationModel.id == self.organization_id).values(
+            is_deleted=False))
+        db.session.commit()
+
+    def abandon(self):
+        """
+        Roll back the rows since the last checkpoint and schedule the
+        deletion of the committed rows.
+
+        """
+        db.session.rollback()
+
+        if self.organization_id is not None and \
+                OrganizationModel.query.get(self.organization_id) is not None:
+            db.session.add(OrganizationDeletionModel(self.organization_id))
+            db.session.commit()
+
+    def get_id(self,
+               record_type,
+               id):
+        """
+        Return the new id of a row that has been imported already.
+
+        """
+        if id is None:
+            return None
+
+        try:
+            return self.ids[record_type][id]
+        except (KeyError, TypeError):
+            raise ValueError('A %s row refers to the unknown %s %s.' % (
+                self.record_type, record_type, id))
+
+    def execute(self,
+                table,
+                values):
+        """
+        Insert rows after checking their values.
+
+        """
+        for value in values:
+            for column in table.columns:
+                if (column.name != 'id' or 'id' in value) and \
+                        not is_valid(column, value.get(column.name)):
+                    raise ValueError('A %s row has an invalid %s.' % (
+                        self.record_type, column.name))
+
+        return db.session.execute(table.insert(), values)
+
+    def insert_rows(self,
+                    table,
+                    rows,
+                    values,
+                    scope):
+        """
+        Insert rows with new ids and map their old ids to the new ones.
+
+        The new rows are the first rows in the scope with an id greater than
+        the ids of the previous batch. A multi-row insert assigns ascending
+        ids in the order of its rows.
+
+        """
+        self.execute(table, values)
+
+        last_id = self.last_ids.get(self.record_type, 0)
+        ids = [row[0] for row in db.session.execute(
+            db.select([table.c.id]).where(scope).where(
+                table.c.id > last_id).order_by(table.c.id).limit(
+                len(values)))]
+
+        if len(ids) != len(values):
+            raise ValueError('Cannot read the ids of the %s rows.' %
+                             self.record_type)
+
+        self.last_ids[self.record_type] = ids[-1]
+        self.ids[self.record_type].update(
+            (row.get('id'), id) for row, id in zip(rows, ids))
+
+        return ids
+
+    def insert_organization(self,
+                            rows):
+        """
+        Insert the organization as deleted.
+
+        """
+        if self.organization_id is not None or len(rows) != 1:
+            raise ValueError('The export has more than one organization.')
+
+        values = get_columns(OrganizationModel.__table__, rows[0])
+        values['is_deleted'] = True
+
+        if self.name:
+            values['name'] = self.name
+
+        self.organization_name = values['name']
+        self.organization_id = self.execute(
+            OrganizationModel.__table__,
+            [values]).inserted_primary_key[0]
+
+    def insert_user(self,
+                    rows):
+        """
+        Skip the users of an older export.
+
+        """
+
+    def insert_invitation(self,
+                          rows):
+        """
+        Insert invitations with new codes.
+
+        """
+        table = InvitationModel.__table__
+
+        self.insert_rows(table, rows, [dict(
+            get_columns(table, row), code=str(uuid.uuid4()),
+            organization_id=self.organization_id) for row in rows],
+            table.c.organization_id == self.organization_id)
+
+        self.invited_emails.update(
+            row['email'].lower() for row in rows
+            if row.get('status') == InvitationStatus.pending.name)
+
+    def get_users(self,
+                  emails):
+        """
+        Return the ids of the users that partners with email addresses
+        become the partners of, by their email addresses.
+
+        """
+        if self.match_users:
+            return dict(db.session.execute(db.select([
+                UserModel.email, UserModel.id]).where(
+                UserModel.email.in_(emails))).fetchall())
+
+        if self.user is not None and self.user.email in emails:
+            return {self.user.email: self.user.id}
+
+        return {}
+
+    def insert_partner(self,
+                       rows):
+        """
+        Insert the partners of users and invite the other partners.
+
+        """
+        table = PartnerModel.__table__
+        users = self.get_users({row.get('email') for row in rows
+                                if isinstance(row.get('email'), str)})
+        partners = []
+        values = []
+        invited = []
+
+        for row in rows:
+            email = row.get('email')
+            user_id = users.get(email) if isinstance(email, str) else None
+
+            if user_id is None:
+                invited.append(row)
+                continue
+
+            if user_id in self.user_ids:
+                raise ValueError('The export has more than one partner with '
+                                 'the email address %s.' % email)
+
+            self.user_ids.add(user_id)
+            partners.append(row)
+            values.append(dict(
+                get_columns(table, row), user_id=user_id,
+                invitation_id=self.get_id('invitation',
+                                          row.get('invitation_id')),
+                organization_id=self.organization_id))
+
+        if partners:
+            self.insert_rows(table, partners, values,
+                             table.c.organization_id == self.organization_id)
+
+        self.invite(invited)
+
+    def invite(self,
+               rows):
+        """
+        Invite partners by their email addresses.
+
+        The emails of the invitations are written to the outbox. An address
+        is invited only once. The invited partners are mapped to no id, so
+        that their role memberships are dropped.
+
+        """
+        invitations = []
+
+        for row in rows:
+            email = row.get('email')
+
+            if not isinstance(email, str) or not outbox.is_valid_email(email):
+                raise ValueError('A partner row has an invalid email.')
+
+            self.ids['partner'][row.get('id')] = None
+
+            if email.lower() not in self.invited_emails:
+                self.invited_emails.add(email.lower())
+                invitations.append({
+                    'code': str(uuid.uuid4()),
+                    'email': email,
+                    'status': InvitationStatus.pending,
+                    'organization_id': self.organization_id
+                })
+
+        if invitations:
+            self.execute(InvitationModel.__table__, invitations)
+            outbox.enqueue_invitations(self.organization_name, [
+                (invitation['email'], invitation['code'])
+                for invitation in invitations])
+
+    def insert_role(self,
+                    rows):
+        """
+        Insert roles without their parent circles.
+
+        """
+        table = RoleModel.__table__
+
+        ids = self.insert_rows(table, rows, [dict(
+            get_columns(table, row), parent_circle_id=None,
+            organization_id=self.organization_id) for row in rows],
+            table.c.organization_id == self.organization_id)
+
+        self.parents.extend(
+            (id, row.get('parent_circle_id')) for row, id in zip(rows, ids)
+            if row.get('parent_circle_id') is not None)
+
+    def insert_circle(self,
+                      rows):
+        """
+        Insert circles with the new ids of their roles.
+
+        """
+        table = CircleModel.__table__
+
+        self.execute(table, [dict(
+            get_columns(table, row), id=self.get_id('role', row.get('id')))
+            for row in rows])
+
+    def insert_domain(self,
+                      rows):
+        """
+        Insert domains.
+
+        """
+        table = DomainModel.__table__
+        values = [dict(get_columns(table, row),
+                       role_id=self.get_id('role', row.get('role_id')))
+                  for row in rows]
+
+        self.insert_rows(table, rows, values, table.c.role_id.in_(
+            {value['role_id'] for value in values}))
+
+    def insert_policy(self,
+                      rows):
+        """
+        Insert policies.
+
+        """
+        table = PolicyModel.__table__
+
+        self.execute(table, [dict(
+            get_columns(table, row),
+            domain_id=self.get_id('domain', row.get('domain_id')))
+            for row in rows])
+
+    def insert_accountability(self,
+                              rows):
+        """
+        Insert accountabilities.
+
+        """
+        table = AccountabilityModel.__table__
+
+        self.execute(table, [dict(
+            get_columns(table, row),
+            role_id=self.get_id('role', row.get('role_id')))
+            for row in rows])
+
+    def insert_role_member(self,
+                           rows):
+        """
+        Insert role members and drop the members that are invited.
+
+        """
+        values = [{
+            'role_id': self.get_id('role', row.get('role_id')),
+            'partner_id': self.get_id('partner', row.get('partner_id'))
+        } for row in rows]
+        values = [value for value in values if value['partner_id'] is not None]
+
+        if values:
+            self.execute(role_member, values)
+
+
+def read_records(lines):
+    """
+    Yield the type and the row of each line of an export after its header.
+
+    """
+    header = True
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+            record_type, data = record['type'], record['data']
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Line %d is not a row of an export.' % number)
+
+        if not isinstance(data, dict):
+            raise ValueError('Line %d is not a row of an export.' % number)
+
+        if header:
+            if record_type != 'export' or \
+                    data.get('version') != FORMAT_VERSION:
+                raise ValueError('The export does not start with a header '
+                                 'of version %d.' % FORMAT_VERSION)
+
+            header = False
+            continue
+
+        yield record_type, data
+
+
+def import_organization(lines,
+                        batch_size,
+                        checkpoint,
+                        name=None,
+                        user=None,
+                        match_users=False):
+    """
+    Import an organization from the lines of an export.
+
+    Returns the id of the new organization and the number of rows of each
+    type. Raises a ValueError if the export is not well-formed.
+
+    """
+    importer = Importer(batch_size, checkpoint, name, user, match_users)
+
+    try:
+        for record_type, data in read_records(lines):
+            importer.add(record_type, data)
+
+        importer.finish()
+    except Exception:
+        importer.abandon()
+        raise
+
+    return importer.organization_id, importer.rows
+
+
+def open_export(path):
+    """
+    Return the lines of an export in a file, which may be compressed with
+    gzip, or on stdin for '-'.
+
+    """
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=stream)
+
+    return io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def main():
+    """
+    Import an export from a file or stdin.
+
+    """
+    # imported here, since importing the app creates an app
+    from swarm_intelligence_app.app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('file',
+                        help='export to import, optionally compressed with '
+                             'gzip, or - for stdin')
+    parser.add_argument('--name',
+                        help='name of the new organization (default: from '
+                             'the export)')
+    parser.add_argument('--batch-size', type=int,
+                        help='rows per insert (default: from the config)')
+    parser.add_argument('--checkpoint', type=int,
+                        help='rows per commit (default: from the config)')
+    parser.add_argument('--match-users', action='store_true',
+                        help='add the partners to the existing users of '
+                             'their email addresses instead of inviting '
+                             'them; only for trusted exports')
+    parser.add_argument('--uri',
+                        help='database URI (default: from the config)')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    if args.uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+
+    with app.app_context(), open_export(args.file) as lines:
+        try:
+            organization_id, rows = import_organization(
+                lines, args.batch_size or app.config['SI_IMPORT_BATCH_SIZE'],
+                args.checkpoint or app.config['SI_IMPORT_CHECKPOINT'],
+                args.name, match_users=args.match_users)
+        except ValueError as error:
+            parser.exit(1, 'Cannot import the export: %s\n' % error)
+
+    print('Imported organization %d with %d rows.' % (
+        organization_id, sum(rows.values())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,434 @@
+"""
+Define the instrumentation of requests and its exposition for Prometheus.
+
+Every request records its latency and status code, and the number and the
+duration of the SQL statements it executes. The statements are counted by
+listeners on the cursor events of SQLAlchemy engines, which add to the
+request that runs on the same thread. The time spent waiting for a
+connection from the pool of an engine is recorded as well.
+
+The metrics are kept in memory per process and app and are exposed in the
+text format of Prometheus at /metrics. Recording a request takes a few
+microseconds, so the instrumentation can run permanently.
+
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import partial
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from swarm_intelligence_app.common.authentication import get_auth_cache_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_local = threading.local()
+
+
+class Counter:
+    """
+    Define a counter with labels.
+
+    """
+    type = 'counter'
+
+    def __init__(self,
+                 name,
+                 documentation,
+                 labelnames=()):
+        """
+        Initialize a counter.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        """
+        Increment the counter of the given label values.
+
+        """
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        """
+        Yield the name, the labels and the value of each sample.
+
+        """
+        with self._lock:
+            values = sorted(self.values.items())
+
+        for labels, value in values:
+            yield self.name, zip(self.labelnames, labels), value
+
+
+class Histogram:
+    """
+    Define a histogram with labels.
+
+    The counts of the buckets are stored per bucket and are accumulated when
+    the histogram is exposed, so that an observation increments one count.
+
+    """
+    type = 'histogram'
+
+    def __init__(self,
+                 name,
+                 documentation,
+                 buckets,
+                 labelnames=()):
+        """
+        Initialize a histogram.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        """
+        Record an observation for the given label values.
+
+        """
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts = self.values.get(labels)
+
+            if counts is None:
+                # one count per bucket and +Inf, followed by the sum
+                counts = [0] * (len(self.buckets) + 2)
+                self.values[labels] = counts
+
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self):
+        """
+        Yield the name, the labels and the value of each sample.
+
+        """
+        with self._lock:
+            values = sorted((labels, list(counts))
+                            for labels, counts in self.values.items())
+
+        for labels, counts in values:
+            pairs = list(zip(self.labelnames, labels))
+            total = 0
+
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                total += count
+                yield (self.name + '_bucket',
+                       pairs + [('le', format_value(bound))], total)
+
+            yield self.name + '_sum', pairs, counts[-1]
+            yield self.name + '_count', pairs, total
+
+
+class Registry:
+    """
+    Define the metrics of an app.
+
+    """
+    def __init__(self):
+        """
+        Initialize the metrics.
+
+        """
+        self.requests = Counter(
+            'si_http_requests_total',
+            'Number of HTTP requests.',
+            ('endpoint', 'method', 'status'))
+        self.latency = Histogram(
+            'si_http_request_duration_seconds',
+            'Latency of HTTP requests in seconds.',
+            LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.statements = Histogram(
+            'si_sql_statements_per_request',
+            'Number of SQL statements executed by a request.',
+            STATEMENT_BUCKETS, ('endpoint', 'method'))
+        self.sql_time = Histogram(
+            'si_sql_duration_seconds_per_request',
+            'Time spent executing SQL statements by a request in seconds.',
+            LATENCY_BUCKETS, ('endpoint', 'method'))
+        self.pool_wait = Histogram(
+            'si_db_pool_checkout_duration_seconds',
+            'Time spent waiting for a connection from the pool in seconds.',
+            LATENCY_BUCKETS)
+
+    @property
+    def metrics(self):
+        """
+        Return the metrics in the order of their exposition.
+
+        """
+        return [self.requests, self.latency, self.statements, self.sql_time,
+                self.pool_wait]
+
+
+class Frame:
+    """
+    Define the measurements of a request in progress.
+
+    """
+    __slots__ = ('start', 'statements', 'sql_time')
+
+    def __init__(self):
+        """
+        Initialize the measurements.
+
+        """
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.sql_time = 0.0
+
+
+def get_registry():
+    """
+    Return the metrics of the current app.
+
+    """
+    registry = current_app.extensions.get('si_metrics')
+
+    if registry is None:
+        registry = Registry()
+        current_app.extensions['si_metrics'] = registry
+
+    return registry
+
+
+def get_frames():
+    """
+    Return the stack of requests in progress on the current thread.
+
+    The sub-requests of a batch run inside the batch request, so requests
+    are nested. The statements of a sub-request are added to its batch.
+
+    """
+    frames = getattr(_local, 'frames', None)
+
+    if frames is None:
+        frames = _local.frames = []
+
+    return frames
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    """
+    Remember when a statement starts.
+
+    """
+    _local.statement_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context,
+                         executemany):
+    """
+    Add a statement to the request in progress on the current thread.
+
+    """
+    frames = getattr(_local, 'frames', None)
+
+    if frames:
+        frame = frames[-1]
+        frame.statements += 1
+        frame.sql_time += time.perf_counter() - _local.statement_start
+
+
+def instrument_pool(pool,
+                    registry):
+    """
+    Record the time that a checkout from a pool takes.
+
+    The pool has no event that fires before a checkout, so its connect
+    method is wrapped instead. The time includes opening a new connection
+    if the pool has no idle connection.
+
+    """
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+
+        try:
+            return connect()
+        finally:
+            registry.pool_wait.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+    pool.si_instrumented = True
+
+
+def engine_connect(conn, branch=False):
+    """
+    Instrument the pool of an engine on its first connection.
+
+    """
+    pool = conn.engine.pool
+
+    if not getattr(pool, 'si_instrumented', False) and current_app:
+        instrument_pool(pool, get_registry())
+
+
+def before_request():
+    """
+    Start measuring a request.
+
+    """
+    frame = Frame()
+    get_frames().append(frame)
+    request.environ['si.metrics'] = frame
+
+
+def after_request(registry,
+                  response):
+    """
+    Record the measurements of a request.
+
+    """
+    elapsed = time.perf_counter()
+    current_request = request._get_current_object()
+    frame = current_request.environ.get('si.metrics')
+
+    if frame is None:
+        return response
+
+    elapsed -= frame.start
+    rule = current_request.url_rule
+    labels = (rule.rule if rule else 'unmatched', current_request.method)
+
+    registry.requests.inc(labels + (str(response.status_code),))
+    registry.latency.observe(elapsed, labels)
+    registry.statements.observe(frame.statements, labels)
+    registry.sql_time.observe(frame.sql_time, labels)
+
+    return response
+
+
+def teardown_request(exception=None):
+    """
+    Stop measuring a request and add its statements to an enclosing one.
+
+    """
+    frame = request.environ.pop('si.metrics', None)
+    frames = get_frames()
+
+    if frame is None or frame not in frames:
+        return
+
+    del frames[frames.index(frame):]
+
+    if frames:
+        frames[-1].statements += frame.statements
+        frames[-1].sql_time += frame.sql_time
+
+
+def format_value(value):
+    """
+    Return a sample value or bucket bound in the text format.
+
+    """
+    if isinstance(value, str):
+        return value
+
+    if isinstance(value, float) and value.is_integer():
+        return '%.1f' % value
+
+    return repr(value)
+
+
+def format_labels(labels):
+    """
+    Return label pairs in the text format.
+
+    """
+    pairs = ['%s="%s"' % (name, str(value).replace('\\', '\\\\').replace(
+        '"', '\\"').replace('\n', '\\n')) for name, value in labels]
+
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def get_auth_cache_lines():
+    """
+    Return the statistics of the authentication caches in the text format.
+
+    """
+    stats = get_auth_cache_stats()
+    lines = []
+
+    for key, documentation, type in (
+            ('hits', 'Number of authentication cache hits.', 'counter'),
+            ('misses', 'Number of authentication cache misses.', 'counter'),
+            ('size', 'Number of authentication cache entries.', 'gauge')):
+        name = 'si_auth_cache_%s' % key
+
+        if type == 'counter':
+            name += '_total'
+
+        lines.append('# HELP %s %s' % (name, documentation))
+        lines.append('# TYPE %s %s' % (name, type))
+
+        for cache in sorted(stats):
+            lines.append('%s%s %s' % (name, format_labels([('cache', cache)]),
+                                      stats[cache][key]))
+
+    return lines
+
+
+def expose():
+    """
+    Return the metrics of the current app in the text format of Prometheus.
+
+    """
+    lines = []
+
+    for metric in get_registry().metrics:
+        lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+        lines.append('# TYPE %s %s' % (metric.name, metric.type))
+
+        for name, labels, value in metric.samples():
+            lines.append('%s%s %s' % (name, format_labels(labels),
+                                      format_value(value)))
+
+    lines.extend(get_auth_cache_lines())
+
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """
+    Register the instrumentation of requests with an app.
+
+    The registry of the app is bound to the hook that records a request, so
+    that the hook does not look it up. The cursor and connection events are
+    registered once for all engines.
+
+    """
+    if not app.config['SI_METRICS']:
+        return
+
+    app.extensions['si_metrics'] = registry = Registry()
+
+    # measure the hooks of the app as well
+    app.before_request_funcs.setdefault(None, []).insert(0, before_request)
+    app.after_request(partial(after_request, registry))
+    app.teardown_request(teardown_request)
+
+    for name, listener in (('before_cursor_execute', before_cursor_execute),
+                           ('after_cursor_execute', after_cursor_execute),
+                           ('engine_connect', engine_connect)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
@@ -0,0 +1,43 @@
+"""
+Define any functions to maintain the members of roles.
+
+The role_member table has a primary key on the role and the partner, so
+that a partner is a member of a role at most once. A partner is assigned
+with a single INSERT that skips an existing row, which lets concurrent
+requests assign the same partner without reading the table first and
+without failing on a duplicate key. The functions add their statements to
+the session; the caller must commit it.
+
+"""
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.role_member import role_member
+
+
+def insert_ignore(table):
+    """
+    Return an INSERT into a table that skips rows with an existing key.
+
+    """
+    return table.insert().prefix_with('IGNORE', dialect='mysql').prefix_with(
+        'OR IGNORE', dialect='sqlite')
+
+
+def add_member(role_id,
+               partner_id):
+    """
+    Assign a partner to a role unless it is assigned already.
+
+    """
+    db.session.execute(insert_ignore(role_member).values(
+        role_id=role_id, partner_id=partner_id))
+
+
+def remove_member(role_id,
+                  partner_id):
+    """
+    Unassign a partner from a role.
+
+    """
+    db.session.execute(role_member.delete().where(
+        role_member.c.role_id == role_id).where(
+        role_member.c.partner_id == partner_id))
@@ -0,0 +1,224 @@
+"""
+Define the versioned migrations of the database schema.
+
+db.create_all() only creates the tables that are missing, so changes to
+existing tables are made by migrations. A migration is a module of the
+package swarm_intelligence_app.migrations whose name starts with its
+version, such as v002_lookup_indexes, and that defines the functions
+upgrade(connection) and downgrade(connection). The applied versions are
+recorded in the table schema_version. MySQL commits every DDL statement
+implicitly, so a migration cannot be rolled back and checks the schema
+before it changes it, which also makes it safe to run on a database that
+db.create_all() has just created:
+
+    python -m swarm_intelligence_app.common.migration upgrade
+    python -m swarm_intelligence_app.common.migration downgrade 1
+
+"""
+import argparse
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime
+
+from swarm_intelligence_app import migrations
+from swarm_intelligence_app.models import db
+
+logger = logging.getLogger(__name__)
+
+schema_version = db.Table(
+    'schema_version', db.MetaData(),
+    db.Column('version', db.Integer, primary_key=True, autoincrement=False),
+    db.Column('applied_at', db.DateTime, nullable=False)
+)
+
+
+def get_migrations():
+    """
+    Return the version and the module of each migration, ordered by
+    version.
+
+    """
+    modules = []
+
+    for info in pkgutil.iter_modules(migrations.__path__):
+        match = re.match(r'v(\d+)_', info.name)
+
+        if match:
+            modules.append((int(match.group(1)), importlib.import_module(
+                migrations.__name__ + '.' + info.name)))
+
+    return sorted(modules, key=lambda module: module[0])
+
+
+def get_versions(engine):
+    """
+    Return the set of the applied versions.
+
+    """
+    with engine.begin() as connection:
+        schema_version.create(connection, checkfirst=True)
+
+        return {row[0] for row in connection.execute(
+            db.select([schema_version.c.version]))}
+
+
+def upgrade(engine,
+            version=None):
+    """
+    Apply the migrations up to a version, or all of them, and return the
+    applied versions.
+
+    """
+    versions = get_versions(engine)
+    applied = []
+
+    for number, module in get_migrations():
+        if number in versions or version is not None and number > version:
+            continue
+
+        logger.info('Applying migration %s.', module.__name__)
+
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(schema_version.insert().values(
+                version=number, applied_at=datetime.utcnow()))
+
+        applied.append(number)
+
+    return applied
+
+
+def downgrade(engine,
+              version):
+    """
+    Revert the migrations after a version and return the reverted versions.
+
+    """
+    versions = get_versions(engine)
+    reverted = []
+
+    for number, module in reversed(get_migrations()):
+        if number not in versions or number <= version:
+            continue
+
+        logger.info('Reverting migration %s.', module.__name__)
+
+        with engine.begin() as connection:
+            module.downgrade(connection)
+            connection.execute(schema_version.delete().where(
+                schema_version.c.version == number))
+
+        reverted.append(number)
+
+    return reverted
+
+
+def has_column(connection,
+               table,
+               column):
+    """
+    Return whether a table has a column.
+
+    """
+    return column in [item['name'] for item in
+                      db.inspect(connection).get_columns(table)]
+
+
+def has_index(connection,
+              table,
+              name):
+    """
+    Return whether a table has an index.
+
+    """
+    return name in [item['name'] for item in
+                    db.inspect(connection).get_indexes(table)]
+
+
+def get_table(connection,
+              table):
+    """
+    Return a table as it is in the database.
+
+    """
+    return db.Table(table, db.MetaData(), autoload=True,
+                    autoload_with=connection)
+
+
+def create_index(connection,
+                 table,
+                 name,
+                 columns):
+    """
+    Create an index unless it exists.
+
+    """
+    if has_index(connection, table, name):
+        return
+
+    table = get_table(connection, table)
+    db.Index(name, *[table.c[column] for column in columns]).create(
+        connection)
+
+
+def drop_index(connection,
+               table,
+               name):
+    """
+    Drop an index if it exists.
+
+    """
+    if not has_index(connection, table, name):
+        return
+
+    table = get_table(connection, table)
+    [index] = [index for index in table.indexes if index.name == name]
+    index.drop(connection)
+
+
+def main():
+    """
+    Run the command given on the command line.
+
+    """
+    # imported here, since importing the app creates an app
+    from swarm_intelligence_app.app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--uri',
+                        help='database URI (default: from the config)')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    upgrade_parser = subparsers.add_parser('upgrade',
+                                           help='apply the migrations')
+    upgrade_parser.add_argument('version', type=int, nargs='?',
+                                help='last version to apply (default: all)')
+    downgrade_parser = subparsers.add_parser('downgrade',
+                                             help='revert the migrations')
+    downgrade_parser.add_argument('version', type=int,
+                                  help='last version to keep')
+    subparsers.add_parser('current', help='print the applied versions')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    app = create_app()
+
+    if args.uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+
+    with app.app_context():
+        if args.command == 'upgrade':
+            upgrade(db.engine, args.version)
+        elif args.command == 'downgrade':
+            downgrade(db.engine, args.version)
+        else:
+            versions = sorted(get_versions(db.engine))
+            print(', '.join(map(str, versions)) or 'none')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,422 @@
+"""
+Define the outbox of emails and the workers that deliver it.
+
+Requests never talk to the mail server. They write their emails to the
+outbox table in the same transaction as the change that causes them, so
+that an email is sent if and only if the change is committed. Workers drain
+the outbox in batches: a worker claims a batch by leasing its messages,
+sends them over an SMTP connection that it keeps open between batches and
+marks them as sent. A message that cannot be sent is retried with an
+exponential backoff until it has failed too often. A message whose worker
+died is claimed again once its lease has expired.
+
+The workers run in their own process:
+
+    python -m swarm_intelligence_app.common.outbox --workers 4
+
+"""
+import argparse
+import logging
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from flask import current_app
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.outbox_message import OutboxMessage as \
+    OutboxMessageModel
+from swarm_intelligence_app.models.outbox_message import OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+INVITATION_SUBJECT = 'You are invited to join %s'
+INVITATION_BODY = """Hello,
+
+you are invited to join the organization %s.
+
+Accept the invitation by following this link:
+
+%s
+"""
+
+
+def is_valid_email(address):
+    """
+    Return whether an email address can be the recipient of an email.
+
+    Whitespace and control characters are rejected, because they cannot be
+    written to the headers of an email.
+
+    """
+    local, at, domain = address.rpartition('@')
+
+    return bool(local and at and domain) and \
+        not any(char.isspace() or not char.isprintable() for char in address)
+
+
+def enqueue(recipient,
+            subject,
+            body):
+    """
+    Add an email to the outbox.
+
+    The caller must commit the session.
+
+    """
+    db.session.add(OutboxMessageModel(recipient, subject, body))
+
+
+def get_invitation_message(organization_name,
+                           code):
+    """
+    Return the subject and the body of the email of an invitation.
+
+    """
+    url = current_app.config['SI_INVITATION_URL'].format(code=code)
+
+    return (INVITATION_SUBJECT % organization_name,
+            INVITATION_BODY % (organization_name, url))
+
+
+def enqueue_invitations(organization_name,
+                        invitations):
+    """
+    Add the emails of invitations to the outbox with one multi-row insert.
+
+    Each invitation is a pair of an email address and a code. The caller
+    must commit the session.
+
+    """
+    now = datetime.utcnow()
+    rows = []
+
+    for email, code in invitations:
+        subject, body = get_invitation_message(organization_name, code)
+        rows.append({
+            'recipient': email,
+            'subject': subject,
+            'body': body,
+            'status': OutboxStatus.pending,
+            'attempts': 0,
+            'next_attempt_at': now
+        })
+
+    if rows:
+        db.session.execute(OutboxMessageModel.__table__.insert(), rows)
+
+
+class SMTPConnection:
+    """
+    Define a connection to the mail server that is kept open between
+    batches.
+
+    """
+    def __init__(self,
+                 config):
+        """
+        Initialize a connection with the SMTP settings of an app.
+
+        """
+        self.host = config['SI_SMTP_HOST']
+        self.port = config['SI_SMTP_PORT']
+        self.user = config['SI_SMTP_USER']
+        self.password = config['SI_SMTP_PASSWORD']
+        self.starttls = config['SI_SMTP_STARTTLS']
+        self.timeout = config['SI_SMTP_TIMEOUT']
+        self.sender = config['SI_MAIL_SENDER']
+        self.smtp = None
+
+    def open(self):
+        """
+        Open the connection unless it is open already.
+
+        """
+        if self.smtp is not None:
+            return
+
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+        try:
+            if self.starttls:
+                smtp.starttls()
+
+            if self.user:
+                smtp.login(self.user, self.password)
+        except (OSError, smtplib.SMTPException):
+            smtp.close()
+            raise
+
+        self.smtp = smtp
+
+    def close(self):
+        """
+        Close the connection.
+
+        """
+        if self.smtp is None:
+            return
+
+        try:
+            self.smtp.quit()
+        except (OSError, smtplib.SMTPException):
+            self.smtp.close()
+        finally:
+            self.smtp = None
+
+    def send(self, message):
+        """
+        Send a message of the outbox.
+
+        If the server has closed the idle connection, the connection is
+        opened again once.
+
+        """
+        email = EmailMessage()
+        email['From'] = self.sender
+        email['To'] = message.recipient
+        email['Subject'] = message.subject
+        email.set_content(message.body)
+
+        self.open()
+
+        try:
+            self.smtp.send_message(email)
+        except smtplib.SMTPServerDisconnected:
+            self.smtp = None
+            self.open()
+            self.smtp.send_message(email)
+
+
+def is_rejected(error,
+                permanently=False):
+    """
+    Return whether the server has rejected a message.
+
+    A rejection leaves the connection usable. Replies with a 5xx code are
+    permanent, so that the message is not retried. A message whose headers
+    cannot be written is rejected permanently before it reaches the server.
+
+    """
+    if isinstance(error, ValueError):
+        return True
+    elif isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, text in error.recipients.values()]
+    elif isinstance(error, smtplib.SMTPResponseException):
+        codes = [error.smtp_code]
+    else:
+        return False
+
+    return not permanently or all(code >= 500 for code in codes)
+
+
+def claim(worker_id,
+          batch_size,
+          lease):
+    """
+    Lease a batch of due messages to a worker and return them.
+
+    The ids of the due messages are read first and leased with a single
+    update that only matches messages without a current lease, so that a
+    message that another worker has claimed in the meantime is skipped.
+
+    """
+    now = datetime.utcnow()
+    table = OutboxMessageModel.__table__
+    available = db.or_(table.c.leased_until.is_(None),
+                       table.c.leased_until < now)
+
+    ids = [row[0] for row in db.session.execute(
+        db.select([table.c.id]).where(
+            table.c.status == OutboxStatus.pending).where(
+            table.c.next_attempt_at <= now).where(available).order_by(
+            table.c.id).limit(batch_size))]
+
+    if not ids:
+        return []
+
+    db.session.execute(table.update().where(table.c.id.in_(ids)).where(
+        table.c.status == OutboxStatus.pending).where(available).values(
+        leased_by=worker_id, leased_until=now + timedelta(seconds=lease)))
+    db.session.commit()
+
+    return OutboxMessageModel.query.filter(
+        OutboxMessageModel.id.in_(ids)).filter(
+        OutboxMessageModel.leased_by == worker_id).order_by(
+        OutboxMessageModel.id).all()
+
+
+def process_batch(connection,
+                  worker_id):
+    """
+    Send a batch of due messages and return the number of messages.
+
+    The sent messages are marked with one update. A failed message is
+    scheduled for another attempt after a backoff that doubles with every
+    attempt, or is marked as failed after the last attempt.
+
+    """
+    config = current_app.config
+    messages = claim(worker_id, config['SI_OUTBOX_BATCH_SIZE'],
+                     config['SI_OUTBOX_LEASE'])
+    sent = []
+
+    for message in messages:
+        try:
+            connection.send(message)
+        except (OSError, smtplib.SMTPException, ValueError) as e:
+            logger.warning('Cannot send message %d: %s', message.id, e)
+
+            if not is_rejected(e):
+                connection.close()
+
+            message.attempts += 1
+            message.last_error = str(e)[:255]
+            message.leased_by = None
+            message.leased_until = None
+
+            if is_rejected(e, permanently=True) or \
+                    message.attempts >= config['SI_OUTBOX_MAX_ATTEMPTS']:
+                message.status = OutboxStatus.failed
+            else:
+                backoff = config['SI_OUTBOX_BACKOFF'] * \
+                    2 ** (message.attempts - 1)
+                message.next_attempt_at = datetime.utcnow() + \
+                    timedelta(seconds=backoff)
+        else:
+            sent.append(message.id)
+
+    if sent:
+        table = OutboxMessageModel.__table__
+        db.session.execute(table.update().where(table.c.id.in_(sent)).values(
+            status=OutboxStatus.sent, sent_at=datetime.utcnow(),
+            attempts=table.c.attempts + 1, leased_by=None,
+            leased_until=None))
+
+    db.session.commit()
+
+    return len(messages)
+
+
+def drain(connection=None):
+    """
+    Send all due messages of the outbox and return their number.
+
+    """
+    own_connection = connection is None
+
+    if own_connection:
+        connection = SMTPConnection(current_app.config)
+
+    worker_id = str(uuid.uuid4())
+    total = 0
+
+    try:
+        while True:
+            count = process_batch(connection, worker_id)
+            total += count
+
+            if count == 0:
+                return total
+    finally:
+        if own_connection:
+            connection.close()
+
+
+class OutboxWorkers:
+    """
+    Define a pool of threads that drain the outbox.
+
+    Each thread keeps its own SMTP connection. A thread that finds no due
+    messages waits for the poll interval before it looks again.
+
+    """
+    def __init__(self,
+                 app,
+                 workers=None):
+        """
+        Initialize a pool for an app.
+
+        """
+        self.app = app
+        self.workers = workers or app.config['SI_OUTBOX_WORKERS']
+        self.stopped = threading.Event()
+        self.threads = []
+
+    def start(self):
+        """
+        Start the threads of the pool.
+
+        """
+        self.stopped.clear()
+        self.threads = [threading.Thread(target=self.run,
+                                         name='outbox-%d' % i, daemon=True)
+                        for i in range(self.workers)]
+
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stop the threads of the pool after their current batch.
+
+        """
+        self.stopped.set()
+
+        for thread in self.threads:
+            thread.join()
+
+    def run(self):
+        """
+        Drain the outbox until the pool is stopped.
+
+        """
+        with self.app.app_context():
+            connection = SMTPConnection(self.app.config)
+            worker_id = str(uuid.uuid4())
+            interval = self.app.config['SI_OUTBOX_POLL_INTERVAL']
+
+            try:
+                while not self.stopped.is_set():
+                    try:
+                        count = process_batch(connection, worker_id)
+                    except Exception:
+                        logger.exception('Cannot process the outbox.')
+                        db.session.rollback()
+                        count = 0
+
+                    if count == 0:
+                        self.stopped.wait(interval)
+            finally:
+                connection.close()
+                db.session.remove()
+
+
+def main():
+    """
+    Run a pool of workers until it is interrupted.
+
+    """
+    # imported here, since importing the app creates an app
+    from swarm_intelligence_app.app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int,
+                        help='number of threads (default: SI_OUTBOX_WORKERS)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    app = create_app()
+    workers = OutboxWorkers(app, args.workers)
+    workers.start()
+
+    try:
+        workers.stopped.wait()
+    except KeyboardInterrupt:
+        workers.stop()
+
+
+if __name__ == '__main__':
+    main()
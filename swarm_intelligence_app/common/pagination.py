@@ -0,0 +1,57 @@
+"""
+Define any functions to paginate the collection edges of the API.
+
+"""
+from urllib.parse import urlencode
+
+from flask import abort, current_app, request
+from flask_restful import reqparse
+
+
+def paginate(query, column):
+    """
+    Return a page of the items of a query and the headers of the response.
+
+    The items are ordered by the given column, usually the primary key. The
+    page starts after the cursor given by the 'after' parameter and holds at
+    most 'limit' items. Instead of an offset, the cursor is compared to the
+    column, so that each page is read from the index in constant time. If
+    there is a next page, the headers point to it with a 'Link' header and
+    hold its cursor in an 'X-Next-Cursor' header.
+
+    """
+    parser = reqparse.RequestParser()
+    parser.add_argument('limit', type=int, location='args')
+    parser.add_argument('after', type=int, location='args')
+    args = parser.parse_args()
+
+    limit = args['limit']
+
+    if limit is None:
+        limit = current_app.config['SI_PAGE_SIZE']
+
+    if limit < 1:
+        abort(400, 'The limit must be a positive number.')
+
+    limit = min(limit, current_app.config['SI_PAGE_SIZE_MAX'])
+
+    if args['after'] is not None:
+        query = query.filter(column > args['after'])
+
+    items = query.order_by(column).limit(limit + 1).all()
+
+    headers = {}
+
+    if len(items) > limit:
+        items = items[:limit]
+        cursor = getattr(items[-1], column.key)
+
+        parameters = request.args.to_dict()
+        parameters['limit'] = limit
+        parameters['after'] = cursor
+
+        headers['X-Next-Cursor'] = str(cursor)
+        headers['Link'] = '<%s?%s>; rel="next"' % (
+            request.base_url, urlencode(sorted(parameters.items())))
+
+    return items, headers
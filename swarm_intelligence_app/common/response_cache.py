@@ -0,0 +1,414 @@
+"""
+Define a response cache that is scoped and invalidated per organization.
+
+Every organization has a generation counter. Cached responses are keyed on
+the endpoint, its arguments and the current generation of the organization
+that the requested node belongs to. Each successful write request bumps the
+generation of the affected organization, which invalidates all cached
+responses of the organization at once.
+
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, request
+from swarm_intelligence_app.common.cache import LRUCache
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.accountability import Accountability as \
+    AccountabilityModel
+from swarm_intelligence_app.models.domain import Domain as DomainModel
+from swarm_intelligence_app.models.invitation import \
+    Invitation as InvitationModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from werkzeug.http import unquote_etag
+
+WRITE_METHODS = ('POST', 'PUT', 'DELETE')
+
+
+class LocalBackend:
+    """
+    Define an in-process backend for a single node.
+
+    """
+    def __init__(self,
+                 maxsize=4096,
+                 ttl=300):
+        """
+        Initialize a backend.
+
+        """
+        self.cache = LRUCache(maxsize, ttl)
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the value stored for a key or None.
+
+        """
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value for a key.
+
+        """
+        self.cache.set(key, value, ttl)
+
+    def get_counter(self, key):
+        """
+        Return the value of a counter.
+
+        """
+        with self._lock:
+            return self.counters.setdefault(key, 0)
+
+    def incr(self, key):
+        """
+        Increment a counter.
+
+        """
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+
+class SharedBackend:
+    """
+    Define a backend that is shared between processes and nodes.
+
+    The backend stores JSON-encoded values in a Redis-compatible client,
+    which must provide get(key), set(key, value, ex=None, nx=False) and
+    incr(key). A missing counter is initialized with the current time, so
+    that an evicted counter never returns to a generation that has been
+    used before.
+
+    """
+    def __init__(self,
+                 client,
+                 ttl=300):
+        """
+        Initialize a backend.
+
+        """
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key):
+        """
+        Return the value stored for a key or None.
+
+        """
+        value = self.client.get(key)
+
+        if value is None:
+            return None
+
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value for a key.
+
+        """
+        self.client.set(key, json.dumps(value), ex=ttl or self.ttl)
+
+    def get_counter(self, key):
+        """
+        Return the value of a counter.
+
+        """
+        value = self.client.get(key)
+
+        if value is None:
+            self.client.set(key, int(time.time() * 1000), nx=True)
+            value = self.client.get(key)
+
+        return int(value)
+
+    def incr(self, key):
+        """
+        Increment a counter.
+
+        """
+        if self.client.get(key) is None:
+            self.get_counter(key)
+
+        self.client.incr(key)
+
+
+def create_backend(app):
+    """
+    Return the backend that is configured for an app.
+
+    The setting SI_RESPONSE_CACHE selects the backend: 'local' for the
+    in-process backend, 'shared' for a Redis server at SI_RESPONSE_CACHE_URL
+    and 'none' to disable the cache. A shared backend can also be given by
+    storing a SharedBackend as app.extensions['si_response_cache'].
+
+    """
+    name = app.config['SI_RESPONSE_CACHE']
+    ttl = app.config['SI_RESPONSE_CACHE_TTL']
+
+    if name == 'local':
+        return LocalBackend(app.config['SI_RESPONSE_CACHE_SIZE'], ttl)
+
+    if name == 'shared':
+        import redis
+        return SharedBackend(
+            redis.StrictRedis.from_url(app.config['SI_RESPONSE_CACHE_URL']),
+            ttl)
+
+    return None
+
+
+def get_backend():
+    """
+    Return the backend of the current app or None if caching is disabled.
+
+    """
+    if current_app.config['SI_RESPONSE_CACHE'] == 'none':
+        return None
+
+    if 'si_response_cache' not in current_app.extensions:
+        current_app.extensions['si_response_cache'] = \
+            create_backend(current_app)
+
+    return current_app.extensions['si_response_cache']
+
+
+def query_organization_id(name, value):
+    """
+    Return the id of the organization that a node belongs to.
+
+    """
+    if name == 'organization_id':
+        return int(value)
+
+    if name in ('role_id', 'circle_id'):
+        query = db.session.query(RoleModel.organization_id).filter(
+            RoleModel.id == value)
+    elif name == 'partner_id':
+        query = db.session.query(PartnerModel.organization_id).filter(
+            PartnerModel.id == value)
+    elif name == 'domain_id':
+        query = db.session.query(RoleModel.organization_id).join(
+            DomainModel, DomainModel.role_id == RoleModel.id).filter(
+            DomainModel.id == value)
+    elif name == 'policy_id':
+        query = db.session.query(RoleModel.organization_id).join(
+            DomainModel, DomainModel.role_id == RoleModel.id).join(
+            PolicyModel, PolicyModel.domain_id == DomainModel.id).filter(
+            PolicyModel.id == value)
+    elif name == 'accountability_id':
+        query = db.session.query(RoleModel.organization_id).join(
+            AccountabilityModel,
+            AccountabilityModel.role_id == RoleModel.id).filter(
+            AccountabilityModel.id == value)
+    elif name == 'invitation_id':
+        query = db.session.query(InvitationModel.organization_id).filter(
+            InvitationModel.id == value)
+    elif name == 'code':
+        query = db.session.query(InvitationModel.organization_id).filter(
+            InvitationModel.code == value)
+    else:
+        return None
+
+    row = query.first()
+
+    return None if row is None else row[0]
+
+
+def get_organization_id(backend, view_args):
+    """
+    Return the id of the organization that the requested node belongs to.
+
+    A node never moves to another organization, so the mapping is cached in
+    the backend, if there is one.
+
+    """
+    for name in ('organization_id', 'circle_id', 'role_id', 'partner_id',
+                 'domain_id', 'policy_id', 'accountability_id',
+                 'invitation_id', 'code'):
+        if name not in (view_args or {}):
+            continue
+
+        key = 'organization:%s:%s' % (name, view_args[name])
+        organization_id = None if backend is None else backend.get(key)
+
+        if organization_id is None:
+            try:
+                organization_id = query_organization_id(name,
+                                                        view_args[name])
+            except (TypeError, ValueError):
+                return None
+
+            if organization_id is not None and backend is not None:
+                backend.set(key, organization_id, 86400)
+
+        return organization_id
+
+    return None
+
+
+def get_generation(backend, organization_id):
+    """
+    Return the generation of an organization.
+
+    """
+    return backend.get_counter('generation:%s' % organization_id)
+
+
+def bump_generation(organization_id):
+    """
+    Invalidate all cached responses of an organization.
+
+    """
+    backend = get_backend()
+
+    if backend is None or organization_id is None:
+        return
+
+    pending = g.get('pending_generations')
+
+    if pending is not None:
+        pending.add(organization_id)
+    else:
+        backend.incr('generation:%s' % organization_id)
+
+
+@contextmanager
+def deferred_generations():
+    """
+    Defer the bumping of generations and bypass the cache until the block
+    is left.
+
+    This is used while the changes of several requests are held in a single
+    transaction, so that no response of the old state is cached under a new
+    generation before the transaction is committed. Within the block, the
+    generations do not reflect the uncommitted changes yet, so responses are
+    neither read from the cache nor stored in it.
+
+    """
+    g.pending_generations = set()
+    g.cache_bypass = True
+
+    try:
+        yield
+    finally:
+        g.pop('cache_bypass')
+
+        for organization_id in g.pop('pending_generations'):
+            bump_generation(organization_id)
+
+
+def cached(f):
+    """
+    Cache the successful responses of a GET handler per organization.
+
+    The decorator must be applied below the authentication decorator, so
+    that cached responses are only returned to authenticated users. If the
+    cached response has an entity tag that matches the client's
+    If-None-Match header, 304 is returned. The cache is bypassed while
+    g.cache_bypass is set.
+
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        backend = get_backend()
+
+        if backend is None or g.get('cache_bypass'):
+            return f(*args, **kwargs)
+
+        organization_id = get_organization_id(backend, kwargs)
+
+        if organization_id is None:
+            return f(*args, **kwargs)
+
+        key = 'response:%s:%s:%s:%s:%s' % (
+            organization_id, get_generation(backend, organization_id),
+            request.endpoint, sorted(kwargs.items()),
+            sorted(request.args.items(multi=True)))
+
+        response = backend.get(key)
+
+        if response is None:
+            result = f(*args, **kwargs)
+
+            if isinstance(result, tuple) and result[1] == 200:
+                data, status = result[0], result[1]
+                headers = result[2] if len(result) > 2 else {}
+                backend.set(key, [data, status, headers])
+
+            return result
+
+        data, status, headers = response
+        etag = headers.get('ETag')
+
+        if etag and request.if_none_match.contains(unquote_etag(etag)[0]):
+            return None, 304, {'ETag': etag}
+
+        return data, status, headers
+
+    return decorated
+
+
+def before_request():
+    """
+    Remember the organization that a write request changes.
+
+    The organization must be resolved before the request is handled, since
+    the requested node may be deleted by the request.
+
+    """
+    backend = get_backend()
+
+    if backend is not None and request.method in WRITE_METHODS:
+        g.cache_organization_id = get_organization_id(backend,
+                                                      request.view_args)
+
+
+def after_request(response):
+    """
+    Bump the generation of the organization that a write request changed.
+
+    Requests to /me change partners of all organizations of the user, so
+    the generations of all these organizations are bumped.
+
+    """
+    if request.method not in WRITE_METHODS or response.status_code >= 400:
+        return response
+
+    # the sub-requests of a batch bump the generations themselves
+    if request.endpoint == 'batch':
+        return response
+
+    if get_backend() is None:
+        return response
+
+    organization_id = g.get('cache_organization_id')
+
+    if organization_id is not None:
+        bump_generation(organization_id)
+    elif not request.view_args and g.get('user') is not None:
+        for row in db.session.query(PartnerModel.organization_id).filter(
+                PartnerModel.user_id == g.user.id):
+            bump_generation(row[0])
+
+    return response
+
+
+def init_app(app):
+    """
+    Register the invalidation of cached responses with an app.
+
+    """
+    app.before_request(before_request)
+    app.after_request(after_request)
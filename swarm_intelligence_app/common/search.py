@@ -0,0 +1,326 @@
+"""
+Define the search of roles, accountabilities, domains and policies.
+
+The search is served by an inverted index: the postings table holds a row
+for every word of an entity, together with the organization of the entity.
+A search reads the postings of each word of the query from the primary key
+and joins them, so that only entities that contain all words are returned.
+The last word of a query also matches longer words, which allows to search
+as the user types. A query is limited to WORDS_MAX distinct words, since
+every word adds a join.
+
+The write handlers keep the index current by calling insert, index or
+remove with their changes. The functions add their statements to the
+session; the caller must commit it. The index of all organizations is
+rebuilt with:
+
+    python -m swarm_intelligence_app.common.search
+
+"""
+import argparse
+import re
+
+from swarm_intelligence_app.common import membership
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.accountability import Accountability as \
+    AccountabilityModel
+from swarm_intelligence_app.models.domain import Domain as DomainModel
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.search_posting import search_posting
+
+CHUNK_SIZE = 10000
+TOKEN_LENGTH = 45
+WORDS_MAX = 8
+
+ENTITY_TYPES = ('role', 'accountability', 'domain', 'policy')
+
+
+def get_sources():
+    """
+    Return a query on the id, the organization id and the texts of the
+    entities of each type.
+
+    """
+    return {
+        'role': db.select([RoleModel.id, RoleModel.organization_id,
+                           RoleModel.name, RoleModel.purpose]),
+        'accountability': db.select([
+            AccountabilityModel.id, RoleModel.organization_id,
+            AccountabilityModel.title]).where(
+            RoleModel.id == AccountabilityModel.role_id),
+        'domain': db.select([
+            DomainModel.id, RoleModel.organization_id,
+            DomainModel.title]).where(RoleModel.id == DomainModel.role_id),
+        'policy': db.select([
+            PolicyModel.id, RoleModel.organization_id, PolicyModel.title,
+            PolicyModel.description]).where(
+            DomainModel.id == PolicyModel.domain_id).where(
+            RoleModel.id == DomainModel.role_id)
+    }
+
+
+def tokenize(*texts):
+    """
+    Return the distinct, lower-case words of texts.
+
+    """
+    return sorted({token[:TOKEN_LENGTH] for text in texts if text
+                   for token in re.findall(r'\w+', text.lower())})
+
+
+def get_postings(entity_type,
+                 entity_id,
+                 organization_id,
+                 *texts):
+    """
+    Return the postings of an entity.
+
+    """
+    return [{
+        'organization_id': organization_id,
+        'token': token,
+        'entity_type': entity_type,
+        'entity_id': entity_id
+    } for token in tokenize(*texts)]
+
+
+def insert(entity_type,
+           entity_id,
+           organization_id,
+           *texts):
+    """
+    Add the postings of a new entity.
+
+    """
+    postings = get_postings(entity_type, entity_id, organization_id, *texts)
+
+    if postings:
+        db.session.execute(insert_postings(), postings)
+
+
+def insert_postings():
+    """
+    Return an insert of postings that skips existing postings.
+
+    The database compares the words case- and accent-insensitively, so that
+    two words that differ in Python can be the same posting.
+
+    """
+    return membership.insert_ignore(search_posting)
+
+
+def index(entity_type,
+          entity_id,
+          organization_id,
+          *texts):
+    """
+    Replace the postings of an entity with the words of its texts.
+
+    """
+    remove(entity_type, [entity_id])
+    insert(entity_type, entity_id, organization_id, *texts)
+
+
+def index_query(entity_type,
+                query,
+                bind=None):
+    """
+    Add the postings of the entities that a query of the sources returns.
+
+    The statements are executed on the session unless a connection is
+    given.
+
+    """
+    bind = bind or db.session
+    postings = []
+
+    for row in bind.execute(query).fetchall():
+        postings.extend(get_postings(entity_type, *row))
+
+        if len(postings) >= CHUNK_SIZE:
+            bind.execute(insert_postings(), postings)
+            postings = []
+
+    if postings:
+        bind.execute(insert_postings(), postings)
+
+
+def index_roles(condition):
+    """
+    Add the postings of the roles that match a condition.
+
+    """
+    index_query('role', get_sources()['role'].where(condition))
+
+
+def remove(entity_type,
+           entity_ids):
+    """
+    Remove the postings of entities.
+
+    The ids can be a list or a query.
+
+    """
+    db.session.execute(search_posting.delete().where(
+        search_posting.c.entity_type == entity_type).where(
+        search_posting.c.entity_id.in_(entity_ids)))
+
+
+def remove_domains(domain_ids):
+    """
+    Remove the postings of domains and their policies.
+
+    """
+    remove('policy', db.select([PolicyModel.id]).where(
+        PolicyModel.domain_id.in_(domain_ids)))
+    remove('domain', domain_ids)
+
+
+def remove_roles(role_ids):
+    """
+    Remove the postings of roles and their accountabilities, domains and
+    policies.
+
+    The ids can be a list or a query.
+
+    """
+    remove_domains(db.select([DomainModel.id]).where(
+        DomainModel.role_id.in_(role_ids)))
+    remove('accountability', db.select([AccountabilityModel.id]).where(
+        AccountabilityModel.role_id.in_(role_ids)))
+    remove('role', role_ids)
+
+
+def rebuild(organization_id):
+    """
+    Rebuild the index of an organization from its entities.
+
+    """
+    db.session.execute(search_posting.delete().where(
+        search_posting.c.organization_id == organization_id))
+
+    for entity_type, query in get_sources().items():
+        index_query(entity_type, query.where(
+            RoleModel.organization_id == organization_id))
+
+
+def search(organization_id,
+           text,
+           limit):
+    """
+    Return the type and the id of the entities of an organization that
+    contain all words of a text.
+
+    The entities are ordered by their type and id. Raise a ValueError if the
+    text contains more than WORDS_MAX distinct words.
+
+    """
+    words = [token[:TOKEN_LENGTH]
+             for token in re.findall(r'\w+', text.lower())]
+    prefix = words.pop()
+    words = sorted(set(words))
+
+    # a word that is searched for as a whole also matches as a prefix
+    if prefix not in words:
+        words.append(prefix)
+    else:
+        prefix = None
+
+    if len(words) > WORDS_MAX:
+        raise ValueError('A query must not contain more than %d words.' %
+                         WORDS_MAX)
+
+    postings = [db.alias(search_posting, 'p%d' % i)
+                for i in range(len(words))]
+    first = postings[0]
+    rank = db.case([(first.c.entity_type == entity_type, i)
+                    for i, entity_type in enumerate(ENTITY_TYPES)])
+    query = db.select([first.c.entity_type, first.c.entity_id,
+                       rank.label('rank')]).where(
+        first.c.organization_id == organization_id)
+
+    for posting, word in zip(postings, words):
+        if word == prefix:
+            # words consist of word characters, of which only _ is special
+            query = query.where(posting.c.token.like(
+                word.replace('_', '/_') + '%',
+                escape='/'))
+        else:
+            query = query.where(posting.c.token == word)
+
+        if posting is not first:
+            query = query.where(
+                posting.c.organization_id == organization_id).where(
+                posting.c.entity_type == first.c.entity_type).where(
+                posting.c.entity_id == first.c.entity_id)
+
+    query = query.distinct().order_by('rank', first.c.entity_id).limit(limit)
+
+    return [(entity_type, entity_id) for entity_type, entity_id, rank in
+            db.session.execute(query)]
+
+
+def get_titles(hits):
+    """
+    Return the type, the id and the title of each hit.
+
+    The titles of each type are read with a single query.
+
+    """
+    columns = {
+        'role': (RoleModel.id, RoleModel.name),
+        'accountability': (AccountabilityModel.id,
+                           AccountabilityModel.title),
+        'domain': (DomainModel.id, DomainModel.title),
+        'policy': (PolicyModel.id, PolicyModel.title)
+    }
+    titles = {}
+
+    for entity_type, (id, title) in columns.items():
+        ids = [entity_id for type, entity_id in hits if type == entity_type]
+
+        if ids:
+            titles[entity_type] = dict(db.session.query(id, title).filter(
+                id.in_(ids)))
+
+    return [{
+        'type': entity_type,
+        'id': entity_id,
+        'title': titles[entity_type].get(entity_id)
+    } for entity_type, entity_id in hits]
+
+
+def main():
+    """
+    Rebuild the index of all organizations.
+
+    """
+    # imported here, since importing the app creates an app
+    from swarm_intelligence_app.app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--uri',
+                        help='database URI (default: from the config)')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    if args.uri:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.uri
+
+    with app.app_context():
+        organization_ids = [row[0] for row in db.session.query(
+            OrganizationModel.id).filter(
+            db.not_(OrganizationModel.is_deleted))]
+
+        for organization_id in organization_ids:
+            rebuild(organization_id)
+            db.session.commit()
+            print('Rebuilt the index of organization %d.' % organization_id)
+
+
+if __name__ == '__main__':
+    main()
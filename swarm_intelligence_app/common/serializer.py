@@ -0,0 +1,220 @@
+"""
+Define serializers for models and query rows and the JSON encoder of the API.
+
+The fields of a model are declared once in its serialized_fields attribute.
+Each field is either the name of a column attribute or a pair of the key in
+the representation and the name of the column attribute. A serializer
+compiles the fields of a model once into a list of columns, an attribute
+getter and the keys whose enum values must be converted. It can dump ORM
+instances as well as plain rows of a query on its columns, so that listings
+do not need to materialize ORM instances.
+
+The fields parameter of a request selects a subset of the fields, which is
+projected down to the columns that are read from the database.
+
+"""
+import json
+from operator import attrgetter
+
+from flask import abort, make_response, request
+from sqlalchemy.orm import load_only
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_serializers = {}
+
+
+class Serializer:
+    """
+    Define a compiled serializer for a model.
+
+    """
+    def __init__(self,
+                 model,
+                 fields=None):
+        """
+        Initialize a serializer for the given fields of a model.
+
+        """
+        declared = get_declared_fields(model)
+
+        if fields is None:
+            fields = tuple(declared)
+
+        self.model = model
+        self.fields = tuple(fields)
+        self.attributes = [declared[key] for key in self.fields]
+        self.columns = [getattr(model, name) for name in self.attributes]
+        self.enum_fields = tuple(
+            key for key, column in zip(self.fields, self.columns)
+            if getattr(column.type, 'enum_class', None) is not None)
+
+        if not self.fields:
+            self._getter = lambda instance: ()
+        elif len(self.fields) == 1:
+            getter = attrgetter(*self.attributes)
+            self._getter = lambda instance: (getter(instance),)
+        else:
+            self._getter = attrgetter(*self.attributes)
+
+    def load_only(self):
+        """
+        Return the query option that loads only the columns of the fields.
+
+        The version of an entity is always loaded, since it is needed for its
+        entity tag and for updates.
+
+        """
+        names = list(self.attributes)
+
+        if hasattr(self.model, 'version'):
+            names.append('version')
+
+        return load_only(*names)
+
+    def dump_row(self, row):
+        """
+        Return the representation of a row of a query on the columns.
+
+        """
+        data = dict(zip(self.fields, row))
+
+        for key in self.enum_fields:
+            value = data[key]
+
+            if value is not None:
+                data[key] = value.value
+
+        return data
+
+    def dump_rows(self, rows):
+        """
+        Return the representations of the rows of a query on the columns.
+
+        """
+        return [self.dump_row(row) for row in rows]
+
+    def dump(self, instance):
+        """
+        Return the representation of an instance of the model.
+
+        """
+        return self.dump_row(self._getter(instance))
+
+
+def get_declared_fields(model):
+    """
+    Return the keys of the fields of a model mapped to their attributes.
+
+    """
+    declared = {}
+
+    for field in model.serialized_fields:
+        key, name = (field, field) if isinstance(field, str) else field
+        declared[key] = name
+
+    return declared
+
+
+def get_serializer(model,
+                   fields=None):
+    """
+    Return the compiled serializer for the given fields of a model.
+
+    """
+    key = (model, fields)
+    serializer = _serializers.get(key)
+
+    if serializer is None:
+        serializer = Serializer(model, fields)
+        _serializers[key] = serializer
+
+    return serializer
+
+
+def get_requested_fields(*models, extra=()):
+    """
+    Return the fields selected by the fields parameter or None.
+
+    The parameter is a comma-separated list of fields, each of which must be
+    a field of one of the given models or one of the extra fields of the
+    resource. The id is always selected, since it identifies an item and
+    serves as the cursor of a page.
+
+    """
+    value = request.args.get('fields')
+
+    if not value:
+        return None
+
+    fields = {field.strip() for field in value.split(',')} - {''}
+    fields.add('id')
+
+    known = set(extra)
+
+    for model in models:
+        known.update(get_declared_fields(model))
+
+    unknown = fields - known
+
+    if unknown:
+        abort(400, 'Unknown fields: %s.' % ', '.join(sorted(unknown)))
+
+    return fields
+
+
+def select_serializer(model,
+                      fields):
+    """
+    Return the serializer for the given fields that belong to a model.
+
+    If fields is None, the serializer for all fields is returned.
+
+    """
+    if fields is None:
+        return get_serializer(model)
+
+    return get_serializer(model, tuple(
+        key for key in get_declared_fields(model) if key in fields))
+
+
+def get_request_serializer(model):
+    """
+    Return the serializer for the fields that a request selects.
+
+    """
+    return select_serializer(model, get_requested_fields(model))
+
+
+def dumps(data):
+    """
+    Return the JSON encoding of data as bytes.
+
+    orjson is used if it is installed, since it is several times faster than
+    the json module of the standard library.
+
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass
+
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def output_json(data, code, headers=None):
+    """
+    Make a compact JSON response.
+
+    This replaces the representation of Flask-RESTful, which encodes the
+    response with the json module and pretty-prints it in debug mode.
+
+    """
+    response = make_response(dumps(data), code)
+    response.headers.extend(headers or {})
+    response.mimetype = 'application/json'
+    return response
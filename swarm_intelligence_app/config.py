@@ -11,9 +11,54 @@ class Config:
     """
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = 'sqlite://:memory:'
-    SI_GOOGLE_CLIENT_ID = os.environ.get('SI_GOOGLE_CLIENT_ID')
+    SI_GOOGLE_CLIENT_ID = os.environ.get('SI_GOOGLE_CLIENT_ID') or \
+        '806916571874-7tnsbrr22526ioo36l8njtqj2st8nn54' \
+        '.apps.googleusercontent.com'
+    SI_GOOGLE_TOKEN_VERIFICATION = \
+        os.environ.get('SI_GOOGLE_TOKEN_VERIFICATION') or 'local'
+    SI_GOOGLE_CERTS_URL = os.environ.get('SI_GOOGLE_CERTS_URL') or \
+        'https://www.googleapis.com/oauth2/v3/certs'
     SI_JWT_SECRET = os.environ.get('SI_JWT_SECRET') or 'top_secret'
     SI_JWT_EXPIRATION = os.environ.get('SI_JWT_EXPIRATION') or 86400
+    SI_AUTH_CACHE_SIZE = int(os.environ.get('SI_AUTH_CACHE_SIZE') or 1024)
+    SI_AUTH_CACHE_TTL = int(os.environ.get('SI_AUTH_CACHE_TTL') or 60)
+    SI_PAGE_SIZE = int(os.environ.get('SI_PAGE_SIZE') or 100)
+    SI_PAGE_SIZE_MAX = int(os.environ.get('SI_PAGE_SIZE_MAX') or 1000)
+    SI_RESPONSE_CACHE = os.environ.get('SI_RESPONSE_CACHE') or 'none'
+    SI_RESPONSE_CACHE_URL = os.environ.get('SI_RESPONSE_CACHE_URL') or \
+        'redis://localhost:6379/0'
+    SI_RESPONSE_CACHE_SIZE = \
+        int(os.environ.get('SI_RESPONSE_CACHE_SIZE') or 4096)
+    SI_RESPONSE_CACHE_TTL = int(os.environ.get('SI_RESPONSE_CACHE_TTL') or 300)
+    SI_BATCH_SIZE_MAX = int(os.environ.get('SI_BATCH_SIZE_MAX') or 50)
+    SI_METRICS = (os.environ.get('SI_METRICS') or 'on') == 'on'
+    SI_INVITATION_URL = os.environ.get('SI_INVITATION_URL') or \
+        'http://localhost:5000/invitations/{code}/accept'
+    SI_MAIL_SENDER = os.environ.get('SI_MAIL_SENDER') or \
+        'noreply@localhost'
+    SI_SMTP_HOST = os.environ.get('SI_SMTP_HOST') or 'localhost'
+    SI_SMTP_PORT = int(os.environ.get('SI_SMTP_PORT') or 25)
+    SI_SMTP_USER = os.environ.get('SI_SMTP_USER')
+    SI_SMTP_PASSWORD = os.environ.get('SI_SMTP_PASSWORD')
+    SI_SMTP_STARTTLS = (os.environ.get('SI_SMTP_STARTTLS') or 'off') == 'on'
+    SI_SMTP_TIMEOUT = int(os.environ.get('SI_SMTP_TIMEOUT') or 30)
+    SI_OUTBOX_WORKERS = int(os.environ.get('SI_OUTBOX_WORKERS') or 2)
+    SI_OUTBOX_BATCH_SIZE = int(os.environ.get('SI_OUTBOX_BATCH_SIZE') or 50)
+    SI_OUTBOX_POLL_INTERVAL = \
+        int(os.environ.get('SI_OUTBOX_POLL_INTERVAL') or 5)
+    SI_OUTBOX_LEASE = int(os.environ.get('SI_OUTBOX_LEASE') or 300)
+    SI_OUTBOX_BACKOFF = int(os.environ.get('SI_OUTBOX_BACKOFF') or 60)
+    SI_OUTBOX_MAX_ATTEMPTS = \
+        int(os.environ.get('SI_OUTBOX_MAX_ATTEMPTS') or 8)
+    SI_DELETION_CHUNK_SIZE = \
+        int(os.environ.get('SI_DELETION_CHUNK_SIZE') or 1000)
+    SI_DELETION_LEASE = int(os.environ.get('SI_DELETION_LEASE') or 300)
+    SI_DELETION_POLL_INTERVAL = \
+        int(os.environ.get('SI_DELETION_POLL_INTERVAL') or 5)
+    SI_EXPORT_CHUNK_SIZE = int(os.environ.get('SI_EXPORT_CHUNK_SIZE') or 1000)
+    SI_IMPORT_BATCH_SIZE = int(os.environ.get('SI_IMPORT_BATCH_SIZE') or 1000)
+    SI_IMPORT_CHECKPOINT = \
+        int(os.environ.get('SI_IMPORT_CHECKPOINT') or 10000)
 
 
 class DevelopmentConfig(Config):
@@ -23,6 +68,7 @@ class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = \
         'mysql+pymysql://root@localhost:3306/swarm_intelligence'
+    SI_RESPONSE_CACHE = os.environ.get('SI_RESPONSE_CACHE') or 'local'
 
 
 class TestingConfig(Config):
@@ -0,0 +1,4 @@
+"""
+Define the versioned migrations of the database schema.
+
+"""
@@ -0,0 +1,42 @@
+"""
+Bring a database that was created before the migrations up to the models.
+
+The tables that are missing are created, the organizations get the column
+is_deleted and the nodes get the column version of their entity tags.
+
+"""
+from swarm_intelligence_app.common.migration import has_column
+from swarm_intelligence_app.models import db
+
+COLUMNS = (
+    ('organization', 'is_deleted', 'BOOLEAN NOT NULL DEFAULT 0'),
+    ('organization', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('partner', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('role', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('circle', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('domain', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('policy', 'version', 'INTEGER NOT NULL DEFAULT 1'),
+    ('accountability', 'version', 'INTEGER NOT NULL DEFAULT 1')
+)
+
+
+def upgrade(connection):
+    """
+    Create the missing tables and columns.
+
+    """
+    db.metadata.create_all(bind=connection)
+
+    quote = connection.dialect.identifier_preparer.quote
+
+    for table, column, definition in COLUMNS:
+        if not has_column(connection, table, column):
+            connection.execute(db.text('ALTER TABLE %s ADD COLUMN %s %s' % (
+                quote(table), quote(column), definition)))
+
+
+def downgrade(connection):
+    """
+    Keep the schema, since the baseline cannot be reverted.
+
+    """
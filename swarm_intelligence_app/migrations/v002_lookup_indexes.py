@@ -0,0 +1,47 @@
+"""
+Add the indexes of the foreign keys and of the common filters.
+
+Partner.organization_id and Invitation.organization_id are covered by the
+composite indexes, since they are their first columns, and Partner.user_id
+is covered by the unique constraint on (user_id, organization_id).
+
+InnoDB creates an index for every foreign key by itself and refuses to drop
+an index that a foreign key needs, so on MySQL the downgrade keeps the
+indexes.
+
+"""
+from swarm_intelligence_app.common.migration import create_index, \
+    drop_index
+
+INDEXES = (
+    ('role', 'ix_role_parent_circle_id', ('parent_circle_id',)),
+    ('role', 'ix_role_organization_id', ('organization_id',)),
+    ('partner', 'ix_partner_organization_id_type',
+     ('organization_id', 'type')),
+    ('invitation', 'ix_invitation_organization_id_status',
+     ('organization_id', 'status')),
+    ('domain', 'ix_domain_role_id', ('role_id',)),
+    ('policy', 'ix_policy_domain_id', ('domain_id',)),
+    ('accountability', 'ix_accountability_role_id', ('role_id',))
+)
+
+
+def upgrade(connection):
+    """
+    Create the indexes.
+
+    """
+    for table, name, columns in INDEXES:
+        create_index(connection, table, name, columns)
+
+
+def downgrade(connection):
+    """
+    Drop the indexes.
+
+    """
+    if connection.dialect.name == 'mysql':
+        return
+
+    for table, name, columns in reversed(INDEXES):
+        drop_index(connection, table, name)
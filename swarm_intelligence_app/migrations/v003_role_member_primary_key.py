@@ -0,0 +1,57 @@
+"""
+Give the role members a primary key and an index on the partner.
+
+Neither MySQL nor SQLite can add a primary key to a table with duplicate
+rows, and SQLite cannot add one at all, so the table is copied to a new
+table with the primary key, without the duplicates, and replaced by it.
+
+The downgrade keeps the primary key, since the removed duplicates cannot be
+restored.
+
+"""
+from swarm_intelligence_app.common.migration import create_index, \
+    drop_index
+from swarm_intelligence_app.models import db
+
+INDEX = 'ix_role_member_partner_id_role_id'
+
+
+def upgrade(connection):
+    """
+    Replace the table with one that has the primary key.
+
+    """
+    inspector = db.inspect(connection)
+
+    if not inspector.get_pk_constraint('role_member')['constrained_columns']:
+        # the referenced tables are reflected for the foreign keys
+        metadata = db.MetaData()
+        db.Table('partner', metadata, autoload=True, autoload_with=connection)
+        db.Table('role', metadata, autoload=True, autoload_with=connection)
+        db.Table('role_member_new', metadata,
+                 db.Column('partner_id', db.Integer,
+                           db.ForeignKey('partner.id')),
+                 db.Column('role_id', db.Integer, db.ForeignKey('role.id')),
+                 db.PrimaryKeyConstraint('role_id', 'partner_id')).create(
+            connection)
+
+        connection.execute(db.text(
+            'INSERT INTO role_member_new (partner_id, role_id) '
+            'SELECT DISTINCT partner_id, role_id FROM role_member '
+            'WHERE partner_id IS NOT NULL AND role_id IS NOT NULL'))
+        connection.execute(db.text('DROP TABLE role_member'))
+        connection.execute(db.text(
+            'ALTER TABLE role_member_new RENAME TO role_member'))
+
+    create_index(connection, 'role_member', INDEX, ('partner_id', 'role_id'))
+
+
+def downgrade(connection):
+    """
+    Drop the index on the partner.
+
+    """
+    if connection.dialect.name == 'mysql':
+        return
+
+    drop_index(connection, 'role_member', INDEX)
@@ -0,0 +1,26 @@
+"""
+Add the search index and build it for all organizations.
+
+"""
+from swarm_intelligence_app.common import search
+from swarm_intelligence_app.models.search_posting import search_posting
+
+
+def upgrade(connection):
+    """
+    Create the table of the postings and fill it.
+
+    """
+    search_posting.create(connection, checkfirst=True)
+    connection.execute(search_posting.delete())
+
+    for entity_type, query in search.get_sources().items():
+        search.index_query(entity_type, query, connection)
+
+
+def downgrade(connection):
+    """
+    Drop the table of the postings.
+
+    """
+    search_posting.drop(connection, checkfirst=True)
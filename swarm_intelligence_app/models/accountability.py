@@ -2,6 +2,7 @@
 Define classes for an accountability.
 
 """
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 
 
@@ -12,7 +13,14 @@ class Accountability(db.Model):
     """
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
-    role_id = db.Column(db.Integer, db.ForeignKey('role.id'), nullable=False)
+    role_id = db.Column(db.Integer, db.ForeignKey('role.id'), nullable=False,
+                        index=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
+
+    serialized_fields = ('id', 'title', 'role_id')
+    expandable_relationships = ()
 
     def __init__(self, title, role_id):
         """
@@ -35,8 +43,4 @@ class Accountability(db.Model):
         Return a JSON-encoded representation of an accountability.
 
         """
-        return {
-            'id': self.id,
-            'title': self.title,
-            'role_id': self.role_id
-        }
+        return get_serializer(Accountability).dump(self)
@@ -2,6 +2,7 @@
 Define classes for a circle.
 
 """
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 
 
@@ -12,6 +13,9 @@ class Circle(db.Model):
     """
     id = db.Column(db.Integer, db.ForeignKey('role.id'), primary_key=True)
     strategy = db.Column(db.String(255), nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
     roles = db.relationship('Role',
                             backref='parent_circle',
@@ -24,6 +28,9 @@ class Circle(db.Model):
                             foreign_keys='Circle.id',
                             single_parent=True)
 
+    serialized_fields = ('id', 'strategy')
+    expandable_relationships = ('roles',)
+
     def __init__(self,
                  id,
                  strategy):
@@ -47,7 +54,4 @@ class Circle(db.Model):
         Return a JSON-encoded representation of a circle.
 
         """
-        return {
-            'id': self.id,
-            'strategy': self.strategy
-        }
+        return get_serializer(Circle).dump(self)
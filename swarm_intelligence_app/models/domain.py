@@ -2,6 +2,7 @@
 Define classes for a domain.
 
 """
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 
 
@@ -12,12 +13,19 @@ class Domain(db.Model):
     """
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
-    role_id = db.Column(db.Integer, db.ForeignKey('role.id'), nullable=False)
+    role_id = db.Column(db.Integer, db.ForeignKey('role.id'), nullable=False,
+                        index=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
     policies = db.relationship('Policy',
                                backref='domain',
                                cascade='all, delete-orphan')
 
+    serialized_fields = ('id', 'title', 'role_id')
+    expandable_relationships = ('policies',)
+
     def __init__(self, title, role_id):
         """
         Initialize a domain.
@@ -39,8 +47,4 @@ class Domain(db.Model):
         Return a JSON-encoded representation of a domain.
 
         """
-        return {
-            'id': self.id,
-            'title': self.title,
-            'role_id': self.role_id
-        }
+        return get_serializer(Domain).dump(self)
@@ -5,6 +5,7 @@ Define classes for an invitation.
 import uuid
 from enum import Enum
 
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 
 
@@ -30,6 +31,12 @@ class Invitation(db.Model):
     organization_id = db.Column(db.Integer, db.ForeignKey('organization.id'),
                                 nullable=False)
 
+    __table_args__ = (db.Index('ix_invitation_organization_id_status',
+                               'organization_id', 'status'),)
+
+    serialized_fields = ('id', 'code', 'email', 'status', 'organization_id')
+    expandable_relationships = ()
+
     def __init__(self,
                  email,
                  organization_id):
@@ -55,10 +62,4 @@ class Invitation(db.Model):
         Return a JSON-encoded representation of an invitation.
 
         """
-        return {
-            'id': self.id,
-            'code': self.code,
-            'email': self.email,
-            'status': self.status.value,
-            'organization_id': self.organization_id
-        }
+        return get_serializer(Invitation).dump(self)
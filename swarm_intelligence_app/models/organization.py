@@ -2,6 +2,7 @@
 Define classes for an organization.
 
 """
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 
 
@@ -12,6 +13,10 @@ class Organization(db.Model):
     """
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
+    is_deleted = db.Column(db.Boolean(), nullable=False, default=False)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
     partners = db.relationship('Partner',
                                backref='organization',
@@ -25,6 +30,9 @@ class Organization(db.Model):
                             backref='organization',
                             cascade='all, delete-orphan')
 
+    serialized_fields = ('id', 'name')
+    expandable_relationships = ('partners',)
+
     def __init__(self,
                  name):
         """
@@ -32,6 +40,7 @@ class Organization(db.Model):
 
         """
         self.name = name
+        self.is_deleted = False
 
     def __repr__(self):
         """
@@ -46,7 +55,4 @@ class Organization(db.Model):
         Return a JSON-encoded representation of an organization.
 
         """
-        return {
-            'id': self.id,
-            'name': self.name,
-        }
+        return get_serializer(Organization).dump(self)
@@ -0,0 +1,69 @@
+"""
+Define classes for the deletion of an organization.
+
+"""
+from datetime import datetime
+from enum import Enum
+
+from swarm_intelligence_app.common.serializer import get_serializer
+from swarm_intelligence_app.models import db
+
+
+class DeletionStatus(Enum):
+    """
+    Define values for a deletion's status.
+
+    """
+    pending = 'pending'
+    done = 'done'
+
+
+class OrganizationDeletion(db.Model):
+    """
+    Define a mapping to the database for the deletion of an organization.
+
+    A deletion is a job that deletes the rows of a deleted organization in
+    the background. It records the step it is at and the number of rows it
+    has deleted, and is leased by the worker that runs it, so that another
+    worker resumes it if the worker dies.
+
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    organization_id = db.Column(db.Integer, unique=True, nullable=False)
+    status = db.Column(db.Enum(DeletionStatus), nullable=False)
+    step = db.Column(db.String(45), nullable=True)
+    deleted_rows = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    leased_by = db.Column(db.String(36), nullable=True)
+    leased_until = db.Column(db.DateTime, nullable=True)
+
+    serialized_fields = ('id', 'organization_id', 'status', 'step',
+                         'deleted_rows')
+    expandable_relationships = ()
+
+    def __init__(self,
+                 organization_id):
+        """
+        Initialize a deletion.
+
+        """
+        self.organization_id = organization_id
+        self.status = DeletionStatus.pending
+        self.deleted_rows = 0
+        self.created_at = datetime.utcnow()
+
+    def __repr__(self):
+        """
+        Return a readable representation of a deletion.
+
+        """
+        return '<OrganizationDeletion %r>' % self.id
+
+    @property
+    def serialize(self):
+        """
+        Return a JSON-encoded representation of a deletion.
+
+        """
+        return get_serializer(OrganizationDeletion).dump(self)
@@ -0,0 +1,65 @@
+"""
+Define classes for a message of the outbox.
+
+"""
+from datetime import datetime
+from enum import Enum
+
+from swarm_intelligence_app.models import db
+
+
+class OutboxStatus(Enum):
+    """
+    Define values for an outbox message's status.
+
+    """
+    pending = 'pending'
+    sent = 'sent'
+    failed = 'failed'
+
+
+class OutboxMessage(db.Model):
+    """
+    Define a mapping to the database for a message of the outbox.
+
+    A message is written in the same transaction as the change that causes
+    it and is sent by a worker afterwards. A worker claims a message by
+    setting its lease, so that several workers can drain the outbox.
+
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(100), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.Enum(OutboxStatus), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False)
+    leased_by = db.Column(db.String(36), nullable=True)
+    leased_until = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.String(255), nullable=True)
+
+    __table_args__ = (db.Index('ix_outbox_message_status_next_attempt_at',
+                               'status', 'next_attempt_at'),)
+
+    def __init__(self,
+                 recipient,
+                 subject,
+                 body):
+        """
+        Initialize a message.
+
+        """
+        self.recipient = recipient
+        self.subject = subject
+        self.body = body
+        self.status = OutboxStatus.pending
+        self.attempts = 0
+        self.next_attempt_at = datetime.utcnow()
+
+    def __repr__(self):
+        """
+        Return a readable representation of a message.
+
+        """
+        return '<OutboxMessage %r>' % self.id
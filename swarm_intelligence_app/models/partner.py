@@ -4,6 +4,7 @@ Define classes for a partner.
 """
 from enum import Enum
 
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.role_member import role_member
 
@@ -33,6 +34,7 @@ class Partner(db.Model):
                                 nullable=False)
     invitation_id = db.Column(db.Integer, db.ForeignKey('invitation.id'),
                               nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
 
     memberships = db.relationship('Role',
                                   secondary=role_member,
@@ -40,7 +42,16 @@ class Partner(db.Model):
 
     __table_args__ = (db.UniqueConstraint('user_id', 'organization_id',
                                           name='UNIQUE_organization_id_user_id'
-                                          ),)
+                                          ),
+                      db.Index('ix_partner_organization_id_type',
+                               'organization_id', 'type'))
+
+    __mapper_args__ = {'version_id_col': version}
+
+    serialized_fields = ('id', 'type', 'firstname', 'lastname', 'email',
+                         'is_active', 'user_id', 'organization_id',
+                         'invitation_id')
+    expandable_relationships = ('memberships',)
 
     def __init__(self,
                  type,
@@ -76,14 +87,4 @@ class Partner(db.Model):
         Return a JSON-encoded representation of a partner.
 
         """
-        return {
-            'id': self.id,
-            'type': self.type.value,
-            'firstname': self.firstname,
-            'lastname': self.lastname,
-            'email': self.email,
-            'is_active': self.is_active,
-            'user_id': self.user.id,
-            'organization_id': self.organization.id,
-            'invitation_id': self.invitation_id
-        }
+        return get_serializer(Partner).dump(self)
@@ -2,6 +2,7 @@
 Define classes for a policy.
 
 """
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 
 
@@ -14,7 +15,13 @@ class Policy(db.Model):
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.String(255), nullable=True)
     domain_id = db.Column(db.Integer, db.ForeignKey('domain.id'),
-                          nullable=False)
+                          nullable=False, index=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
+
+    serialized_fields = ('id', 'title', 'description', ('domain', 'domain_id'))
+    expandable_relationships = ()
 
     def __init__(self, title, description, domain_id):
         """
@@ -38,9 +45,4 @@ class Policy(db.Model):
         Return a JSON-encoded representation of a policy.
 
         """
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'domain': self.domain_id
-        }
+        return get_serializer(Policy).dump(self)
@@ -4,6 +4,7 @@ Define classes for a role.
 """
 from enum import Enum
 
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.role_member import role_member
 
@@ -32,9 +33,12 @@ class Role(db.Model):
     name = db.Column(db.String(100), nullable=False)
     purpose = db.Column(db.String(255), nullable=False)
     parent_circle_id = db.Column(db.Integer, db.ForeignKey('circle.id'),
-                                 nullable=True)
+                                 nullable=True, index=True)
     organization_id = db.Column(db.Integer, db.ForeignKey('organization.id'),
-                                nullable=False)
+                                nullable=False, index=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
     members = db.relationship('Partner',
                               secondary=role_member,
@@ -56,6 +60,10 @@ class Role(db.Model):
                                      uselist=False,
                                      cascade='all, delete-orphan')
 
+    serialized_fields = ('id', 'type', 'name', 'purpose', 'parent_circle_id',
+                         'organization_id')
+    expandable_relationships = ('domains', 'accountabilities', 'members')
+
     def __init__(self,
                  type,
                  name,
@@ -85,11 +93,4 @@ class Role(db.Model):
         Return a JSON-encoded representation of a role.
 
         """
-        return {
-            'id': self.id,
-            'type': self.type.value,
-            'name': self.name,
-            'purpose': self.purpose,
-            'parent_circle_id': self.parent_circle_id,
-            'organization_id': self.organization_id
-        }
+        return get_serializer(Role).dump(self)
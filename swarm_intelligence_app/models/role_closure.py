@@ -0,0 +1,16 @@
+"""
+Define classes for the closure of the circle hierarchy.
+
+"""
+from swarm_intelligence_app.models import db
+
+
+role_closure = db.Table(
+    'role_closure',
+    db.Column('ancestor_id', db.Integer, db.ForeignKey('role.id'),
+              primary_key=True),
+    db.Column('descendant_id', db.Integer, db.ForeignKey('role.id'),
+              primary_key=True),
+    db.Column('depth', db.Integer, nullable=False),
+    db.Index('ix_role_closure_descendant_id_depth', 'descendant_id', 'depth')
+)
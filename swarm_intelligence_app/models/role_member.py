@@ -8,5 +8,7 @@ from swarm_intelligence_app.models import db
 role_member = db.Table(
     'role_member',
     db.Column('partner_id', db.Integer, db.ForeignKey('partner.id')),
-    db.Column('role_id', db.Integer, db.ForeignKey('role.id'))
+    db.Column('role_id', db.Integer, db.ForeignKey('role.id')),
+    db.PrimaryKeyConstraint('role_id', 'partner_id'),
+    db.Index('ix_role_member_partner_id_role_id', 'partner_id', 'role_id')
 )
@@ -0,0 +1,19 @@
+"""
+Define classes for the search index of an organization.
+
+"""
+from swarm_intelligence_app.models import db
+
+
+search_posting = db.Table(
+    'search_posting',
+    db.Column('organization_id', db.Integer,
+              db.ForeignKey('organization.id'), nullable=False),
+    db.Column('token', db.String(45), nullable=False),
+    db.Column('entity_type', db.String(20), nullable=False),
+    db.Column('entity_id', db.Integer, nullable=False),
+    db.PrimaryKeyConstraint('organization_id', 'token', 'entity_type',
+                            'entity_id'),
+    db.Index('ix_search_posting_entity_type_entity_id', 'entity_type',
+             'entity_id')
+)
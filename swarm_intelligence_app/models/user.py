@@ -3,6 +3,7 @@ Define classes for a user.
 
 """
 from sqlalchemy.ext.associationproxy import association_proxy
+from swarm_intelligence_app.common.serializer import get_serializer
 from swarm_intelligence_app.models import db
 
 
@@ -21,6 +22,10 @@ class User(db.Model):
     partners = db.relationship('Partner', backref='user')
     organizations = association_proxy('partners', 'organization')
 
+    serialized_fields = ('id', 'google_id', 'firstname', 'lastname', 'email',
+                         'is_active')
+    expandable_relationships = ()
+
     def __init__(self,
                  google_id,
                  firstname,
@@ -49,11 +54,4 @@ class User(db.Model):
         Return a JSON-encoded representation of a user.
 
         """
-        return {
-            'id': self.id,
-            'google_id': self.google_id,
-            'firstname': self.firstname,
-            'lastname': self.lastname,
-            'email': self.email,
-            'is_active': self.is_active
-        }
+        return get_serializer(User).dump(self)
@@ -4,7 +4,12 @@ Define the classes for the accountability API.
 """
 from flask import abort
 from flask_restful import reqparse, Resource
+from swarm_intelligence_app.common import search
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.deletion import check_organization
+from swarm_intelligence_app.common.etag import check_if_match, commit, \
+    etag_headers, get_etag, is_not_modified
+from swarm_intelligence_app.common.serializer import get_request_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.accountability import Accountability as \
     AccountabilityModel
@@ -16,6 +21,7 @@ class Accountability(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def get(self, accountability_id):
         """
         Retrieve an accountability.
@@ -23,6 +29,9 @@ class Accountability(Resource):
         Request:
             GET /accountabilities/{accountability_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If accountability is retrieved
                 {
@@ -30,20 +39,29 @@ class Accountability(Resource):
                     'title': 'Accountability\'s title'
                     'role_id': 99
                 }
+            304 Not Modified - If accountability has not been modified
             400 Bad Request - If token is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If accountability is not found
 
         """
-        accountability = AccountabilityModel.query.get(accountability_id)
+        serializer = get_request_serializer(AccountabilityModel)
+        accountability = AccountabilityModel.query.options(
+            serializer.load_only()).get(accountability_id)
 
         if accountability is None:
             abort(404)
 
-        return accountability.serialize, 200
+        etag = get_etag(accountability)
+
+        if is_not_modified(etag):
+            return None, 304, etag_headers(etag)
+
+        return serializer.dump(accountability), 200, etag_headers(etag)
 
     @auth.login_required
+    @check_organization
     def put(self, accountability_id):
         """
         Update an accountability.
@@ -65,6 +83,7 @@ class Accountability(Resource):
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If accountability is not found
+            412 Precondition Failed - If accountability has been modified
 
         """
         accountability = AccountabilityModel.query.get(accountability_id)
@@ -72,16 +91,22 @@ class Accountability(Resource):
         if accountability is None:
             abort(404)
 
+        check_if_match(get_etag(accountability))
+
         parser = reqparse.RequestParser(bundle_errors=True)
         parser.add_argument('title', required=True)
         args = parser.parse_args()
 
+        search.index('accountability', accountability.id,
+                     accountability.role.organization_id, args['title'])
         accountability.title = args['title']
-        db.session.commit()
+        commit()
 
-        return accountability.serialize, 200
+        return accountability.serialize, 200, etag_headers(
+            get_etag(accountability))
 
     @auth.login_required
+    @check_organization
     def delete(self, accountability_id):
         """
         Delete an accountability.
@@ -102,6 +127,7 @@ class Accountability(Resource):
         if accountability is None:
             abort(404)
 
+        search.remove('accountability', [accountability.id])
         db.session.delete(accountability)
         db.session.commit()
 
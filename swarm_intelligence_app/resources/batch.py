@@ -0,0 +1,177 @@
+"""
+Define the classes for the batch API.
+
+"""
+import json
+from contextlib import contextmanager
+
+from flask import abort, current_app, request
+from flask_restful import inputs, reqparse, Resource
+from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.response_cache import \
+    deferred_generations
+from swarm_intelligence_app.models import db
+
+METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+HEADERS = ('ETag', 'Link', 'Location', 'X-Next-Cursor')
+
+
+@contextmanager
+def deferred_commits():
+    """
+    Turn all commits of the session into flushes until the block is left.
+
+    The handlers of the API commit the session themselves. Within this block
+    their changes are only flushed, so that the changes of several handlers
+    end up in a single transaction that the caller commits or rolls back.
+
+    """
+    session = db.session()
+    session.commit = session.flush
+
+    try:
+        yield
+    finally:
+        del session.commit
+
+
+def dispatch(method, path, body, headers):
+    """
+    Dispatch a sub-request within the current app context.
+
+    The sub-request is handled by the full request pipeline, including the
+    hooks of the app, and shares the session and the authenticated user of
+    the batch request.
+
+    """
+    data = None if body is None else json.dumps(body)
+
+    with current_app.test_request_context(path, method=method, data=data,
+                                          content_type='application/json',
+                                          headers=headers):
+        response = current_app.full_dispatch_request()
+
+    result = {'status': response.status_code}
+
+    for name in HEADERS:
+        if name in response.headers:
+            result.setdefault('headers', {})[name] = response.headers[name]
+
+    text = response.get_data(as_text=True)
+    result['body'] = json.loads(text) if text and \
+        response.mimetype == 'application/json' else None
+
+    return result
+
+
+class Batch(Resource):
+    """
+    Define the endpoints for the batch node.
+
+    """
+    @auth.login_required
+    def post(self):
+        """
+        Handle several requests at once.
+
+        This endpoint handles a list of sub-requests in order and returns
+        their responses in the same order. The sub-requests are handled
+        within this request, so that the client needs a single round trip.
+        They are authenticated as the user of the batch request and share
+        its database session. If transaction is set, all sub-requests are
+        applied in a single transaction: the first sub-request that fails
+        stops the batch and rolls back the changes of all prior
+        sub-requests.
+
+        Request:
+            POST /batch
+
+            Parameters:
+                requests (list): The sub-requests to handle
+                    [
+                        {
+                            'method': 'GET|POST|PUT|DELETE',
+                            'path': '/roles/1/members?limit=10',
+                            'body': null|{
+                                'Key': 'Value'
+                            }
+                        }
+                    ]
+                transaction (bool): Whether to apply all sub-requests in a
+                    single transaction (optional)
+
+        Response:
+            200 OK - If the sub-requests are handled
+                [
+                    {
+                        'status': 200,
+                        'headers': {
+                            'ETag': '"role.1.1"'
+                        },
+                        'body': null|{
+                            'Key': 'Value'
+                        }
+                    }
+                ]
+            400 Bad Request - If token is not well-formed
+            400 Bad Request - If a sub-request is not well-formed
+            400 Bad Request - If there are too many sub-requests
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            409 Conflict - If a sub-request of a transaction fails, the
+                responses up to the failed sub-request are returned
+
+        """
+        parser = reqparse.RequestParser(bundle_errors=True)
+        parser.add_argument('requests', type=list, location='json',
+                            required=True)
+        parser.add_argument('transaction', type=inputs.boolean,
+                            location='json', default=False)
+        args = parser.parse_args()
+
+        if len(args['requests']) > current_app.config['SI_BATCH_SIZE_MAX']:
+            abort(400, 'A batch must not contain more than %d requests.' %
+                  current_app.config['SI_BATCH_SIZE_MAX'])
+
+        subrequests = []
+
+        for subrequest in args['requests']:
+            try:
+                method = subrequest['method'].upper()
+                path = subrequest['path']
+                body = subrequest.get('body')
+            except (AttributeError, KeyError, TypeError):
+                abort(400, 'A sub-request is not well-formed.')
+
+            if method not in METHODS or not isinstance(path, str) or \
+                    not path.startswith('/') or \
+                    path.split('?')[0].rstrip('/') == request.path:
+                abort(400, 'A sub-request is not well-formed.')
+
+            subrequests.append((method, path, body))
+
+        headers = {'Authorization': request.headers['Authorization']}
+        results = []
+
+        if not args['transaction']:
+            for method, path, body in subrequests:
+                results.append(dispatch(method, path, body, headers))
+
+            return results, 200
+
+        with deferred_generations():
+            with deferred_commits():
+                for method, path, body in subrequests:
+                    result = dispatch(method, path, body, headers)
+                    results.append(result)
+
+                    if result['status'] >= 400:
+                        break
+
+            if results and results[-1]['status'] >= 400:
+                db.session.rollback()
+                return results, 409
+
+            db.session.commit()
+
+        return results, 200
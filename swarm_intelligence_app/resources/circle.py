@@ -4,12 +4,27 @@ Define the classes for the circle API.
 """
 from flask import abort
 from flask_restful import reqparse, Resource
+from swarm_intelligence_app.common import closure
+from swarm_intelligence_app.common import membership
+from swarm_intelligence_app.common import search
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.deletion import check_organization
+from swarm_intelligence_app.common.etag import check_if_match, commit, \
+    etag_headers, get_etag, is_not_modified
+from swarm_intelligence_app.common.expand import expand, \
+    get_expanded_etag, get_loader_options, get_model_expansion, \
+    get_requested_expansion
+from swarm_intelligence_app.common.pagination import paginate
+from swarm_intelligence_app.common.response_cache import cached
+from swarm_intelligence_app.common.serializer import get_request_serializer, \
+    get_requested_fields, select_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.circle import Circle as CircleModel
 from swarm_intelligence_app.models.partner import Partner as PartnerModel
 from swarm_intelligence_app.models.role import Role as RoleModel
 from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.models.role_member import role_member
 
 
 class Circle(Resource):
@@ -18,6 +33,8 @@ class Circle(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self,
             circle_id):
         """
@@ -29,6 +46,10 @@ class Circle(Resource):
         Request:
             GET /circles/{circle_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+                expand (string): The relationships to embed (optional)
+
         Response:
             200 OK - If circle is retrieved
                 {
@@ -40,24 +61,42 @@ class Circle(Resource):
                     'parent_circle_id': null|1,
                     'organization_id': 1
                 }
+            304 Not Modified - If circle has not been modified
             400 Bad Request - If token is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If circle is not found
 
         """
-        circle = CircleModel.query.get(circle_id)
+        fields = get_requested_fields(RoleModel, CircleModel)
+        expansion = get_requested_expansion(RoleModel, CircleModel)
+        role_expansion = get_model_expansion(RoleModel, expansion)
+        circle_expansion = get_model_expansion(CircleModel, expansion)
+
+        role_loader = db.joinedload(CircleModel.super)
+        options = get_loader_options(RoleModel, role_expansion, role_loader)
+        options += get_loader_options(CircleModel, circle_expansion)
+        circle = CircleModel.query.options(role_loader, *options).get(
+            circle_id)
 
         if circle is None:
             abort(404)
 
-        data = {}
-        data.update(circle.super.serialize)
-        data.update(circle.serialize)
+        etag = get_expanded_etag(get_etag(circle.super, circle),
+                                 [circle.super, circle], expansion)
+
+        if is_not_modified(etag):
+            return None, 304, etag_headers(etag)
+
+        data = select_serializer(RoleModel, fields).dump(circle.super)
+        data.update(select_serializer(CircleModel, fields).dump(circle))
+        expand(data, circle.super, role_expansion)
+        expand(data, circle, circle_expansion)
 
-        return data, 200
+        return data, 200, etag_headers(etag)
 
     @auth.login_required
+    @check_organization
     def put(self,
             circle_id):
         """
@@ -89,6 +128,7 @@ class Circle(Resource):
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If circle is not found
+            412 Precondition Failed - If circle has been modified
 
         """
         circle = CircleModel.query.get(circle_id)
@@ -96,22 +136,26 @@ class Circle(Resource):
         if circle is None:
             abort(404)
 
+        check_if_match(get_etag(circle.super, circle))
+
         parser = reqparse.RequestParser(bundle_errors=True)
         parser.add_argument('name', required=True)
         parser.add_argument('purpose', required=True)
         parser.add_argument('strategy')
         args = parser.parse_args()
 
+        search.index('role', circle.id, circle.super.organization_id,
+                     args['name'], args['purpose'])
         circle.super.name = args['name']
         circle.super.purpose = args['purpose']
         circle.strategy = args['strategy']
-        db.session.commit()
+        commit()
 
         data = {}
         data.update(circle.super.serialize)
         data.update(circle.serialize)
 
-        return data, 200
+        return data, 200, etag_headers(get_etag(circle.super, circle))
 
 
 class CircleRoles(Resource):
@@ -120,6 +164,7 @@ class CircleRoles(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def post(self,
              circle_id):
         """
@@ -156,11 +201,18 @@ class CircleRoles(Resource):
                          circle.super.id,
                          circle.super.organization_id)
         circle.roles.append(role)
+        db.session.flush()
+
+        closure.insert_role(role.id, circle.id)
+        search.insert('role', role.id, role.organization_id, role.name,
+                      role.purpose)
         db.session.commit()
 
         return role.serialize, 201
 
     @auth.login_required
+    @cached
+    @check_organization
     def get(self,
             circle_id):
         """
@@ -169,6 +221,11 @@ class CircleRoles(Resource):
         Request:
             GET /circles/{circle_id}/roles
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If roles of circle are listed
                 [
@@ -192,9 +249,14 @@ class CircleRoles(Resource):
         if circle is None:
             abort(404)
 
-        data = [i.serialize for i in circle.roles]
+        serializer = get_request_serializer(RoleModel)
+        roles, headers = paginate(db.session.query(
+            *serializer.columns).filter(
+            RoleModel.parent_circle_id == circle.id), RoleModel.id)
+
+        data = serializer.dump_rows(roles)
 
-        return data, 200
+        return data, 200, headers
 
 
 class CircleMembers(Resource):
@@ -203,6 +265,8 @@ class CircleMembers(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self,
             circle_id):
         """
@@ -215,6 +279,11 @@ class CircleMembers(Resource):
         Request:
             GET /circles/{circle_id}/members
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If members of circle are listed
                 [
@@ -241,9 +310,15 @@ class CircleMembers(Resource):
         if circle is None:
             abort(404)
 
-        data = [i.serialize for i in circle.super.members]
+        serializer = get_request_serializer(PartnerModel)
+        members, headers = paginate(db.session.query(
+            *serializer.columns).join(
+            role_member, role_member.c.partner_id == PartnerModel.id).filter(
+            role_member.c.role_id == circle.id), PartnerModel.id)
 
-        return data, 200
+        data = serializer.dump_rows(members)
+
+        return data, 200, headers
 
 
 class CircleMembersAssociation(Resource):
@@ -252,6 +327,7 @@ class CircleMembersAssociation(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def put(self,
             circle_id,
             partner_id):
@@ -260,6 +336,7 @@ class CircleMembersAssociation(Resource):
 
         In order to assign a partner to a circle, the authenticated user must
         be an admin of the organization that the circle is associated with.
+        Assigning a partner that is assigned already has no effect.
 
         Request:
             PUT /circles/{circle_id}/members/{partner_id}
@@ -287,14 +364,15 @@ class CircleMembersAssociation(Resource):
 
         if circle.super.organization_id != partner.organization_id:
             abort(409, 'Cannot assign a partner to a circle that is not '
-                       'associated with the partner\'s organization.')
+                       "associated with the partner's organization.")
 
-        circle.super.members.append(partner)
+        membership.add_member(circle.id, partner.id)
         db.session.commit()
 
         return None, 204
 
     @auth.login_required
+    @check_organization
     def delete(self,
                circle_id,
                partner_id):
@@ -327,7 +405,96 @@ class CircleMembersAssociation(Resource):
         if partner is None:
             abort(404)
 
-        circle.super.members.remove(partner)
+        membership.remove_member(circle.id, partner.id)
         db.session.commit()
 
         return None, 204
+
+
+class CircleDescendants(Resource):
+    """
+    Define the endpoints for the descendants edge of the circle node.
+
+    """
+    @auth.login_required
+    @cached
+    @check_organization
+    def get(self,
+            circle_id):
+        """
+        List all roles below a circle.
+
+        This endpoint lists the roles of the circle and of all circles below
+        it. The roles are read with a single query on the closure of the
+        circle hierarchy, regardless of its depth. The depth parameter limits
+        the number of levels below the circle.
+
+        Request:
+            GET /circles/{circle_id}/descendants?depth={depth}
+
+            Parameters:
+                depth (int): The number of levels to list (optional)
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
+        Response:
+            200 OK - If descendants of circle are listed
+                [
+                    {
+                        'id': 2,
+                        'type': 'circle|lead_link|secretary|custom',
+                        'name': 'Role\'s name',
+                        'purpose': 'Role\'s purpose',
+                        'parent_circle_id': 1,
+                        'organization_id': 1,
+                        'depth': 1
+                    }
+                ]
+            400 Bad Request - If token is not well-formed
+            400 Bad Request - If depth is negative
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If circle is not found
+
+        """
+        circle = CircleModel.query.get(circle_id)
+
+        if circle is None:
+            abort(404)
+
+        parser = reqparse.RequestParser()
+        parser.add_argument('depth', type=int, location='args')
+        args = parser.parse_args()
+
+        depth = args['depth']
+
+        if depth is not None and depth < 0:
+            abort(400, 'The depth must not be negative.')
+
+        fields = get_requested_fields(RoleModel, extra=('depth',))
+        serializer = select_serializer(RoleModel, fields)
+
+        query = db.session.query(
+            role_closure.c.descendant_id, role_closure.c.depth,
+            *serializer.columns).join(
+            RoleModel, RoleModel.id == role_closure.c.descendant_id).filter(
+            role_closure.c.ancestor_id == circle.id).filter(
+            role_closure.c.depth > 0)
+
+        if depth is not None:
+            query = query.filter(role_closure.c.depth <= depth)
+
+        rows, headers = paginate(query, role_closure.c.descendant_id)
+
+        data = []
+
+        for row in rows:
+            item = serializer.dump_row(row[2:])
+
+            if fields is None or 'depth' in fields:
+                item['depth'] = row.depth
+
+            data.append(item)
+
+        return data, 200, headers
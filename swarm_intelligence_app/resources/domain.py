@@ -4,7 +4,16 @@ Define the classes for the domain API.
 """
 from flask import abort
 from flask_restful import reqparse, Resource
+from swarm_intelligence_app.common import search
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.deletion import check_organization
+from swarm_intelligence_app.common.etag import check_if_match, commit, \
+    etag_headers, get_etag, is_not_modified
+from swarm_intelligence_app.common.expand import expand, \
+    get_expanded_etag, get_loader_options, get_requested_expansion
+from swarm_intelligence_app.common.pagination import paginate
+from swarm_intelligence_app.common.response_cache import cached
+from swarm_intelligence_app.common.serializer import get_request_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.domain import Domain as \
      DomainModel
@@ -17,6 +26,8 @@ class Domain(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self, domain_id):
         """
         Retrieve a domain.
@@ -24,6 +35,10 @@ class Domain(Resource):
         Request:
             GET /domains/{domain_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+                expand (string): The relationships to embed (optional)
+
         Response:
             200 OK - If domain is retrieved
                 {
@@ -31,20 +46,33 @@ class Domain(Resource):
                     'title': 'Domain\'s title'
                     'role_id': 99
                 }
+            304 Not Modified - If domain has not been modified
             400 Bad Request - If token is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If domain is not found
 
         """
-        domain = DomainModel.query.get(domain_id)
+        serializer = get_request_serializer(DomainModel)
+        expansion = get_requested_expansion(DomainModel)
+        domain = DomainModel.query.options(
+            serializer.load_only(),
+            *get_loader_options(DomainModel, expansion)).get(domain_id)
 
         if domain is None:
             abort(404)
 
-        return domain.serialize, 200
+        etag = get_expanded_etag(get_etag(domain), [domain], expansion)
+
+        if is_not_modified(etag):
+            return None, 304, etag_headers(etag)
+
+        data = expand(serializer.dump(domain), domain, expansion)
+
+        return data, 200, etag_headers(etag)
 
     @auth.login_required
+    @check_organization
     def put(self, domain_id):
         """
         Update a domain.
@@ -66,6 +94,7 @@ class Domain(Resource):
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If domain is not found
+            412 Precondition Failed - If domain has been modified
 
         """
         domain = DomainModel.query.get(domain_id)
@@ -73,16 +102,21 @@ class Domain(Resource):
         if domain is None:
             abort(404)
 
+        check_if_match(get_etag(domain))
+
         parser = reqparse.RequestParser(bundle_errors=True)
         parser.add_argument('title', required=True)
         args = parser.parse_args()
 
+        search.index('domain', domain.id, domain.role.organization_id,
+                     args['title'])
         domain.title = args['title']
-        db.session.commit()
+        commit()
 
-        return domain.serialize, 200
+        return domain.serialize, 200, etag_headers(get_etag(domain))
 
     @auth.login_required
+    @check_organization
     def delete(self, domain_id):
         """
         Delete a domain.
@@ -103,6 +137,7 @@ class Domain(Resource):
         if domain is None:
             abort(404)
 
+        search.remove_domains([domain.id])
         db.session.delete(domain)
         db.session.commit()
 
@@ -115,6 +150,8 @@ class DomainPolicies(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self, domain_id):
         """
         List of all policies of a domain.
@@ -122,6 +159,11 @@ class DomainPolicies(Resource):
         Request:
             GET /domains/{domain_id}/policies
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If policies of domain are listed
                 [
@@ -143,11 +185,17 @@ class DomainPolicies(Resource):
         if domain is None:
             abort(404)
 
-        data = [i.serialize for i in domain.policies]
+        serializer = get_request_serializer(PolicyModel)
+        policies, headers = paginate(db.session.query(
+            *serializer.columns).filter(
+            PolicyModel.domain_id == domain.id), PolicyModel.id)
+
+        data = serializer.dump_rows(policies)
 
-        return data, 200
+        return data, 200, headers
 
     @auth.login_required
+    @check_organization
     def post(self, domain_id):
         """
         Add a policy to a domain.
@@ -185,6 +233,10 @@ class DomainPolicies(Resource):
 
         policy = PolicyModel(args['title'], args['description'], domain.id)
         domain.policies.append(policy)
+        db.session.flush()
+
+        search.insert('policy', policy.id, domain.role.organization_id,
+                      policy.title, policy.description)
         db.session.commit()
 
         return policy.serialize, 201
@@ -4,7 +4,10 @@ Define the classes for the invitation API.
 """
 from flask import abort, g
 from flask_restful import Resource
+from swarm_intelligence_app.common import outbox
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.deletion import check_organization
+from swarm_intelligence_app.common.serializer import get_request_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.invitation import \
     Invitation as InvitationModel
@@ -19,6 +22,7 @@ class Invitation(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def get(self,
             invitation_id):
         """
@@ -31,6 +35,9 @@ class Invitation(Resource):
         Request:
             GET /invitations/{invitation_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If invitation is retrieved
                 {
@@ -46,12 +53,14 @@ class Invitation(Resource):
             404 Not Found - If invitation is not found
 
         """
-        invitation = InvitationModel.query.get(invitation_id)
+        serializer = get_request_serializer(InvitationModel)
+        invitation = InvitationModel.query.options(
+            serializer.load_only()).get(invitation_id)
 
         if invitation is None:
             abort(404)
 
-        return invitation.serialize, 200
+        return serializer.dump(invitation), 200
 
 
 class InvitationAccept(Resource):
@@ -60,6 +69,7 @@ class InvitationAccept(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def get(self,
             code):
         """
@@ -115,6 +125,7 @@ class InvitationCancel(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def put(self,
             invitation_id):
         """
@@ -167,7 +178,8 @@ class InvitationResend(Resource):
 
     """
     @auth.login_required
-    def get(self,
+    @check_organization
+    def put(self,
             invitation_id):
         """
         Resend an invitation.
@@ -178,5 +190,28 @@ class InvitationResend(Resource):
         order to resend an invitation, the authenticated user must be an admin
         of the organization that the invitation is associated with.
 
+        Request:
+            PUT /invitations/{invitation_id}/resend
+
+        Response:
+            204 No Content - If invitation is resent
+            400 Bad Request - If token is not well-formed
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If invitation is not found
+            409 Conflict - If status of invitation is not pending
+
         """
-        abort(501)
+        invitation = InvitationModel.query.get(invitation_id)
+
+        if invitation is None:
+            abort(404)
+
+        if invitation.status != InvitationStatus.pending:
+            abort(409, 'The invitation is not pending and cannot be resent.')
+
+        outbox.enqueue(invitation.email, *outbox.get_invitation_message(
+            invitation.organization.name, invitation.code))
+        db.session.commit()
+
+        return None, 204
@@ -0,0 +1,35 @@
+"""
+Define the classes for the monitoring API.
+
+"""
+from flask import make_response
+from flask_restful import Resource
+from swarm_intelligence_app.common.instrumentation import CONTENT_TYPE, \
+    expose
+
+
+class Metrics(Resource):
+    """
+    Define the endpoints for the metrics of the app.
+
+    """
+    def get(self):
+        """
+        Retrieve the metrics of the app.
+
+        This endpoint is meant to be scraped by Prometheus and is therefore
+        not authenticated. It should only be reachable from the internal
+        network.
+
+        Request:
+            GET /metrics
+
+        Response:
+            200 OK - If metrics are retrieved
+                # TYPE si_http_requests_total counter
+                si_http_requests_total{endpoint="/roles/<role_id>",...} 1
+
+        """
+        response = make_response(expose())
+        response.headers['Content-Type'] = CONTENT_TYPE
+        return response
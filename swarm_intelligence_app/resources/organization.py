@@ -2,19 +2,52 @@
 Define the classes for the organization API.
 
 """
-from flask import abort
+import csv
+import uuid
+
+from flask import abort, current_app, request, Response, \
+    stream_with_context
 from flask_restful import reqparse, Resource
+from sqlalchemy.exc import IntegrityError
+from swarm_intelligence_app.common import export
+from swarm_intelligence_app.common import membership
+from swarm_intelligence_app.common import outbox
+from swarm_intelligence_app.common import search
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.etag import check_if_match, commit, \
+    etag_headers, get_etag, is_not_modified
+from swarm_intelligence_app.common.expand import expand, \
+    get_expanded_etag, get_loader_options, get_requested_expansion
+from swarm_intelligence_app.common.pagination import paginate
+from swarm_intelligence_app.common.response_cache import cached
+from swarm_intelligence_app.common.serializer import get_request_serializer, \
+    get_requested_fields, select_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.circle import Circle as CircleModel
 from swarm_intelligence_app.models.invitation import \
     Invitation as InvitationModel
+from swarm_intelligence_app.models.invitation import InvitationStatus
 from swarm_intelligence_app.models.organization import \
     Organization as OrganizationModel
+from swarm_intelligence_app.models.organization_deletion import \
+    OrganizationDeletion as OrganizationDeletionModel
 from swarm_intelligence_app.models.partner import \
     Partner as PartnerModel
 from swarm_intelligence_app.models.partner import PartnerType
 from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.models.role_member import role_member
+
+
+def get_organization(organization_id):
+    """
+    Return the organization with the given id unless it is deleted.
+
+    """
+    return OrganizationModel.query.filter(
+        OrganizationModel.id == organization_id).filter(
+        db.not_(OrganizationModel.is_deleted)).first()
 
 
 class Organization(Resource):
@@ -23,6 +56,7 @@ class Organization(Resource):
 
     """
     @auth.login_required
+    @cached
     def get(self,
             organization_id):
         """
@@ -34,24 +68,43 @@ class Organization(Resource):
         Request:
             GET /organizations/{organization_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+                expand (string): The relationships to embed (optional)
+
         Response:
             200 OK - If organization is retrieved
                 {
                     'id': 1,
                     'name': 'My Company'
                 }
+            304 Not Modified - If organization has not been modified
             400 Bad Request - If token is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If organization is not found
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        serializer = get_request_serializer(OrganizationModel)
+        expansion = get_requested_expansion(OrganizationModel)
+        organization = OrganizationModel.query.options(
+            serializer.load_only(),
+            *get_loader_options(OrganizationModel, expansion)).filter(
+            OrganizationModel.id == organization_id).filter(
+            db.not_(OrganizationModel.is_deleted)).first()
 
         if organization is None:
             abort(404)
 
-        return organization.serialize, 200
+        etag = get_expanded_etag(get_etag(organization), [organization],
+                                 expansion)
+
+        if is_not_modified(etag):
+            return None, 304, etag_headers(etag)
+
+        data = expand(serializer.dump(organization), organization, expansion)
+
+        return data, 200, etag_headers(etag)
 
     @auth.login_required
     def put(self,
@@ -78,21 +131,25 @@ class Organization(Resource):
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If organization is not found
+            412 Precondition Failed - If organization has been modified
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        organization = get_organization(organization_id)
 
         if organization is None:
             abort(404)
 
+        check_if_match(get_etag(organization))
+
         parser = reqparse.RequestParser(bundle_errors=True)
         parser.add_argument('name', required=True)
         args = parser.parse_args()
 
         organization.name = args['name']
-        db.session.commit()
+        commit()
 
-        return organization.serialize, 200
+        return organization.serialize, 200, etag_headers(
+            get_etag(organization))
 
     @auth.login_required
     def delete(self,
@@ -101,9 +158,11 @@ class Organization(Resource):
         Delete an organization.
 
         This endpoint sets the organization's state to 'deleted', so that it
-        cannot be accessed by its members or admins in any way. In order to
-        delete an organization, the authenticated user must be an admin of the
-        organization.
+        cannot be accessed by its members or admins in any way. The rows of
+        the organization are deleted afterwards by a background job, whose
+        progress is available at /organizations/{organization_id}/deletion.
+        In order to delete an organization, the authenticated user must be an
+        admin of the organization.
 
         Request:
             DELETE /organizations/{organization_id}
@@ -116,23 +175,66 @@ class Organization(Resource):
             404 Not found - If organization is not found
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        organization = get_organization(organization_id)
 
         if organization is None:
             abort(404)
 
-        db.session.delete(organization)
+        organization.is_deleted = True
+        db.session.add(OrganizationDeletionModel(organization.id))
         db.session.commit()
 
         return None, 204
 
 
+class OrganizationDeletion(Resource):
+    """
+    Define the endpoints for the deletion edge of the organization node.
+
+    """
+    @auth.login_required
+    def get(self,
+            organization_id):
+        """
+        Retrieve the progress of the deletion of an organization.
+
+        The progress remains available after the rows of the organization
+        have been deleted.
+
+        Request:
+            GET /organizations/{organization_id}/deletion
+
+        Response:
+            200 OK - If deletion is retrieved
+                {
+                    'id': 1,
+                    'organization_id': 1,
+                    'status': 'pending',
+                    'step': 'roles',
+                    'deleted_rows': 1000
+                }
+            400 Bad Request - If token is not well-formed
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If organization has not been deleted
+
+        """
+        deletion = OrganizationDeletionModel.query.filter_by(
+            organization_id=organization_id).first()
+
+        if deletion is None:
+            abort(404)
+
+        return deletion.serialize, 200
+
+
 class OrganizationAnchorCircle(Resource):
     """
     Define the endpoints for the anchor circle edge of the organization node.
 
     """
     @auth.login_required
+    @cached
     def get(self,
             organization_id):
         """
@@ -146,6 +248,9 @@ class OrganizationAnchorCircle(Resource):
         Request:
             GET /organizations/{organization_id}/anchor_circle
 
+            Parameters:
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If organization's anchor circle is retrieved
                 {
@@ -163,7 +268,7 @@ class OrganizationAnchorCircle(Resource):
             404 Not Found - If organization is not found
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        organization = get_organization(organization_id)
 
         if organization is None:
             abort(404)
@@ -178,9 +283,9 @@ class OrganizationAnchorCircle(Resource):
         if role is None or circle is None:
             abort(404)
 
-        data = {}
-        data.update(role.serialize)
-        data.update(circle.serialize)
+        fields = get_requested_fields(RoleModel, CircleModel)
+        data = select_serializer(RoleModel, fields).dump(role)
+        data.update(select_serializer(CircleModel, fields).dump(circle))
 
         return data, 200
 
@@ -191,6 +296,7 @@ class OrganizationMembers(Resource):
 
     """
     @auth.login_required
+    @cached
     def get(self,
             organization_id):
         """
@@ -204,6 +310,11 @@ class OrganizationMembers(Resource):
         Request:
             GET /organizations/{organization_id}/members
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If members of organization are listed
                 [
@@ -225,14 +336,20 @@ class OrganizationMembers(Resource):
             404 Not Found - If organization is not found
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        organization = get_organization(organization_id)
 
         if organization is None:
             abort(404)
 
-        data = [i.serialize for i in organization.partners]
+        serializer = get_request_serializer(PartnerModel)
+        partners, headers = paginate(db.session.query(
+            *serializer.columns).filter(
+            PartnerModel.organization_id == organization.id),
+            PartnerModel.id)
 
-        return data, 200
+        data = serializer.dump_rows(partners)
+
+        return data, 200, headers
 
 
 class OrganizationAdmins(Resource):
@@ -241,6 +358,7 @@ class OrganizationAdmins(Resource):
 
     """
     @auth.login_required
+    @cached
     def get(self,
             organization_id):
         """
@@ -254,6 +372,11 @@ class OrganizationAdmins(Resource):
         Request:
             GET /organizations/{organization_id}/admins
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If admins of organization are listed
                 [
@@ -275,17 +398,20 @@ class OrganizationAdmins(Resource):
             404 Not Found - If organization is not found
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        organization = get_organization(organization_id)
 
         if organization is None:
             abort(404)
 
-        admins = PartnerModel.query.filter_by(organization=organization,
-                                              type=PartnerType.admin).all()
+        serializer = get_request_serializer(PartnerModel)
+        admins, headers = paginate(db.session.query(
+            *serializer.columns).filter(
+            PartnerModel.organization_id == organization.id).filter(
+            PartnerModel.type == PartnerType.admin), PartnerModel.id)
 
-        data = [i.serialize for i in admins]
+        data = serializer.dump_rows(admins)
 
-        return data, 200
+        return data, 200, headers
 
 
 class OrganizationInvitations(Resource):
@@ -303,8 +429,10 @@ class OrganizationInvitations(Resource):
         newly-created invitation will be in the 'pending' state until the user
         accepts the invitation. At this point the invitation will transition
         to the 'accepted' state and the user will be added as a new partner to
-        the organization. In order to invite a user to an organization, the
-        authenticated user must be an admin of the organization.
+        the organization. The email is written to the outbox in the same
+        transaction as the invitation and is sent by the outbox workers. In
+        order to invite a user to an organization, the authenticated user must
+        be an admin of the organization.
 
         Request:
             POST /organizations/{organization_id}/invitations
@@ -322,12 +450,13 @@ class OrganizationInvitations(Resource):
                     'organization_id': 1
                 }
             400 Bad Request - If token is not well-formed
+            400 Bad Request - If email address is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If organization is not found
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        organization = get_organization(organization_id)
 
         if organization is None:
             abort(404)
@@ -336,6 +465,9 @@ class OrganizationInvitations(Resource):
         parser.add_argument('email', required=True)
         args = parser.parse_args()
 
+        if not outbox.is_valid_email(args['email']):
+            abort(400, 'Cannot invite a user with an invalid email address.')
+
         invitation = InvitationModel(
             args['email'],
             organization.id
@@ -343,11 +475,14 @@ class OrganizationInvitations(Resource):
         organization.invitations.append(invitation)
 
         db.session.add(invitation)
+        outbox.enqueue(invitation.email, *outbox.get_invitation_message(
+            organization.name, invitation.code))
         db.session.commit()
 
         return invitation.serialize, 201
 
     @auth.login_required
+    @cached
     def get(self,
             organization_id):
         """
@@ -361,6 +496,11 @@ class OrganizationInvitations(Resource):
         Request:
             GET /organizations/{organization_id}/invitations
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If invitations to organization are listed
                 [
@@ -378,14 +518,548 @@ class OrganizationInvitations(Resource):
             404 Not Found - If organization is not found
 
         """
-        organization = OrganizationModel.query.get(organization_id)
+        organization = get_organization(organization_id)
 
         if organization is None:
             abort(404)
 
-        invitations = InvitationModel.query.filter_by(
-            organization_id=organization.id)
+        serializer = get_request_serializer(InvitationModel)
+        invitations, headers = paginate(db.session.query(
+            *serializer.columns).filter(
+            InvitationModel.organization_id == organization.id),
+            InvitationModel.id)
 
-        data = [i.serialize for i in invitations]
+        data = serializer.dump_rows(invitations)
 
-        return data, 200
+        return data, 200, headers
+
+
+def read_emails():
+    """
+    Return the email addresses of a bulk invitation request.
+
+    The addresses are either given as a JSON list in the 'emails' parameter
+    or as a CSV document, which is sent as the request's body or uploaded as
+    the 'file' form field. The CSV document is read line by line and the
+    first column of each line is taken as an address.
+
+    """
+    if request.mimetype == 'text/csv':
+        stream = request.stream
+    elif 'file' in request.files:
+        stream = request.files['file'].stream
+    else:
+        parser = reqparse.RequestParser(bundle_errors=True)
+        parser.add_argument('emails', type=list, location='json',
+                            required=True)
+        args = parser.parse_args()
+
+        if not all(isinstance(email, str) for email in args['emails']):
+            abort(400, 'Each email address must be a string.')
+
+        return args['emails']
+
+    lines = (line.decode('utf-8-sig') for line in stream)
+    emails = [row[0] for row in csv.reader(lines) if row]
+
+    if emails and emails[0].strip().lower() == 'email':
+        emails = emails[1:]
+
+    return emails
+
+
+class OrganizationInvitationsBulk(Resource):
+    """
+    Define the endpoints for the bulk edge of the invitations of an
+    organization.
+
+    """
+    chunk_size = 500
+
+    @auth.login_required
+    def post(self,
+             organization_id):
+        """
+        Invite many users to an organization.
+
+        This endpoint creates a 'pending' invitation for each given email
+        address. Addresses that are not well-formed, that appear more than
+        once, that already have a pending invitation to the organization or
+        that belong to a partner of the organization are skipped. The
+        existing invitations and partners are looked up with one query per
+        chunk of addresses. The invitations and their emails in the outbox are
+        inserted with one multi-row insert each. In order to invite users to
+        an organization, the authenticated user must be an admin of the
+        organization.
+
+        Request:
+            POST /organizations/{organization_id}/invitations/bulk
+
+            Parameters:
+                emails (list): The email addresses to invite
+
+            or a CSV document with one email address per line, sent as
+            'text/csv' or uploaded as the 'file' form field
+
+        Response:
+            201 Created - If invitations are processed
+                {
+                    'created': 1,
+                    'results': [
+                        {
+                            'email': 'john@example.org',
+                            'result': 'created|invalid|duplicate|pending|
+                             partner',
+                            'code': '12345678-1234-1234-1234-123456789012'
+                        }
+                    ]
+                }
+            400 Bad Request - If token is not well-formed
+            400 Bad Request - If no email addresses are given
+            400 Bad Request - If an email address is empty or not a string
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If organization is not found
+
+        """
+        organization = get_organization(organization_id)
+
+        if organization is None:
+            abort(404)
+
+        emails = [email.strip() for email in read_emails()]
+
+        if not emails:
+            abort(400, 'Cannot invite users without email addresses.')
+
+        if not all(emails):
+            abort(400, 'Cannot invite users with empty email addresses.')
+
+        normalized = {email.lower() for email in emails
+                      if outbox.is_valid_email(email)}
+        normalized = sorted(normalized)
+        existing = {}
+
+        for i in range(0, len(normalized), self.chunk_size):
+            chunk = normalized[i:i + self.chunk_size]
+
+            invitations = db.session.query(
+                db.literal('pending'), InvitationModel.email).filter(
+                InvitationModel.organization_id == organization.id).filter(
+                InvitationModel.status == InvitationStatus.pending).filter(
+                db.func.lower(InvitationModel.email).in_(chunk))
+            partners = db.session.query(
+                db.literal('partner'), PartnerModel.email).filter(
+                PartnerModel.organization_id == organization.id).filter(
+                db.func.lower(PartnerModel.email).in_(chunk))
+
+            for result, email in invitations.union_all(partners):
+                existing.setdefault(email.lower(), result)
+
+        results = []
+        rows = []
+        seen = set()
+
+        for email in emails:
+            key = email.lower()
+
+            if not outbox.is_valid_email(email):
+                results.append({'email': email, 'result': 'invalid'})
+            elif key in seen:
+                results.append({'email': email, 'result': 'duplicate'})
+            elif key in existing:
+                results.append({'email': email, 'result': existing[key]})
+            else:
+                code = str(uuid.uuid4())
+                rows.append({
+                    'code': code,
+                    'email': email,
+                    'status': InvitationStatus.pending,
+                    'organization_id': organization.id
+                })
+                results.append({'email': email, 'result': 'created',
+                                'code': code})
+
+            seen.add(key)
+
+        if rows:
+            try:
+                db.session.execute(InvitationModel.__table__.insert(), rows)
+                outbox.enqueue_invitations(organization.name, [
+                    (row['email'], row['code']) for row in rows])
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                abort(409, 'Cannot create the invitations.')
+
+        return {
+            'created': len(rows),
+            'results': results
+        }, 201
+
+
+class OrganizationTree(Resource):
+    """
+    Define the endpoints for the tree edge of the organization node.
+
+    """
+    @auth.login_required
+    @cached
+    def get(self,
+            organization_id):
+        """
+        Retrieve the circle hierarchy of an organization.
+
+        This endpoint retrieves the anchor circle of an organization with all
+        of its roles. The roles of each circle are nested in the circle. The
+        whole hierarchy is read with a single query on the closure of the
+        anchor circle. The depth parameter limits the number of levels below
+        the anchor circle. In order to retrieve the hierarchy of an
+        organization, the authenticated user must be a member or an admin of
+        the organization.
+
+        Request:
+            GET /organizations/{organization_id}/tree?depth={depth}
+
+            Parameters:
+                depth (int): The number of levels to retrieve (optional)
+
+        Response:
+            200 OK - If organization's hierarchy is retrieved
+                {
+                    'id': 1,
+                    'type': 'circle',
+                    'name': 'My Company',
+                    'purpose': 'My Company\'s purpose',
+                    'strategy': 'My Company\'s strategy',
+                    'parent_circle_id': null,
+                    'organization_id': 1,
+                    'roles': [
+                        {
+                            'id': 2,
+                            'type': 'lead_link',
+                            'name': 'Lead Link',
+                            'purpose': 'Lead Link\'s purpose',
+                            'parent_circle_id': 1,
+                            'organization_id': 1
+                        }
+                    ]
+                }
+            400 Bad Request - If token is not well-formed
+            400 Bad Request - If depth is negative
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If organization is not found
+
+        """
+        organization = get_organization(organization_id)
+
+        if organization is None:
+            abort(404)
+
+        parser = reqparse.RequestParser()
+        parser.add_argument('depth', type=int, location='args')
+        args = parser.parse_args()
+
+        depth = args['depth']
+
+        if depth is not None and depth < 0:
+            abort(400, 'The depth must not be negative.')
+
+        null_value = None
+        anchor_circle_id = db.select([RoleModel.id]).where(
+            RoleModel.organization_id == organization.id).where(
+            RoleModel.parent_circle_id == null_value).as_scalar()
+
+        rows = db.session.query(
+            RoleModel.id, RoleModel.type, RoleModel.name, RoleModel.purpose,
+            RoleModel.parent_circle_id, RoleModel.organization_id,
+            CircleModel.strategy).join(
+            role_closure, role_closure.c.descendant_id == RoleModel.id).filter(
+            role_closure.c.ancestor_id == anchor_circle_id).outerjoin(
+            CircleModel, CircleModel.id == RoleModel.id)
+
+        if depth is not None:
+            rows = rows.filter(role_closure.c.depth <= depth)
+
+        rows = rows.order_by(role_closure.c.depth, RoleModel.id)
+
+        anchor_circle = None
+        nodes = {}
+
+        for row in rows:
+            node = {
+                'id': row.id,
+                'type': row.type.value,
+                'name': row.name,
+                'purpose': row.purpose,
+                'parent_circle_id': row.parent_circle_id,
+                'organization_id': row.organization_id
+            }
+
+            if row.type == RoleType.circle:
+                node['strategy'] = row.strategy
+                node['roles'] = []
+
+            nodes[row.id] = node
+
+            if row.parent_circle_id is None:
+                anchor_circle = node
+            elif row.parent_circle_id in nodes:
+                nodes[row.parent_circle_id]['roles'].append(node)
+
+        if anchor_circle is None:
+            abort(404)
+
+        return anchor_circle, 200
+
+
+class OrganizationRoleMembers(Resource):
+    """
+    Define the endpoints for the role members edge of the organization node.
+
+    """
+    @auth.login_required
+    def post(self,
+             organization_id):
+        """
+        Assign partners to roles and unassign partners from roles in bulk.
+
+        This endpoint applies a list of operations in a single transaction.
+        Each operation assigns ('add') a partner to a role or unassigns
+        ('remove') a partner from a role. If the same partner and role appear
+        more than once, the last operation wins, and a partner that is
+        assigned already is skipped. All roles and partners must be
+        associated with the organization, which is validated with a single
+        query. In order to change role memberships, the authenticated user
+        must be an admin of the organization.
+
+        Request:
+            POST /organizations/{organization_id}/role_members
+
+            Parameters:
+                operations (list): The operations to apply
+                    [
+                        {
+                            'role_id': 1,
+                            'partner_id': 1,
+                            'action': 'add|remove'
+                        }
+                    ]
+
+        Response:
+            200 OK - If the operations are applied
+                {
+                    'added': 1,
+                    'removed': 0
+                }
+            400 Bad Request - If token is not well-formed
+            400 Bad Request - If an operation is not well-formed
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If organization is not found
+            409 Conflict - If a role or a partner is not associated with the
+                organization
+
+        """
+        organization = get_organization(organization_id)
+
+        if organization is None:
+            abort(404)
+
+        parser = reqparse.RequestParser(bundle_errors=True)
+        parser.add_argument('operations', type=list, location='json',
+                            required=True)
+        args = parser.parse_args()
+
+        actions = {}
+
+        for operation in args['operations']:
+            try:
+                pair = (int(operation['role_id']),
+                        int(operation['partner_id']))
+                action = operation['action']
+            except (KeyError, TypeError, ValueError):
+                abort(400, 'Each operation needs a role_id, a partner_id and '
+                           'an action.')
+
+            if action not in ('add', 'remove'):
+                abort(400, 'The action of an operation must be add or '
+                           'remove.')
+
+            actions[pair] = action
+
+        if not actions:
+            return {'added': 0, 'removed': 0}, 200
+
+        role_ids = {role_id for role_id, _ in actions}
+        partner_ids = {partner_id for _, partner_id in actions}
+
+        roles = db.session.query(
+            db.literal('role'), RoleModel.id).filter(
+            RoleModel.organization_id == organization.id).filter(
+            RoleModel.id.in_(role_ids))
+        partners = db.session.query(
+            db.literal('partner'), PartnerModel.id).filter(
+            PartnerModel.organization_id == organization.id).filter(
+            PartnerModel.id.in_(partner_ids))
+
+        found = {'role': set(), 'partner': set()}
+        for kind, id in roles.union_all(partners):
+            found[kind].add(id)
+
+        if found['role'] != role_ids or found['partner'] != partner_ids:
+            abort(409, 'Cannot assign a partner to a role that is not '
+                       'associated with the organization.')
+
+        adds = {pair for pair, action in actions.items() if action == 'add'}
+        removes = {pair for pair, action in actions.items()
+                   if action == 'remove'}
+
+        try:
+            added = 0
+            if adds:
+                added = db.session.execute(
+                    membership.insert_ignore(role_member), [
+                        {'role_id': role_id, 'partner_id': partner_id}
+                        for role_id, partner_id in sorted(adds)]).rowcount
+
+            removed = 0
+            if removes:
+                removed = db.session.execute(role_member.delete().where(
+                    db.tuple_(role_member.c.role_id,
+                              role_member.c.partner_id).in_(
+                        removes))).rowcount
+
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            abort(409, 'Cannot change the role memberships.')
+
+        return {'added': added, 'removed': removed}, 200
+
+
+class OrganizationSearch(Resource):
+    """
+    Define the endpoints for the search edge of the organization node.
+
+    """
+    @auth.login_required
+    @cached
+    def get(self,
+            organization_id):
+        """
+        Search the roles, accountabilities, domains and policies of an
+        organization.
+
+        An entity is found if its texts contain all words of the query. The
+        last word also matches longer words. The results are ordered by
+        their type, in the order role, accountability, domain and policy,
+        and by their id.
+
+        Request:
+            GET /organizations/{organization_id}/search?q={query}
+
+            Parameters:
+                q (string): The words to search for
+                limit (int): The maximum number of items (optional)
+
+        Response:
+            200 OK - If search is performed
+                [
+                    {
+                        'type': 'role|accountability|domain|policy',
+                        'id': 1,
+                        'title': 'Role\'s name'
+                    }
+                ]
+            400 Bad Request - If query contains no word
+            400 Bad Request - If query contains too many words
+            400 Bad Request - If token is not well-formed
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If organization is not found
+
+        """
+        organization = get_organization(organization_id)
+
+        if organization is None:
+            abort(404)
+
+        parser = reqparse.RequestParser()
+        parser.add_argument('q', default='', location='args')
+        parser.add_argument('limit', type=int, location='args')
+        args = parser.parse_args()
+
+        if not search.tokenize(args['q']):
+            abort(400, 'The query must contain a word.')
+
+        limit = args['limit']
+
+        if limit is None:
+            limit = current_app.config['SI_PAGE_SIZE']
+
+        if limit < 1:
+            abort(400, 'The limit must be a positive number.')
+
+        limit = min(limit, current_app.config['SI_PAGE_SIZE_MAX'])
+
+        try:
+            hits = search.search(organization.id, args['q'], limit)
+        except ValueError as e:
+            abort(400, str(e))
+
+        return search.get_titles(hits), 200
+
+
+class OrganizationExport(Resource):
+    """
+    Define the endpoints for the export edge of the organization node.
+
+    """
+    @auth.login_required
+    def get(self,
+            organization_id):
+        """
+        Export an organization.
+
+        The organization and its invitations, partners, roles, circles,
+        domains, policies, accountabilities and role members are streamed
+        as JSON lines while they are read, in chunks of
+        SI_EXPORT_CHUNK_SIZE rows. The export is compressed with gzip if
+        the client accepts it. In order to export an organization, the
+        authenticated user must be an admin of the organization.
+
+        Request:
+            GET /organizations/{organization_id}/export
+
+        Response:
+            200 OK - If organization is exported
+                {"type": "export", "data": {"version": 1, ...}}
+                {"type": "organization", "data": {"id": 1, ...}}
+                {"type": "partner", "data": {"id": 1, ...}}
+            400 Bad Request - If token is not well-formed
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If organization is not found
+
+        """
+        organization = get_organization(organization_id)
+
+        if organization is None:
+            abort(404)
+
+        chunks = export.export(organization.id,
+                               current_app.config['SI_EXPORT_CHUNK_SIZE'])
+        headers = {
+            'Content-Disposition': 'attachment; filename='
+                                   'organization-%d.ndjson' % organization.id,
+            'Vary': 'Accept-Encoding'
+        }
+
+        if request.accept_encodings['gzip'] > 0:
+            chunks = export.compress(chunks)
+            headers['Content-Encoding'] = 'gzip'
+
+        return Response(stream_with_context(chunks), 200, headers,
+                        mimetype='application/x-ndjson')
@@ -5,9 +5,18 @@ Define the classes for the partner API.
 from flask import abort
 from flask_restful import reqparse, Resource
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.deletion import check_organization
+from swarm_intelligence_app.common.etag import check_if_match, commit, \
+    etag_headers, get_etag, is_not_modified
+from swarm_intelligence_app.common.expand import expand, \
+    get_expanded_etag, get_loader_options, get_requested_expansion
+from swarm_intelligence_app.common.pagination import paginate
+from swarm_intelligence_app.common.serializer import get_request_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.partner import Partner as PartnerModel
 from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_member import role_member
 
 
 class Partner(Resource):
@@ -16,6 +25,7 @@ class Partner(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def get(self,
             partner_id):
         """
@@ -28,6 +38,10 @@ class Partner(Resource):
         Request:
             GET /partners/{partner_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+                expand (string): The relationships to embed (optional)
+
         Response:
             200 OK - If partner is retrieved
                 {
@@ -41,20 +55,33 @@ class Partner(Resource):
                     'organization_id': 1,
                     'invitation_id': null|1
                 }
+            304 Not Modified - If partner has not been modified
             400 Bad Request - If token is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If partner is not found
 
         """
-        partner = PartnerModel.query.get(partner_id)
+        serializer = get_request_serializer(PartnerModel)
+        expansion = get_requested_expansion(PartnerModel)
+        partner = PartnerModel.query.options(
+            serializer.load_only(),
+            *get_loader_options(PartnerModel, expansion)).get(partner_id)
 
         if partner is None:
             abort(404)
 
-        return partner.serialize, 200
+        etag = get_expanded_etag(get_etag(partner), [partner], expansion)
+
+        if is_not_modified(etag):
+            return None, 304, etag_headers(etag)
+
+        data = expand(serializer.dump(partner), partner, expansion)
+
+        return data, 200, etag_headers(etag)
 
     @auth.login_required
+    @check_organization
     def put(self,
             partner_id):
         """
@@ -88,6 +115,7 @@ class Partner(Resource):
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If partner is not found
+            412 Precondition Failed - If partner has been modified
 
         """
         partner = PartnerModel.query.get(partner_id)
@@ -95,6 +123,8 @@ class Partner(Resource):
         if partner is None:
             abort(404)
 
+        check_if_match(get_etag(partner))
+
         parser = reqparse.RequestParser(bundle_errors=True)
         parser.add_argument('firstname', required=True)
         parser.add_argument('lastname', required=True)
@@ -104,11 +134,12 @@ class Partner(Resource):
         partner.firstname = args['firstname']
         partner.lastname = args['lastname']
         partner.email = args['email']
-        db.session.commit()
+        commit()
 
-        return partner.serialize, 200
+        return partner.serialize, 200, etag_headers(get_etag(partner))
 
     @auth.login_required
+    @check_organization
     def delete(self,
                partner_id):
         """
@@ -156,6 +187,7 @@ class PartnerAdmin(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def put(self,
             partner_id):
         """
@@ -187,6 +219,7 @@ class PartnerAdmin(Resource):
         return None, 204
 
     @auth.login_required
+    @check_organization
     def delete(self,
                partner_id):
         """
@@ -234,6 +267,7 @@ class PartnerMemberships(Resource):
     Define the endpoints for the circles edge of the partner node.
 
     """
+    @check_organization
     def get(self,
             partner_id):
         """
@@ -246,6 +280,11 @@ class PartnerMemberships(Resource):
         Request:
             GET /partners/{partner_id}/memberships
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If memberships of partner are listed
                 [
@@ -271,9 +310,15 @@ class PartnerMemberships(Resource):
         if partner is None:
             abort(404)
 
-        data = [i.serialize for i in partner.memberships]
+        serializer = get_request_serializer(RoleModel)
+        memberships, headers = paginate(db.session.query(
+            *serializer.columns).join(
+            role_member, role_member.c.role_id == RoleModel.id).filter(
+            role_member.c.partner_id == partner.id), RoleModel.id)
+
+        data = serializer.dump_rows(memberships)
 
-        return data, 200
+        return data, 200, headers
 
 
 class PartnerMetrics(Resource):
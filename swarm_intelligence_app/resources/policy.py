@@ -4,7 +4,13 @@ Define the classes for the policy API.
 """
 from flask import abort
 from flask_restful import reqparse, Resource
+from swarm_intelligence_app.common import search
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.deletion import check_organization
+from swarm_intelligence_app.common.etag import check_if_match, commit, \
+    etag_headers, get_etag, is_not_modified
+from swarm_intelligence_app.common.response_cache import cached
+from swarm_intelligence_app.common.serializer import get_request_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.policy import Policy as \
      PolicyModel
@@ -16,6 +22,8 @@ class Policy(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self, policy_id):
         """
         Retrieve a policy.
@@ -23,6 +31,9 @@ class Policy(Resource):
         Request:
             GET /policies/{policy_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If policy is retrieved
                 {
@@ -30,20 +41,29 @@ class Policy(Resource):
                     'title': 'Policy\'s title'
                     'domain_id': 99
                 }
+            304 Not Modified - If policy has not been modified
             400 Bad Request - If token is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If policy is not found
 
         """
-        policy = PolicyModel.query.get(policy_id)
+        serializer = get_request_serializer(PolicyModel)
+        policy = PolicyModel.query.options(
+            serializer.load_only()).get(policy_id)
 
         if policy is None:
             abort(404)
 
-        return policy.serialize, 200
+        etag = get_etag(policy)
+
+        if is_not_modified(etag):
+            return None, 304, etag_headers(etag)
+
+        return serializer.dump(policy), 200, etag_headers(etag)
 
     @auth.login_required
+    @check_organization
     def put(self, policy_id):
         """
         Update a policy.
@@ -65,6 +85,7 @@ class Policy(Resource):
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If policy is not found
+            412 Precondition Failed - If policy has been modified
 
         """
         policy = PolicyModel.query.get(policy_id)
@@ -72,18 +93,24 @@ class Policy(Resource):
         if policy is None:
             abort(404)
 
+        check_if_match(get_etag(policy))
+
         parser = reqparse.RequestParser(bundle_errors=True)
         parser.add_argument('title', required=True)
         parser.add_argument('description', required=True)
         args = parser.parse_args()
 
+        search.index('policy', policy.id,
+                     policy.domain.role.organization_id, args['title'],
+                     args['description'])
         policy.title = args['title']
-        policy.description = args['descrition']
-        db.session.commit()
+        policy.description = args['description']
+        commit()
 
-        return policy.serialize, 200
+        return policy.serialize, 200, etag_headers(get_etag(policy))
 
     @auth.login_required
+    @check_organization
     def delete(self, policy_id):
         """
         Delete a policy.
@@ -104,6 +131,7 @@ class Policy(Resource):
         if policy is None:
             abort(404)
 
+        search.remove('policy', [policy.id])
         db.session.delete(policy)
         db.session.commit()
 
@@ -4,15 +4,29 @@ Define the classes for the role API.
 """
 from flask import abort
 from flask_restful import reqparse, Resource
+from swarm_intelligence_app.common import closure
+from swarm_intelligence_app.common import membership
+from swarm_intelligence_app.common import search
 from swarm_intelligence_app.common.authentication import auth
+from swarm_intelligence_app.common.bootstrap import bootstrap_circle
+from swarm_intelligence_app.common.deletion import check_organization
+from swarm_intelligence_app.common.etag import check_if_match, commit, \
+    etag_headers, get_etag, is_not_modified
+from swarm_intelligence_app.common.expand import expand, \
+    get_expanded_etag, get_loader_options, get_requested_expansion
+from swarm_intelligence_app.common.pagination import paginate
+from swarm_intelligence_app.common.response_cache import cached
+from swarm_intelligence_app.common.serializer import get_request_serializer, \
+    get_requested_fields, select_serializer
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models.accountability import Accountability as \
     AccountabilityModel
-from swarm_intelligence_app.models.circle import Circle as CircleModel
 from swarm_intelligence_app.models.domain import Domain as DomainModel
 from swarm_intelligence_app.models.partner import Partner as PartnerModel
 from swarm_intelligence_app.models.role import Role as RoleModel
 from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.models.role_member import role_member
 
 
 class Role(Resource):
@@ -21,6 +35,8 @@ class Role(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self, role_id):
         """
         Retrieve a role.
@@ -28,6 +44,10 @@ class Role(Resource):
         Request:
             GET /roles/{role_id}
 
+            Parameters:
+                fields (string): The fields to include (optional)
+                expand (string): The relationships to embed (optional)
+
         Response:
             200 OK - If role is retrieved
                 {
@@ -38,20 +58,33 @@ class Role(Resource):
                     'parent_circle_id': null|1,
                     'organization_id': 1
                 }
+            304 Not Modified - If role has not been modified
             400 Bad Request - If token is not well-formed
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If role is not found
 
         """
-        role = RoleModel.query.get(role_id)
+        serializer = get_request_serializer(RoleModel)
+        expansion = get_requested_expansion(RoleModel)
+        role = RoleModel.query.options(
+            serializer.load_only(),
+            *get_loader_options(RoleModel, expansion)).get(role_id)
 
         if role is None:
             abort(404)
 
-        return role.serialize, 200
+        etag = get_expanded_etag(get_etag(role), [role], expansion)
+
+        if is_not_modified(etag):
+            return None, 304, etag_headers(etag)
+
+        data = expand(serializer.dump(role), role, expansion)
+
+        return data, 200, etag_headers(etag)
 
     @auth.login_required
+    @check_organization
     def put(self, role_id):
         """
         Update a role.
@@ -77,6 +110,7 @@ class Role(Resource):
             401 Unauthorized - If token has expired
             401 Unauthorized - If user is not authorized
             404 Not Found - If role is not found
+            412 Precondition Failed - If role has been modified
 
         """
         role = RoleModel.query.get(role_id)
@@ -84,18 +118,23 @@ class Role(Resource):
         if role is None:
             abort(404)
 
+        check_if_match(get_etag(role))
+
         parser = reqparse.RequestParser(bundle_errors=True)
         parser.add_argument('name', required=True)
         parser.add_argument('purpose', required=True)
         args = parser.parse_args()
 
+        search.index('role', role.id, role.organization_id, args['name'],
+                     args['purpose'])
         role.name = args['name']
         role.purpose = args['purpose']
-        db.session.commit()
+        commit()
 
-        return role.serialize, 200
+        return role.serialize, 200, etag_headers(get_etag(role))
 
     @auth.login_required
+    @check_organization
     def delete(self, role_id):
         """
         Delete a role.
@@ -128,6 +167,8 @@ class Role(Resource):
             abort(409, 'The anchor circle of an organization cannot be '
                        'deleted.')
 
+        search.remove_roles([role.id])
+        closure.delete_descendants(role.id)
         db.session.delete(role)
         db.session.commit()
 
@@ -139,6 +180,8 @@ class RoleMembers(Resource):
     Define the endpoints for the members edge of the role node.
 
     """
+    @cached
+    @check_organization
     def get(self,
             role_id):
         """
@@ -147,6 +190,11 @@ class RoleMembers(Resource):
         Request:
             GET /roles/{role_id}/members
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If members of role are listed
                 [
@@ -173,9 +221,15 @@ class RoleMembers(Resource):
         if role is None:
             abort(404)
 
-        data = [i.serialize for i in role.members]
+        serializer = get_request_serializer(PartnerModel)
+        members, headers = paginate(db.session.query(
+            *serializer.columns).join(
+            role_member, role_member.c.partner_id == PartnerModel.id).filter(
+            role_member.c.role_id == role.id), PartnerModel.id)
 
-        return data, 200
+        data = serializer.dump_rows(members)
+
+        return data, 200, headers
 
 
 class RoleMembersAssociation(Resource):
@@ -183,12 +237,15 @@ class RoleMembersAssociation(Resource):
     Define the endpoints for the members association edge of the role node.
 
     """
+    @check_organization
     def put(self,
             role_id,
             partner_id):
         """
         Assign a partner to a role.
 
+        Assigning a partner that is assigned already has no effect.
+
         Request:
             PUT /roles/{role_id}/members/{partner_id}
 
@@ -215,13 +272,14 @@ class RoleMembersAssociation(Resource):
 
         if role.organization_id != partner.organization_id:
             abort(409, 'Cannot assign a partner to a role that is not '
-                       'associated with the partner\'s organization.')
+                       "associated with the partner's organization.")
 
-        role.members.append(partner)
+        membership.add_member(role.id, partner.id)
         db.session.commit()
 
         return None, 204
 
+    @check_organization
     def delete(self,
                role_id,
                partner_id):
@@ -250,7 +308,7 @@ class RoleMembersAssociation(Resource):
         if partner is None:
             abort(404)
 
-        role.members.remove(partner)
+        membership.remove_member(role.id, partner.id)
         db.session.commit()
 
         return None, 204
@@ -262,6 +320,8 @@ class RoleDomains(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self, role_id):
         """
         List all domains of a role.
@@ -269,6 +329,11 @@ class RoleDomains(Resource):
         Request:
             GET /roles/{role_id}/domains
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If domains of role are listed
                 [
@@ -289,11 +354,17 @@ class RoleDomains(Resource):
         if role is None:
             abort(404)
 
-        data = [i.serialize for i in role.domains]
+        serializer = get_request_serializer(DomainModel)
+        domains, headers = paginate(db.session.query(
+            *serializer.columns).filter(
+            DomainModel.role_id == role.id), DomainModel.id)
 
-        return data, 200
+        data = serializer.dump_rows(domains)
+
+        return data, 200, headers
 
     @auth.login_required
+    @check_organization
     def post(self, role_id):
         """
         Add a domain to a role.
@@ -329,6 +400,10 @@ class RoleDomains(Resource):
         domain = DomainModel(args['title'], role.id)
 
         role.domains.append(domain)
+        db.session.flush()
+
+        search.insert('domain', domain.id, role.organization_id,
+                      domain.title)
         db.session.commit()
 
         return domain.serialize, 200
@@ -340,6 +415,8 @@ class RoleAccountabilities(Resource):
 
     """
     @auth.login_required
+    @cached
+    @check_organization
     def get(self, role_id):
         """
         List all accountabilities of a role.
@@ -347,6 +424,11 @@ class RoleAccountabilities(Resource):
         Request:
             GET /roles/{role_id}/accountabilities
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If accountabilities of role are listed
                 [
@@ -367,11 +449,17 @@ class RoleAccountabilities(Resource):
         if role is None:
             abort(404)
 
-        data = [i.serialize for i in role.accountabilities]
+        serializer = get_request_serializer(AccountabilityModel)
+        accountabilities, headers = paginate(db.session.query(
+            *serializer.columns).filter(
+            AccountabilityModel.role_id == role.id), AccountabilityModel.id)
 
-        return data, 200
+        data = serializer.dump_rows(accountabilities)
+
+        return data, 200, headers
 
     @auth.login_required
+    @check_organization
     def post(self, role_id):
         """
         Add a accountability to a role.
@@ -407,6 +495,10 @@ class RoleAccountabilities(Resource):
         accountability = AccountabilityModel(args['title'], role.id)
 
         role.accountabilities.append(accountability)
+        db.session.flush()
+
+        search.insert('accountability', accountability.id,
+                      role.organization_id, accountability.title)
         db.session.commit()
 
         return accountability.serialize, 201
@@ -418,6 +510,7 @@ class RoleCircle(Resource):
 
     """
     @auth.login_required
+    @check_organization
     def put(self,
             role_id):
         """
@@ -445,26 +538,7 @@ class RoleCircle(Resource):
         elif role.type == RoleType.custom:
             try:
                 role.type = RoleType.circle
-
-                circle = CircleModel(role.id, None)
-                db.session.add(circle)
-                db.session.flush()
-
-                lead_link = RoleModel(RoleType.lead_link, 'Lead Link',
-                                      'Lead Link\'s Purpose', role.id,
-                                      role.organization_id)
-                db.session.add(lead_link)
-
-                secretary = RoleModel(RoleType.secretary, 'Secretary',
-                                      'Secretary\'s Purpose', role.id,
-                                      role.organization_id)
-                db.session.add(secretary)
-
-                facilitator = RoleModel(RoleType.facilitator, 'Facilitator',
-                                        'Facilitator\'s Purpose', role.id,
-                                        role.organization_id)
-                db.session.add(facilitator)
-
+                bootstrap_circle(role.id, role.organization_id)
                 db.session.commit()
             except:
                 db.session.rollback()
@@ -476,6 +550,7 @@ class RoleCircle(Resource):
         return None, 204
 
     @auth.login_required
+    @check_organization
     def delete(self,
                role_id):
         """
@@ -510,6 +585,11 @@ class RoleCircle(Resource):
         try:
             role.type = RoleType.custom
 
+            search.remove_roles(db.select([
+                role_closure.c.descendant_id]).where(
+                role_closure.c.ancestor_id == role.id).where(
+                role_closure.c.depth > 0))
+            closure.delete_descendants(role.id, include_self=False)
             db.session.delete(role.derived_circle)
             db.session.commit()
         except:
@@ -517,3 +597,72 @@ class RoleCircle(Resource):
             abort(409, 'Cannot remove circle properties from this role.')
 
         return None, 204
+
+
+class RoleAncestors(Resource):
+    """
+    Define the endpoints for the ancestors edge of the role node.
+
+    """
+    @auth.login_required
+    @cached
+    @check_organization
+    def get(self,
+            role_id):
+        """
+        List the ancestor circles of a role.
+
+        The circles are ordered from the parent circle of the role up to the
+        anchor circle of the organization. They are read with a single query
+        on the closure of the circle hierarchy, regardless of its depth.
+
+        Request:
+            GET /roles/{role_id}/ancestors
+
+            Parameters:
+                fields (string): The fields to include (optional)
+
+        Response:
+            200 OK - If ancestors of role are listed
+                [
+                    {
+                        'id': 1,
+                        'type': 'circle',
+                        'name': 'Circle\'s name',
+                        'purpose': 'Circle\'s purpose',
+                        'parent_circle_id': null|1,
+                        'organization_id': 1,
+                        'depth': 1
+                    }
+                ]
+            400 Bad Request - If token is not well-formed
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            404 Not Found - If role is not found
+
+        """
+        role = RoleModel.query.get(role_id)
+
+        if role is None:
+            abort(404)
+
+        fields = get_requested_fields(RoleModel, extra=('depth',))
+        serializer = select_serializer(RoleModel, fields)
+
+        rows = db.session.query(
+            role_closure.c.depth, *serializer.columns).join(
+            role_closure, role_closure.c.ancestor_id == RoleModel.id).filter(
+            role_closure.c.descendant_id == role.id).filter(
+            role_closure.c.depth > 0).order_by(role_closure.c.depth)
+
+        data = []
+
+        for row in rows:
+            item = serializer.dump_row(row[1:])
+
+            if fields is None or 'depth' in fields:
+                item['depth'] = row.depth
+
+            data.append(item)
+
+        return data, 200
@@ -2,24 +2,30 @@
 Define the classes for the user API.
 
 """
+import gzip
+import io
+import logging
 from datetime import datetime, timedelta
 
 import jwt
-import requests
 
-from flask import abort, current_app, g
+from flask import abort, current_app, g, request
 from flask_restful import reqparse, Resource
-from swarm_intelligence_app.common.authentication import auth
+from sqlalchemy.exc import SQLAlchemyError
+from swarm_intelligence_app.common.authentication import auth, \
+    invalidate_user
+from swarm_intelligence_app.common.bootstrap import bootstrap_organization
+from swarm_intelligence_app.common.google import verify_google_token
+from swarm_intelligence_app.common.importer import import_organization
+from swarm_intelligence_app.common.pagination import paginate
+from swarm_intelligence_app.common.serializer import get_request_serializer
 from swarm_intelligence_app.models import db
-from swarm_intelligence_app.models.circle import Circle as CircleModel
 from swarm_intelligence_app.models.organization import Organization as \
     OrganizationModel
-from swarm_intelligence_app.models.partner import Partner as PartnerModel
-from swarm_intelligence_app.models.partner import PartnerType
-from swarm_intelligence_app.models.role import Role as RoleModel
-from swarm_intelligence_app.models.role import RoleType
 from swarm_intelligence_app.models.user import User as UserModel
 
+logger = logging.getLogger(__name__)
+
 mock_users = {
     'mock_user_001': {
         'sub': 'mock_user_001',
@@ -87,15 +93,9 @@ class UserRegistration(Resource):
         elif credentials[1] == 'mock_user_002':
             data = mock_users['mock_user_002']
         else:
-            response = requests.get('https://www.googleapis.com/oauth2/v3/'
-                                    'tokeninfo?id_token=' + credentials[1])
-
-            if response.status_code != 200:
-                abort(401)
+            data = verify_google_token(credentials[1])
 
-            data = response.json()
-            if data['aud'] != '806916571874-7tnsbrr22526ioo36l8njtqj2st8nn54' \
-                              '.apps.googleusercontent.com':
+            if data is None:
                 abort(401)
 
         user = UserModel.query.filter_by(google_id=data['sub']).first()
@@ -169,15 +169,9 @@ class UserLogin(Resource):
         elif credentials[1] == 'mock_user_002':
             data = mock_users['mock_user_002']
         else:
-            response = requests.get('https://www.googleapis.com/oauth2/v3/'
-                                    'tokeninfo?id_token=' + credentials[1])
+            data = verify_google_token(credentials[1])
 
-            if response.status_code != 200:
-                abort(401)
-
-            data = response.json()
-            if data['aud'] != '806916571874-7tnsbrr22526ioo36l8njtqj2st8nn54' \
-                              '.apps.googleusercontent.com':
+            if data is None:
                 abort(401)
 
         user = UserModel.query.filter_by(
@@ -213,6 +207,9 @@ class User(Resource):
         Request:
             GET /me
 
+            Parameters:
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If user is retrieved
                 {
@@ -228,7 +225,7 @@ class User(Resource):
             401 Unauthorized - If user is not authorized
 
         """
-        return g.user.serialize, 200
+        return get_request_serializer(UserModel).dump(g.user), 200
 
     @auth.login_required
     def put(self):
@@ -268,6 +265,7 @@ class User(Resource):
         g.user.lastname = args['lastname']
         g.user.email = args['email']
         db.session.commit()
+        invalidate_user(g.user.google_id)
 
         return g.user.serialize, 200
 
@@ -297,6 +295,7 @@ class User(Resource):
             partner.is_active = False
 
         db.session.commit()
+        invalidate_user(g.user.google_id)
 
         return None, 204
 
@@ -313,7 +312,8 @@ class UserOrganizations(Resource):
         Create an organization.
 
         This endpoint creates a new organization with an anchor circle and
-        adds the authenticated user as an admin to the organization.
+        adds the authenticated user as an admin to the organization. The
+        whole structure is created with one statement per table.
 
         Request:
             POST /me/organizations
@@ -338,50 +338,13 @@ class UserOrganizations(Resource):
         args = parser.parse_args()
 
         try:
-            organization = OrganizationModel(args['name'])
-
-            partner = PartnerModel(PartnerType.admin, g.user.firstname,
-                                   g.user.lastname, g.user.email,
-                                   g.user, organization)
-            db.session.add(partner)
-            db.session.flush()
-
-            role = RoleModel(RoleType.circle, 'General', 'General\'s Purpose',
-                             None, organization.id)
-            db.session.add(role)
-            db.session.flush()
-
-            circle = CircleModel(role.id, None)
-            db.session.add(circle)
-            db.session.flush()
-
-            lead_link = RoleModel(RoleType.lead_link, 'Lead Link',
-                                  'Lead Link\'s Purpose', role.id,
-                                  role.organization_id)
-            db.session.add(lead_link)
-            db.session.flush()
-
-            secretary = RoleModel(RoleType.secretary, 'Secretary',
-                                  'Secretary\'s Purpose', role.id,
-                                  role.organization_id)
-            db.session.add(secretary)
-            db.session.flush()
-
-            facilitator = RoleModel(RoleType.facilitator, 'Facilitator',
-                                    'Facilitator\'s Purpose', role.id,
-                                    role.organization_id)
-            db.session.add(facilitator)
-            db.session.flush()
-
-            partner.memberships.append(role)
-            partner.memberships.append(lead_link)
-
+            organization = bootstrap_organization(args['name'], g.user)
             db.session.commit()
-        except:
+        except SQLAlchemyError:
             db.session.rollback()
             abort(409)
 
-        return organization.serialize, 201
+        return organization, 201
 
     @auth.login_required
     def get(self):
@@ -394,6 +357,11 @@ class UserOrganizations(Resource):
         Request:
             GET /me/organizations
 
+            Parameters:
+                limit (int): The maximum number of items (optional)
+                after (int): The id after which the page starts (optional)
+                fields (string): The fields to include (optional)
+
         Response:
             200 OK - If organizations of user are listed
                 [
@@ -407,9 +375,95 @@ class UserOrganizations(Resource):
             401 Unauthorized - If user is not authorized
 
         """
-        organizations = db.session.query(OrganizationModel).filter(
-            OrganizationModel.partners.any(is_active=True, user=g.user))
+        serializer = get_request_serializer(OrganizationModel)
+        organizations, headers = paginate(
+            db.session.query(*serializer.columns).filter(
+                OrganizationModel.partners.any(is_active=True,
+                                               user=g.user)).filter(
+                db.not_(OrganizationModel.is_deleted)),
+            OrganizationModel.id)
+
+        data = serializer.dump_rows(organizations)
 
-        data = [item.serialize for item in organizations]
+        return data, 200, headers
 
-        return data, 200
+
+class UserOrganizationsImport(Resource):
+    """
+    Define the endpoints for the import edge of the organizations of the
+    user node.
+
+    """
+    @auth.login_required
+    def post(self):
+        """
+        Import an organization.
+
+        This endpoint creates a new organization from an export of an
+        organization, which is read as a stream of JSON lines. The rows are
+        inserted with new ids in batches of SI_IMPORT_BATCH_SIZE rows and
+        committed every SI_IMPORT_CHECKPOINT rows. The organization is only
+        listed once it is imported completely. Users are neither created nor
+        matched: the partner with the email address of the authenticated
+        user becomes the user's partner, and every other partner is invited
+        to the organization by its email address. The authenticated user is
+        added as an admin if there is no such partner.
+
+        Request:
+            POST /me/organizations/import
+
+            Parameters:
+                name (string): The name of the organization (optional)
+
+            with an export as 'application/x-ndjson', which may be sent
+            with 'Content-Encoding: gzip'
+
+        Response:
+            201 Created - If organization is imported
+                {
+                    'id': 1,
+                    'name': 'My Company',
+                    'rows': {
+                        'organization': 1,
+                        'partner': 1,
+                        'role': 5
+                    }
+                }
+            400 Bad Request - If export is not well-formed
+            400 Bad Request - If token is not well-formed
+            401 Unauthorized - If token has expired
+            401 Unauthorized - If user is not authorized
+            409 Conflict - If organization cannot be imported
+
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('name', location='args')
+        args = parser.parse_args()
+
+        stream = request.stream
+
+        if request.headers.get('Content-Encoding') == 'gzip':
+            stream = gzip.GzipFile(fileobj=stream)
+
+        lines = io.TextIOWrapper(stream, encoding='utf-8')
+
+        try:
+            organization_id, rows = import_organization(
+                lines, current_app.config['SI_IMPORT_BATCH_SIZE'],
+                current_app.config['SI_IMPORT_CHECKPOINT'], args['name'],
+                g.user)
+        except (OSError, UnicodeDecodeError):
+            abort(400, 'The export is not well-formed.')
+        except ValueError as error:
+            abort(400, str(error))
+        except SQLAlchemyError:
+            logger.exception('Cannot import an organization.')
+            abort(409, 'Cannot import the organization.')
+
+        organization = OrganizationModel.query.get(organization_id)
+
+        return {
+            'id': organization.id,
+            'name': organization.name,
+            'rows': rows
+        }, 201
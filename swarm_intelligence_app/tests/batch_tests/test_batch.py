@@ -0,0 +1,175 @@
+"""
+Test the batch api-functionality.
+
+"""
+import json
+
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestBatch:
+    """
+    Class for testing the batch api-functionality.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_batch(self, client):
+        """
+        Test the endpoint /batch.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+
+        self.post_batch(client, headers, id)
+        self.post_transaction(client, headers, id)
+        self.post_failed_transaction(client, headers, id)
+        self.post_invalid_batch(client, headers)
+
+    def test_batch_cache(self, client):
+        """
+        Test if the sub-requests of a transaction bypass the response cache.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_RESPONSE_CACHE'] = 'local'
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        url = '/organizations/' + str(client.get(
+            '/me/organizations', headers=headers).json[0]['id'])
+        old = client.get(url, headers=headers)
+
+        requests = [
+            {'method': 'PUT', 'path': url, 'body': {'name': 'New'}},
+            {'method': 'GET', 'path': url}
+        ]
+
+        response = self.post(client, headers, {'transaction': True,
+                                               'requests': requests})
+        assert response.status == '200 OK'
+        assert response.json[1]['body']['name'] == 'New'
+        assert response.json[1]['headers']['ETag'] != old.headers['ETag']
+
+        # uncommitted state is not cached for other requests
+        requests = [
+            {'method': 'PUT', 'path': url, 'body': {'name': 'Rolled Back'}},
+            {'method': 'GET', 'path': url},
+            {'method': 'GET', 'path': '/organizations/0'}
+        ]
+
+        response = self.post(client, headers, {'transaction': True,
+                                               'requests': requests})
+        assert response.status == '409 CONFLICT'
+        assert response.json[1]['body']['name'] == 'Rolled Back'
+        assert client.get(url, headers=headers).json['name'] == 'New'
+
+    def post_batch(self, client, headers, id):
+        """
+        Test if sub-requests are handled in order.
+
+        """
+        response = self.post(client, headers, {'requests': [
+            {'method': 'GET', 'path': '/organizations/' + id},
+            {'method': 'PUT', 'path': '/organizations/' + id,
+             'body': {'name': 'Tolli Empire'}},
+            {'method': 'GET', 'path': '/organizations/' + id},
+            {'method': 'GET', 'path': '/organizations/0'},
+            {'method': 'GET',
+             'path': '/organizations/%s/members?limit=1' % id}
+        ]})
+        assert response.status == '200 OK'
+
+        results = response.json
+        assert [i['status'] for i in results] == [200, 200, 200, 404, 200]
+        assert results[2]['body']['name'] == 'Tolli Empire'
+        assert results[0]['headers']['ETag'] != \
+            results[2]['headers']['ETag']
+        assert len(results[4]['body']) == 1
+
+    def post_transaction(self, client, headers, id):
+        """
+        Test if the sub-requests of a transaction are committed.
+
+        """
+        circle_id = str(client.get('/organizations/' + id + '/anchor_circle',
+                                   headers=headers).json['id'])
+
+        requests = [
+            {'method': 'POST', 'path': '/circles/' + circle_id + '/roles',
+             'body': {'name': 'Role 1', 'purpose': 'Purpose'}},
+            {'method': 'POST', 'path': '/circles/' + circle_id + '/roles',
+             'body': {'name': 'Role 2', 'purpose': 'Purpose'}}
+        ]
+
+        response = self.post(client, headers, {'transaction': True,
+                                               'requests': requests})
+        assert response.status == '200 OK'
+        assert [i['status'] for i in response.json] == [201, 201]
+
+        names = [i['name'] for i in client.get(
+            '/circles/' + circle_id + '/roles', headers=headers).json]
+        assert 'Role 1' in names and 'Role 2' in names
+
+    def post_failed_transaction(self, client, headers, id):
+        """
+        Test if a failed sub-request rolls back the whole transaction.
+
+        """
+        requests = [
+            {'method': 'PUT', 'path': '/organizations/' + id,
+             'body': {'name': 'Rolled Back'}},
+            {'method': 'GET', 'path': '/organizations/0'},
+            {'method': 'GET', 'path': '/organizations/' + id}
+        ]
+
+        response = self.post(client, headers, {'transaction': True,
+                                               'requests': requests})
+        assert response.status == '409 CONFLICT'
+        assert [i['status'] for i in response.json] == [200, 404]
+
+        assert client.get('/organizations/' + id,
+                          headers=headers).json['name'] == 'Tolli Empire'
+
+    def post_invalid_batch(self, client, headers):
+        """
+        Test if malformed batches are rejected.
+
+        """
+        for requests in ([{'path': '/me'}],
+                         [{'method': 'PATCH', 'path': '/me'}],
+                         [{'method': 'GET', 'path': 'me'}],
+                         [{'method': 'POST', 'path': '/batch'}],
+                         [{'method': 'GET', 'path': '/me'}] * 51):
+            assert self.post(client, headers, {
+                'requests': requests}).status == '400 BAD REQUEST'
+
+        assert self.post(client, headers, {
+            'transaction': 'maybe',
+            'requests': [{'method': 'GET', 'path': '/me'}]
+        }).status == '400 BAD REQUEST'
+
+    def post(self, client, headers, data):
+        """
+        Post a batch.
+
+        """
+        return client.post('/batch', headers=headers, data=json.dumps(data),
+                           content_type='application/json')
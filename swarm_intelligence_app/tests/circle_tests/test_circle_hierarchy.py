@@ -0,0 +1,123 @@
+"""
+Test the closure of the circle hierarchy.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.common import closure
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestCircleHierarchy:
+    """
+    Class for testing the descendants and ancestors edges.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_hierarchy(self, client):
+        """
+        Test if the closure follows changes of the hierarchy.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        anchor_id = client.get('/organizations/' + id + '/anchor_circle',
+                               headers=headers).json['id']
+
+        circle_id = self.add_circle(client, headers, anchor_id)
+        sub_circle_id = self.add_circle(client, headers, circle_id)
+        role_id = self.add_role(client, headers, sub_circle_id)
+        self.check_closure(client)
+
+        url = '/circles/%s/descendants' % anchor_id
+        descendants = client.get(url, headers=headers).json
+        assert len(descendants) == 12
+        assert {'id': role_id, 'depth': 3} in [
+            {'id': i['id'], 'depth': i['depth']} for i in descendants]
+
+        assert len(client.get(url + '?depth=1', headers=headers).json) == 4
+        assert client.get(url + '?depth=-1',
+                          headers=headers).status == '400 BAD REQUEST'
+
+        response = client.get(url + '?limit=5', headers=headers)
+        assert [i['id'] for i in response.json] == \
+            [i['id'] for i in descendants[:5]]
+        assert response.headers['X-Next-Cursor'] == \
+            str(descendants[4]['id'])
+
+        ancestors = client.get('/roles/%s/ancestors' % role_id,
+                               headers=headers).json
+        assert [(i['id'], i['depth']) for i in ancestors] == [
+            (sub_circle_id, 1), (circle_id, 2), (anchor_id, 3)]
+
+        # the tree of the organization is read from the closure
+        def find(node, role_id):
+            return next(i for i in node['roles'] if i['id'] == role_id)
+
+        url = '/organizations/' + id + '/tree'
+        tree = client.get(url, headers=headers).json
+        sub_circle = find(find(tree, circle_id), sub_circle_id)
+        assert find(sub_circle, role_id)['type'] == 'custom'
+        assert len(sub_circle['roles']) == 4
+
+        tree = client.get(url + '?depth=2', headers=headers).json
+        assert find(find(tree, circle_id), sub_circle_id)['roles'] == []
+
+        assert client.delete('/roles/%s' % role_id,
+                             headers=headers).status == '204 NO CONTENT'
+        self.check_closure(client)
+
+        assert client.delete('/roles/%s/circle' % circle_id,
+                             headers=headers).status == '204 NO CONTENT'
+        self.check_closure(client)
+        assert client.get('/circles/%s/descendants' % anchor_id,
+                          headers=headers).json[-1]['id'] == circle_id
+
+        assert client.delete('/organizations/' + id,
+                             headers=headers).status == '204 NO CONTENT'
+        self.check_closure(client)
+
+    def add_role(self, client, headers, circle_id):
+        """
+        Add a custom role to a circle.
+
+        """
+        response = client.post('/circles/%s/roles' % circle_id,
+                               headers=headers,
+                               data={'name': 'Role', 'purpose': 'Purpose'})
+        assert response.status == '201 CREATED'
+        return response.json['id']
+
+    def add_circle(self, client, headers, circle_id):
+        """
+        Add a sub circle to a circle.
+
+        """
+        role_id = self.add_role(client, headers, circle_id)
+        assert client.put('/roles/%s/circle' % role_id,
+                          headers=headers).status == '204 NO CONTENT'
+        return role_id
+
+    def check_closure(self, client):
+        """
+        Compare the closure with a rebuilt closure.
+
+        """
+        with client.application.app_context():
+            rows = set(db.session.execute(role_closure.select()))
+            closure.rebuild()
+            assert set(db.session.execute(role_closure.select())) == rows
+            db.session.rollback()
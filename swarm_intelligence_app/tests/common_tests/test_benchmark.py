@@ -0,0 +1,74 @@
+"""
+Test the benchmark suite of the API.
+
+"""
+import argparse
+import json
+
+import pytest
+
+import sqlalchemy
+from swarm_intelligence_app.benchmarks import api
+
+
+class TestBenchmark:
+    """
+    Class for testing the benchmark suite.
+
+    """
+
+    def write_results(self, path, results):
+        """
+        Save results in the format of a run.
+
+        """
+        path.write(json.dumps({'meta': {}, 'results': results}))
+
+        return str(path)
+
+    def test_compare(self, tmpdir, capsys):
+        """
+        Test if scenarios that got slower or execute more statements are
+        reported as regressions.
+
+        """
+        result = {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0,
+                  'queries_per_request': 3.0}
+        baseline = self.write_results(tmpdir.join('baseline.json'), {
+            'GET /me/organizations': result, 'GET /roles/{id}/members': result
+        })
+
+        def compare(results):
+            return api.compare(argparse.Namespace(
+                baseline=baseline, threshold=10.0,
+                results=self.write_results(tmpdir.join('results.json'),
+                                           results)))
+
+        assert compare({'GET /me/organizations': dict(result, p95_ms=21.0),
+                        'GET /circles/{id}/roles': result}) == 0
+        output = capsys.readouterr().out
+        assert '!' not in output
+        assert 'GET /roles/{id}/members' in output
+        assert 'only in baseline' in output
+
+        assert compare({'GET /me/organizations': dict(result, p99_ms=40.0)
+                        }) == 1
+        assert compare({'GET /me/organizations': dict(
+            result, queries_per_request=4.0)}) == 1
+
+    def test_run_drop(self, tmpdir):
+        """
+        Test if a database that is not empty is only used with --drop.
+
+        """
+        uri = 'sqlite:///' + str(tmpdir.join('used.db'))
+        engine = sqlalchemy.create_engine(uri)
+        with engine.begin() as connection:
+            connection.execute(sqlalchemy.text(
+                'CREATE TABLE kept (id INTEGER PRIMARY KEY)'))
+
+        with pytest.raises(SystemExit) as error:
+            api.run(argparse.Namespace(uri=uri, drop=False,
+                                       response_cache='none'))
+        assert 'use --drop' in str(error.value)
+        assert sqlalchemy.inspect(engine).get_table_names() == ['kept']
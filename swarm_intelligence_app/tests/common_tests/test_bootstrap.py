@@ -0,0 +1,72 @@
+"""
+Test the set-based creation of organizations and circles.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.circle import Circle as CircleModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+from swarm_intelligence_app.models.role_member import role_member
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestBootstrap:
+    """
+    Class for testing the bootstrap of organizations.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_bootstrap_organization(self, client):
+        """
+        Test if an organization gets an anchor circle with its core roles
+        and the user as an admin and a member of the anchor circle and its
+        lead link.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        user_id = client.get('/me', headers=headers).json['id']
+
+        response = client.post('/me/organizations', headers=headers,
+                               data={'name': 'Bootstrapped'})
+        assert response.status == '201 CREATED'
+        assert response.json == client.get(
+            '/organizations/%d' % response.json['id'], headers=headers).json
+        assert response.json['name'] == 'Bootstrapped'
+        id = response.json['id']
+
+        anchor_circle = RoleModel.query.filter_by(
+            organization_id=id, parent_circle_id=None).one()
+        assert (anchor_circle.type, anchor_circle.name,
+                anchor_circle.purpose) == (RoleType.circle, 'General',
+                                           "General's Purpose")
+        assert CircleModel.query.get(anchor_circle.id) is not None
+
+        roles = RoleModel.query.filter_by(
+            parent_circle_id=anchor_circle.id).order_by(RoleModel.id).all()
+        assert [(role.type, role.name) for role in roles] == [
+            (RoleType.lead_link, 'Lead Link'),
+            (RoleType.secretary, 'Secretary'),
+            (RoleType.facilitator, 'Facilitator')]
+
+        partner = PartnerModel.query.filter_by(organization_id=id).one()
+        assert partner.type == PartnerType.admin
+        assert partner.user_id == user_id
+        assert partner.is_active
+
+        memberships = db.session.query(role_member.c.role_id).filter(
+            role_member.c.partner_id == partner.id).order_by(
+            role_member.c.role_id).all()
+        assert [row[0] for row in memberships] == [anchor_circle.id,
+                                                    roles[0].id]
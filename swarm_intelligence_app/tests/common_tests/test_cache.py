@@ -0,0 +1,64 @@
+"""
+Test the process-wide caches.
+
+"""
+import time
+
+from swarm_intelligence_app.common.cache import LRUCache
+
+
+class TestLRUCache:
+    """
+    Class for testing the least-recently-used cache.
+
+    """
+    def test_hits_and_misses(self):
+        """
+        Test if lookups are counted as hits or misses.
+
+        """
+        cache = LRUCache(maxsize=2, ttl=60)
+        assert cache.get('token') is None
+        cache.set('token', {'sub': 'mock_user_001'})
+        assert cache.get('token') == {'sub': 'mock_user_001'}
+        assert cache.stats['hits'] == 1
+        assert cache.stats['misses'] == 1
+
+    def test_eviction(self):
+        """
+        Test if the least recently used entry is evicted first.
+
+        """
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert len(cache) == 2
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+
+    def test_expiration(self):
+        """
+        Test if entries expire after their time to live.
+
+        """
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1, ttl=0.01)
+        cache.set('b', 2, ttl=0)
+        time.sleep(0.02)
+        assert cache.get('a') is None
+        assert cache.get('b') is None
+        assert len(cache) == 0
+
+    def test_delete(self):
+        """
+        Test if entries can be invalidated.
+
+        """
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.delete('a')
+        cache.delete('missing')
+        assert cache.get('a') is None
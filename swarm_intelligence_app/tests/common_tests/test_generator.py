@@ -0,0 +1,75 @@
+"""
+Test the generator of large organizations.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_member import role_member
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestGenerator:
+    """
+    Class for testing the generator.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def get_roles(self, organization_id):
+        """
+        List the names and purposes of the roles.
+
+        """
+        return db.session.query(RoleModel.name, RoleModel.purpose).filter(
+            RoleModel.organization_id == organization_id).order_by(
+            RoleModel.id).all()
+
+    def test_generate(self, client, generate):
+        """
+        Test if organizations of the given shape are generated.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        user_id = client.get('/me', headers=headers).json['id']
+
+        first, second = generate(organizations=2, partners=20, depth=3,
+                                 branching=2, roles_per_circle=4,
+                                 policies_per_domain=2, seed=7,
+                                 user_id=user_id)
+
+        # 7 circles with 3 core roles and 4 custom roles each
+        roles = self.get_roles(first)
+        assert len(roles) == 7 + 7 * 7
+        assert len(roles) == db.session.query(PolicyModel).join(
+            PolicyModel.domain).join(RoleModel).filter(
+            RoleModel.organization_id == first).count() / 2
+        assert db.session.query(role_member).join(RoleModel).filter(
+            RoleModel.organization_id == first).count() >= len(roles)
+
+        # the organizations of a seed differ, but are the same every time
+        assert self.get_roles(second) != roles
+        third, = self.helper.populate(test_helper, client, partners=20,
+                                      depth=3, branching=2,
+                                      roles_per_circle=4, seed=7)
+        assert self.get_roles(third) == roles
+
+        response = client.get('/me/organizations', headers=headers)
+        assert sorted(item['id'] for item in response.json) == [first,
+                                                                 second]
+
+        anchor_circle_id = client.get(
+            '/organizations/%d/anchor_circle' % first,
+            headers=headers).json['id']
+        response = client.get('/circles/%d/descendants' % anchor_circle_id,
+                              headers=headers)
+        assert len(response.json) == len(roles) - 1
@@ -0,0 +1,74 @@
+"""
+Test the instrumentation of requests and the metrics endpoint.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.common import instrumentation
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestMetrics:
+    """
+    Class for testing the metrics.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_histogram(self):
+        """
+        Test if a histogram exposes cumulative buckets.
+
+        """
+        histogram = instrumentation.Histogram('latency', 'Latency.',
+                                              (0.1, 1.0), ('endpoint',))
+        histogram.observe(0.05, ('/a',))
+        histogram.observe(0.5, ('/a',))
+        histogram.observe(5, ('/a',))
+
+        samples = [(name, dict(labels), value)
+                   for name, labels, value in histogram.samples()]
+        assert samples == [
+            ('latency_bucket', {'endpoint': '/a', 'le': '0.1'}, 1),
+            ('latency_bucket', {'endpoint': '/a', 'le': '1.0'}, 2),
+            ('latency_bucket', {'endpoint': '/a', 'le': '+Inf'}, 3),
+            ('latency_sum', {'endpoint': '/a'}, 5.55),
+            ('latency_count', {'endpoint': '/a'}, 3)
+        ]
+
+    def test_metrics(self, client):
+        """
+        Test if requests and their SQL statements are exposed.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+
+        with test_helper.count_queries() as statements:
+            assert client.get('/me', headers=headers).status == '200 OK'
+        assert client.get('/me/missing').status == '404 NOT FOUND'
+
+        response = client.get('/metrics')
+        assert response.status == '200 OK'
+        assert response.headers['Content-Type'].startswith(
+            'text/plain; version=0.0.4')
+
+        lines = response.get_data(as_text=True).splitlines()
+        assert '# TYPE si_http_request_duration_seconds histogram' in lines
+        assert 'si_http_requests_total{endpoint="/me",method="GET",' \
+               'status="200"} 1' in lines
+        assert 'si_http_requests_total{endpoint="unmatched",' \
+               'method="GET",status="404"} 1' in lines
+        assert 'si_http_request_duration_seconds_count{endpoint="/me",' \
+               'method="GET"} 1' in lines
+        assert 'si_sql_statements_per_request_sum{endpoint="/me",' \
+               'method="GET"} %d' % len(statements) in lines
+        assert any(line.startswith('si_db_pool_checkout_duration_seconds_'
+                                   'count ') for line in lines)
+        assert 'si_auth_cache_misses_total{cache="tokens"} 1' in lines
@@ -0,0 +1,132 @@
+"""
+Test the versioned migrations of the database schema.
+
+"""
+import sqlalchemy
+
+from swarm_intelligence_app.common import migration
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_member import role_member
+from swarm_intelligence_app.tests import test_helper
+
+
+class TestMigration:
+    """
+    Class for testing the migrations.
+
+    """
+    helper = test_helper.TestHelper
+
+    def get_indexes(self):
+        """
+        List the names of the indexes of the tables.
+
+        """
+        inspector = db.inspect(db.engine)
+
+        return {index['name'] for table in inspector.get_table_names()
+                for index in inspector.get_indexes(table)}
+
+    def test_migration(self, client):
+        """
+        Test if the migrations are applied once and can be reverted.
+
+        """
+        self.helper.set_up(test_helper, client)
+        db.session.remove()
+
+        versions = [version for version, module in migration.get_migrations()]
+        assert versions[:3] == [1, 2, 3]
+
+        # the tables of the models already have the indexes
+        indexes = self.get_indexes()
+        assert 'ix_partner_organization_id_type' in indexes
+        migration.upgrade(db.engine)
+        assert migration.get_versions(db.engine) == set(versions)
+        assert migration.upgrade(db.engine) == []
+        assert self.get_indexes() == indexes
+
+        assert migration.downgrade(db.engine, 1) == versions[:0:-1]
+        assert migration.get_versions(db.engine) == {1}
+        assert not {'ix_role_parent_circle_id',
+                    'ix_invitation_organization_id_status'} & \
+            self.get_indexes()
+
+        assert migration.upgrade(db.engine) == versions[1:]
+        assert self.get_indexes() == indexes
+
+    def test_role_member_primary_key(self, client):
+        """
+        Test if the duplicate role members are removed.
+
+        """
+        self.helper.set_up(test_helper, client)
+        db.session.remove()
+        migration.upgrade(db.engine)
+        migration.downgrade(db.engine, 2)
+
+        with db.engine.begin() as connection:
+            connection.execute(db.text('DROP TABLE role_member'))
+            connection.execute(db.text(
+                'CREATE TABLE role_member (partner_id INTEGER, '
+                'role_id INTEGER)'))
+            connection.execute(db.text(
+                'INSERT INTO role_member VALUES '
+                '(1, 2), (1, 2), (1, 3), (2, 2), (NULL, 2)'))
+
+        assert migration.upgrade(db.engine)[:1] == [3]
+
+        inspector = db.inspect(db.engine)
+        assert inspector.get_pk_constraint('role_member')[
+            'constrained_columns'] == ['role_id', 'partner_id']
+        assert db.session.query(role_member).order_by(
+            role_member.c.partner_id, role_member.c.role_id).all() == [
+            (1, 2), (1, 3), (2, 2)]
+
+    def test_baseline(self, tmpdir):
+        """
+        Test if a database of the models before the migrations is brought
+        up to the current models.
+
+        """
+        added = {'is_deleted', 'version'}
+        metadata = db.MetaData()
+
+        for table in db.metadata.sorted_tables:
+            if table.name in ('organization', 'partner', 'role', 'circle',
+                              'domain', 'policy', 'accountability',
+                              'invitation', 'user'):
+                db.Table(table.name, metadata, *[
+                    column.copy() for column in table.columns
+                    if column.name not in added])
+
+        db.Table('role_member', metadata,
+                 db.Column('partner_id', db.Integer),
+                 db.Column('role_id', db.Integer))
+
+        engine = sqlalchemy.create_engine(
+            'sqlite:///' + str(tmpdir.join('old.db')))
+        metadata.create_all(engine)
+
+        with engine.begin() as connection:
+            connection.execute(db.text(
+                "INSERT INTO organization (id, name) VALUES (1, 'Old')"))
+            connection.execute(db.text(
+                'INSERT INTO role (id, type, name, purpose, organization_id) '
+                "VALUES (1, 'circle', 'General', 'Purpose', 1)"))
+
+        migration.upgrade(engine)
+
+        with engine.begin() as connection:
+            assert connection.execute(db.select([
+                OrganizationModel.__table__])).fetchall() == [
+                (1, 'Old', False, 1)]
+            assert connection.execute(db.select([
+                RoleModel.version])).scalar() == 1
+
+        inspector = db.inspect(engine)
+        assert 'version' in [column['name'] for column in
+                             inspector.get_columns('accountability')]
@@ -0,0 +1,189 @@
+"""
+Test the outbox of emails and its delivery to a local SMTP stub.
+
+"""
+import json
+import socketserver
+import threading
+
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.common import outbox
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.outbox_message import OutboxMessage as \
+    OutboxMessageModel
+from swarm_intelligence_app.models.outbox_message import OutboxStatus
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """
+    Class for answering the commands of an SMTP client.
+
+    """
+    def reply(self, line):
+        """
+        Send a reply to the client.
+
+        """
+        self.wfile.write((line + '\r\n').encode('utf-8'))
+
+    def handle(self):
+        """
+        Receive the messages of a connection.
+
+        """
+        self.server.connections += 1
+        self.reply('220 stub')
+        lines = None
+
+        for raw in self.rfile:
+            line = raw.decode('utf-8').rstrip('\r\n')
+
+            if lines is not None:
+                if line == '.':
+                    self.server.messages.append('\n'.join(lines))
+                    lines = None
+                    self.reply('250 OK')
+                else:
+                    lines.append(line[1:] if line.startswith('..') else line)
+                continue
+
+            command = line[:4].upper()
+
+            if command in ('HELO', 'EHLO'):
+                self.reply('250 stub')
+            elif command == 'RCPT' and self.server.failures:
+                self.server.failures -= 1
+                self.reply('451 Try again later')
+            elif command == 'DATA':
+                lines = []
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """
+    Class for a local SMTP server that keeps the messages it receives.
+
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        """
+        Listen on a free port.
+
+        """
+        super().__init__(('127.0.0.1', 0), SMTPStubHandler)
+        self.connections = 0
+        self.failures = 0
+        self.messages = []
+
+
+class TestOutbox:
+    """
+    Class for testing the outbox.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_outbox(self, client):
+        """
+        Test if invitations are written to the outbox and delivered later.
+
+        """
+        server = SMTPStub()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        config = client.application.config
+        config['SI_SMTP_HOST'], config['SI_SMTP_PORT'] = server.server_address
+        config['SI_OUTBOX_BACKOFF'] = 0
+
+        try:
+            self.check_outbox(client, server)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def check_outbox(self, client, server):
+        """
+        Check the delivery of the outbox.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        url = '/organizations/' + id + '/invitations'
+
+        response = client.post(url, headers=headers,
+                               data={'email': 'john@example.org'})
+        assert response.status == '201 CREATED'
+        code = response.json['code']
+        invitation_id = str(response.json['id'])
+
+        assert client.post(url, headers=headers, data={
+            'email': 'jack@example.org\nBcc: eve@example.org'
+        }).status == '400 BAD REQUEST'
+
+        response = client.post(url + '/bulk', headers=headers,
+                               data=json.dumps({'emails': [
+                                   'jane@example.org', 'jim@example.org',
+                                   'jack@example.org\nBcc: eve@example.org'
+                               ]}),
+                               content_type='application/json')
+        assert response.json['created'] == 2
+        assert response.json['results'][2]['result'] == 'invalid'
+
+        assert client.put('/invitations/' + invitation_id + '/resend',
+                          headers=headers).status == '204 NO CONTENT'
+
+        # the requests only write to the outbox
+        messages = OutboxMessageModel.query.order_by(
+            OutboxMessageModel.id).all()
+        assert [message.recipient for message in messages] == [
+            'john@example.org', 'jane@example.org', 'jim@example.org',
+            'john@example.org']
+        assert all(message.status == OutboxStatus.pending
+                   for message in messages)
+        assert code in messages[0].body
+        assert server.connections == 0
+
+        # a message that cannot be written fails without affecting the batch
+        outbox.enqueue('jack@example.org\nBcc: eve@example.org', 'Hello',
+                       'Hello')
+        db.session.commit()
+
+        server.failures = 1
+        assert outbox.drain() == 6
+        assert outbox.drain() == 0
+
+        # the rejected message is retried over the same connection
+        assert server.connections == 1
+        assert len(server.messages) == 4
+        assert 'To: jane@example.org' in server.messages[0]
+        assert 'To: john@example.org' in server.messages[3]
+
+        messages = OutboxMessageModel.query.order_by(
+            OutboxMessageModel.id).all()
+        assert [message.status for message in messages] == [
+            OutboxStatus.sent] * 4 + [OutboxStatus.failed]
+        assert [message.attempts for message in messages] == [2, 1, 1, 1, 1]
+
+        client.put('/invitations/' + invitation_id + '/cancel',
+                   headers=headers)
+        assert client.put('/invitations/' + invitation_id + '/resend',
+                          headers=headers).status == '409 CONFLICT'
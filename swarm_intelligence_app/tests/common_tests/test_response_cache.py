@@ -0,0 +1,106 @@
+"""
+Test the organization-scoped response cache.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.common import response_cache
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class FakeRedis:
+    """
+    Class for standing in for a Redis client.
+
+    """
+    def __init__(self):
+        """
+        Initialize an empty store.
+
+        """
+        self.values = {}
+
+    def get(self, key):
+        """
+        Return the value of a key.
+
+        """
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        """
+        Set the value of a key.
+
+        """
+        if nx and key in self.values:
+            return False
+        self.values[key] = str(value).encode('utf-8')
+        return True
+
+    def incr(self, key):
+        """
+        Increment the value of a key.
+
+        """
+        self.values[key] = str(int(self.values.get(key, 0)) + 1).encode(
+            'utf-8')
+
+
+class TestResponseCache:
+    """
+    Class for testing the response cache.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_local_backend(self, client):
+        """
+        Test if cached responses are invalidated by writes.
+
+        """
+        client.application.config['SI_RESPONSE_CACHE'] = 'local'
+        self.check_invalidation(client)
+
+    def test_shared_backend(self, client):
+        """
+        Test if a shared backend caches and invalidates responses.
+
+        """
+        client.application.config['SI_RESPONSE_CACHE'] = 'shared'
+        client.application.extensions['si_response_cache'] = \
+            response_cache.SharedBackend(FakeRedis())
+        self.check_invalidation(client)
+
+    def check_invalidation(self, client):
+        """
+        Check that writes invalidate cached reads.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        url = '/organizations/' + id
+
+        assert client.get(url, headers=headers).status == '200 OK'
+
+        with test_helper.count_queries() as statements:
+            response = client.get(url, headers=headers)
+        assert response.status == '200 OK'
+        assert statements == []
+
+        response = client.get(url, headers=dict(
+            headers, **{'If-None-Match': response.headers['ETag']}))
+        assert response.status == '304 NOT MODIFIED'
+
+        client.put(url, headers=headers, data={'name': 'Tolli Empire'})
+        assert client.get(url, headers=headers).json['name'] == \
+            'Tolli Empire'
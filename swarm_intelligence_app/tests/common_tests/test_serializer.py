@@ -0,0 +1,76 @@
+"""
+Test the compiled serializers and the JSON encoder.
+
+"""
+import json
+
+from swarm_intelligence_app.common import serializer
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.policy import Policy as PolicyModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role import RoleType
+
+
+class TestSerializer:
+    """
+    Class for testing the serializers.
+
+    """
+    def test_dump(self):
+        """
+        Test if instances and rows have the same representation.
+
+        """
+        role = RoleModel(RoleType.custom, 'Role', 'Purpose', 1, 2)
+        role.id = 3
+
+        expected = {
+            'id': 3,
+            'type': 'custom',
+            'name': 'Role',
+            'purpose': 'Purpose',
+            'parent_circle_id': 1,
+            'organization_id': 2
+        }
+        assert role.serialize == expected
+        assert list(role.serialize) == list(expected)
+
+        role_serializer = serializer.get_serializer(RoleModel)
+        assert role_serializer is serializer.get_serializer(RoleModel)
+        assert role_serializer.dump_rows(
+            [(3, RoleType.custom, 'Role', 'Purpose', 1, 2)]) == [expected]
+
+    def test_fields(self):
+        """
+        Test if renamed and selected fields are dumped.
+
+        """
+        policy = PolicyModel('Title', 'Description', 4)
+        policy.id = 5
+        assert policy.serialize == {
+            'id': 5,
+            'title': 'Title',
+            'description': 'Description',
+            'domain': 4
+        }
+
+        partner = PartnerModel(PartnerType.admin, 'John', 'Doe',
+                               'john@example.org', None, None)
+        partner.id = 6
+        partner_serializer = serializer.get_serializer(PartnerModel,
+                                                       ('type',))
+        assert partner_serializer.dump(partner) == {'type': 'admin'}
+        assert partner_serializer.dump_row((None,)) == {'type': None}
+
+    def test_dumps(self, monkeypatch):
+        """
+        Test if the encoder falls back to the json module.
+
+        """
+        data = [{'id': 1, 'name': 'Ünïcode'}]
+        assert json.loads(serializer.dumps(data).decode('utf-8')) == data
+
+        monkeypatch.setattr(serializer, 'orjson', None)
+        assert serializer.dumps(data) == \
+            b'[{"id":1,"name":"\\u00dcn\\u00efcode"}]'
@@ -10,12 +10,19 @@ from flask import Flask, render_template
 from flask_restful import Api
 from sqlalchemy import create_engine
 from sqlalchemy_utils import create_database, database_exists
+from swarm_intelligence_app.common import generator
+from swarm_intelligence_app.common import instrumentation
+from swarm_intelligence_app.common import migration
+from swarm_intelligence_app.common import response_cache
+from swarm_intelligence_app.common import serializer
 from swarm_intelligence_app.config import config
 from swarm_intelligence_app.models import db
 from swarm_intelligence_app.resources import accountability
+from swarm_intelligence_app.resources import batch
 from swarm_intelligence_app.resources import circle
 from swarm_intelligence_app.resources import domain
 from swarm_intelligence_app.resources import invitation
+from swarm_intelligence_app.resources import monitoring
 from swarm_intelligence_app.resources import organization
 from swarm_intelligence_app.resources import partner
 from swarm_intelligence_app.resources import policy
@@ -40,6 +47,7 @@ def app():
     """
     app = Flask(__name__)
     api = Api(app)
+    api.representations['application/json'] = serializer.output_json
     load_config(app)
     api.add_resource(user.UserRegistration,
                      '/register')
@@ -49,8 +57,12 @@ def app():
                      '/me')
     api.add_resource(user.UserOrganizations,
                      '/me/organizations')
+    api.add_resource(user.UserOrganizationsImport,
+                     '/me/organizations/import')
     api.add_resource(organization.Organization,
                      '/organizations/<organization_id>')
+    api.add_resource(organization.OrganizationDeletion,
+                     '/organizations/<organization_id>/deletion')
     api.add_resource(organization.OrganizationAnchorCircle,
                      '/organizations/<organization_id>/anchor_circle')
     api.add_resource(organization.OrganizationMembers,
@@ -59,6 +71,16 @@ def app():
                      '/organizations/<organization_id>/admins')
     api.add_resource(organization.OrganizationInvitations,
                      '/organizations/<organization_id>/invitations')
+    api.add_resource(organization.OrganizationInvitationsBulk,
+                     '/organizations/<organization_id>/invitations/bulk')
+    api.add_resource(organization.OrganizationTree,
+                     '/organizations/<organization_id>/tree')
+    api.add_resource(organization.OrganizationRoleMembers,
+                     '/organizations/<organization_id>/role_members')
+    api.add_resource(organization.OrganizationSearch,
+                     '/organizations/<organization_id>/search')
+    api.add_resource(organization.OrganizationExport,
+                     '/organizations/<organization_id>/export')
     api.add_resource(partner.Partner,
                      '/partners/<partner_id>')
     api.add_resource(partner.PartnerAdmin,
@@ -89,6 +111,8 @@ def app():
                      '/roles/<role_id>/accountabilities')
     api.add_resource(role.RoleCircle,
                      '/roles/<role_id>/circle')
+    api.add_resource(role.RoleAncestors,
+                     '/roles/<role_id>/ancestors')
     api.add_resource(circle.Circle,
                      '/circles/<circle_id>')
     api.add_resource(circle.CircleRoles,
@@ -97,6 +121,8 @@ def app():
                      '/circles/<circle_id>/members')
     api.add_resource(circle.CircleMembersAssociation,
                      '/circles/<circle_id>/members/<partner_id>')
+    api.add_resource(circle.CircleDescendants,
+                     '/circles/<circle_id>/descendants')
     api.add_resource(domain.Domain,
                      '/domains/<domain_id>')
     api.add_resource(domain.DomainPolicies,
@@ -105,7 +131,13 @@ def app():
                      '/policies/<policy_id>')
     api.add_resource(accountability.Accountability,
                      '/accountabilities/<accountability_id>')
+    api.add_resource(batch.Batch,
+                     '/batch')
+    api.add_resource(monitoring.Metrics,
+                     '/metrics')
     db.init_app(app)
+    response_cache.init_app(app)
+    instrumentation.init_app(app)
 
     @app.route('/signin')
     def signin():
@@ -132,9 +164,27 @@ def app():
             create_database(engine.url)
 
         db.create_all()
+        migration.upgrade(db.engine)
         return 'Setup Database Tables'
 
     if __name__ == '__main__':
         app.run()
 
     return app
+
+
+@pytest.fixture
+def generate(app):
+    """
+    Return a function that generates large organizations.
+
+    The function takes the arguments of generator.generate, commits the
+    organizations and returns their ids.
+
+    """
+    def generate(**kwargs):
+        organization_ids = generator.generate(**kwargs)
+        db.session.commit()
+        return organization_ids
+
+    return generate
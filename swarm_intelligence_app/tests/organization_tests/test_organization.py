@@ -2,6 +2,7 @@
 Test Organization api-functionality.
 
 """
+import json
 
 from swarm_intelligence_app.common import authentication
 from swarm_intelligence_app.tests import test_helper
@@ -42,6 +43,10 @@ class TestOrganization:
             self.get_organization_admins(client, jwt_token, id2)
             self.post_organization_invitation(client, jwt_token, id2)
             self.get_organization_invitations(client, jwt_token, id2)
+            self.get_organization_tree(client, jwt_token, id2)
+            self.get_organization_invitations_pages(client, jwt_token, id2)
+            self.post_organization_invitations_bulk(client, jwt_token, id2)
+            self.get_organization_conditional(client, jwt_token, id2)
 
     def get_organization_id(self, client, token):
         """
@@ -120,3 +125,143 @@ class TestOrganization:
             'Authorization': 'Bearer ' + token}, data={
             'email': 'dagobert@gmail.de',
             'organization_id': id})
+
+    def get_organization_tree(self, client, token, id):
+        """
+        Test if the circle hierarchy of an organization gets retrieved.
+
+        """
+        response = client.get('/organizations/' + id + '/tree', headers={
+            'Authorization': 'Bearer ' + token})
+        assert response.status == '200 OK'
+        assert response.json['type'] == 'circle'
+        assert response.json['parent_circle_id'] is None
+        assert len(response.json['roles']) == 3
+
+        response = client.get('/organizations/' + id + '/tree?depth=0',
+                              headers={'Authorization': 'Bearer ' + token})
+        assert response.status == '200 OK'
+        assert response.json['roles'] == []
+
+    def get_organization_invitations_pages(self, client, token, id):
+        """
+        Test if the invitations of an organization get paginated.
+
+        """
+        for i in range(3):
+            self.post_organization_invitation(client, token, id)
+
+        url = '/organizations/' + id + '/invitations'
+        invitations = client.get(url, headers={
+            'Authorization': 'Bearer ' + token}).json
+
+        response = client.get(url + '?limit=2', headers={
+            'Authorization': 'Bearer ' + token})
+        assert response.status == '200 OK'
+        assert response.json == invitations[:2]
+        assert response.headers['X-Next-Cursor'] == \
+            str(invitations[1]['id'])
+        assert 'rel="next"' in response.headers['Link']
+
+        response = client.get(
+            url + '?limit=2&after=' + response.headers['X-Next-Cursor'],
+            headers={'Authorization': 'Bearer ' + token})
+        assert response.json == invitations[2:4]
+
+        response = client.get(url + '?limit=0', headers={
+            'Authorization': 'Bearer ' + token})
+        assert response.status == '400 BAD REQUEST'
+
+        # a request without a limit gets a page of the default size
+        config = client.application.config
+        saved = {key: config[key]
+                 for key in ('SI_PAGE_SIZE', 'SI_RESPONSE_CACHE')}
+        config.update(SI_PAGE_SIZE=2, SI_RESPONSE_CACHE='none')
+
+        try:
+            response = client.get(url, headers={
+                'Authorization': 'Bearer ' + token})
+        finally:
+            config.update(saved)
+
+        assert response.status == '200 OK'
+        assert response.json == invitations[:2]
+        assert response.headers['X-Next-Cursor'] == \
+            str(invitations[1]['id'])
+        assert 'limit=2' in response.headers['Link']
+
+    def post_organization_invitations_bulk(self, client, token, id):
+        """
+        Test if invitations get created in bulk from JSON and CSV.
+
+        """
+        url = '/organizations/' + id + '/invitations/bulk'
+        response = client.post(url, headers={
+            'Authorization': 'Bearer ' + token},
+            data=json.dumps({'emails': ['daisy@gmail.de', 'DAISY@gmail.de',
+                                        'dagobert@gmail.de', 'no_email']}),
+            content_type='application/json')
+        assert response.status == '201 CREATED'
+        assert response.json['created'] == 1
+        assert [i['result'] for i in response.json['results']] == \
+            ['created', 'duplicate', 'pending', 'invalid']
+
+        response = client.post(url, headers={
+            'Authorization': 'Bearer ' + token},
+            data='email\ndaisy@gmail.de\ngustav@gmail.de\n',
+            content_type='text/csv')
+        assert response.status == '201 CREATED'
+        assert [i['result'] for i in response.json['results']] == \
+            ['pending', 'created']
+
+        for emails in (['donald@gmail.de', None], ['donald@gmail.de', ' ']):
+            response = client.post(url, headers={
+                'Authorization': 'Bearer ' + token},
+                data=json.dumps({'emails': emails}),
+                content_type='application/json')
+            assert response.status == '400 BAD REQUEST'
+
+    def get_organization_conditional(self, client, token, id):
+        """
+        Test if conditional requests are answered by entity tags.
+
+        """
+        url = '/organizations/' + id
+        response = client.get(url, headers={
+            'Authorization': 'Bearer ' + token})
+        etag = response.headers['ETag']
+
+        response = client.get(url, headers={
+            'Authorization': 'Bearer ' + token, 'If-None-Match': etag})
+        assert response.status == '304 NOT MODIFIED'
+        assert response.data == b''
+
+        response = client.put(url, headers={
+            'Authorization': 'Bearer ' + token, 'If-Match': '"outdated"'},
+            data={'name': 'Tolli Empire'})
+        assert response.status == '412 PRECONDITION FAILED'
+
+        response = client.put(url, headers={
+            'Authorization': 'Bearer ' + token, 'If-Match': etag},
+            data={'name': 'Tolli Empire'})
+        assert response.status == '200 OK'
+        assert response.headers['ETag'] != etag
+
+        response = client.get(url, headers={
+            'Authorization': 'Bearer ' + token, 'If-None-Match': etag})
+        assert response.status == '200 OK'
+
+        response = client.get(url + '?fields=name', headers={
+            'Authorization': 'Bearer ' + token})
+        etag = response.headers['ETag']
+        assert ';fields=name' in etag
+
+        response = client.put(url, headers={
+            'Authorization': 'Bearer ' + token, 'If-Match': etag},
+            data={'name': 'Tolli Imperium'})
+        assert response.status == '200 OK'
+
+        response = client.put(url, headers={
+            'Authorization': 'Bearer ' + token, 'If-Match': etag},
+            data={'name': 'Tolli Empire'})
+        assert response.status == '412 PRECONDITION FAILED'
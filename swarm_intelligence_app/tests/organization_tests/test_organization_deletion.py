@@ -0,0 +1,112 @@
+"""
+Test the background deletion of organizations.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.common import deletion
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestOrganizationDeletion:
+    """
+    Class for testing the deletion of organizations.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def count_rows(self, organization_id):
+        """
+        Count the roles, closure rows and partners of an organization.
+
+        """
+        roles = db.select([RoleModel.id]).where(
+            RoleModel.organization_id == organization_id)
+
+        return (RoleModel.query.filter_by(
+                    organization_id=organization_id).count(),
+                db.session.query(role_closure).filter(
+                    role_closure.c.descendant_id.in_(roles)).count(),
+                PartnerModel.query.filter_by(
+                    organization_id=organization_id).count())
+
+    def test_organization_deletion(self, client, generate):
+        """
+        Test if a deleted organization is removed in the background.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        user_id = client.get('/me', headers=headers).json['id']
+
+        first, second = generate(organizations=2, partners=30, depth=3,
+                                 branching=2, roles_per_circle=4,
+                                 user_id=user_id)
+        rows = self.count_rows(second)
+        url = '/organizations/%d' % first
+        role = RoleModel.query.filter_by(organization_id=first).filter(
+            RoleModel.parent_circle_id.isnot(None)).first()
+        partner = PartnerModel.query.filter_by(organization_id=first).first()
+        nodes = ['/roles/%d' % role.id, '/roles/%d/members' % role.id,
+                 '/circles/%d' % role.parent_circle_id,
+                 '/partners/%d' % partner.id]
+
+        for node in nodes:
+            assert client.get(node, headers=headers).status == '200 OK'
+
+        assert client.get(url + '/deletion',
+                          headers=headers).status == '404 NOT FOUND'
+
+        response = client.delete(url, headers=headers)
+        assert response.status == '204 NO CONTENT'
+
+        # the organization is gone at once, its rows are still there
+        assert client.get(url, headers=headers).status == '404 NOT FOUND'
+        assert client.delete(url, headers=headers).status == '404 NOT FOUND'
+        response = client.get('/me/organizations', headers=headers)
+        assert [item['id'] for item in response.json] == [second]
+        assert self.count_rows(first) == rows
+
+        # so are its nodes
+        for node in nodes:
+            assert client.get(node,
+                              headers=headers).status == '404 NOT FOUND'
+        assert client.put('/roles/%d' % role.id, headers=headers,
+                          data={'name': 'Deleted'}).status == \
+            '404 NOT FOUND'
+
+        response = client.get(url + '/deletion', headers=headers)
+        assert response.status == '200 OK'
+        assert response.json['status'] == 'pending'
+        assert response.json['deleted_rows'] == 0
+
+        # a worker dies after the first chunk and another resumes the job
+        client.application.config['SI_DELETION_CHUNK_SIZE'] = 10
+        job = deletion.claim('dead', -1)
+        assert deletion.delete_closure(first, 10)[0] == 10
+        db.session.commit()
+        assert self.count_rows(first)[1] < rows[1]
+
+        assert deletion.run_pending() == 1
+        assert deletion.run_pending() == 0
+
+        response = client.get(url + '/deletion', headers=headers)
+        assert response.json['id'] == job.id
+        assert response.json['status'] == 'done'
+        assert response.json['step'] == 'organization'
+        assert response.json['deleted_rows'] > rows[0] + rows[2]
+
+        assert self.count_rows(first) == (0, 0, 0)
+        assert self.count_rows(second) == rows
+        assert client.get('/organizations/%d' % second,
+                          headers=headers).status == '200 OK'
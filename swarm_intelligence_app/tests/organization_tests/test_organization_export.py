@@ -0,0 +1,91 @@
+"""
+Test the export of an organization.
+
+"""
+import gzip
+import json
+
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.common.generator import count_rows
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestOrganizationExport:
+    """
+    Class for testing the export of an organization.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_export(self, client, generate):
+        """
+        Test if all rows of an organization are streamed.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_EXPORT_CHUNK_SIZE'] = 7
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        user_id = client.get('/me', headers=headers).json['id']
+
+        first, second = generate(organizations=2, partners=20, depth=2,
+                                 branching=2, user_id=user_id)
+        with client.application.app_context():
+            rows = dict(count_rows())
+
+        response = client.get('/organizations/%d/export' % first,
+                              headers=headers)
+        assert response.status == '200 OK'
+        assert response.is_streamed
+        assert response.mimetype == 'application/x-ndjson'
+        assert 'Content-Encoding' not in response.headers
+
+        records = [json.loads(line) for line in
+                   response.get_data(as_text=True).splitlines()]
+        assert records[0] == {'type': 'export', 'data': {
+            'version': 1, 'organization_id': first}}
+        assert records[1]['type'] == 'organization'
+        assert records[1]['data']['id'] == first
+
+        types = [record['type'] for record in records[1:]]
+        assert types == sorted(types, key=['organization', 'invitation',
+                                           'partner', 'role', 'circle',
+                                           'domain', 'policy',
+                                           'accountability',
+                                           'role_member'].index)
+
+        # the two organizations have the same shape and no users are exported
+        counts = {record_type: types.count(record_type)
+                  for record_type in set(types)}
+        assert 'user' not in counts
+        assert counts['partner'] == rows['partners'] // 2
+        assert counts['role'] == rows['roles'] // 2
+        assert counts['circle'] == rows['circles'] // 2
+        assert counts['policy'] == rows['policies'] // 2
+        assert counts['role_member'] == rows['role members'] // 2
+        assert {record['data']['organization_id'] for record in records
+                if record['type'] in ('partner', 'invitation', 'role')} == \
+            {first}
+        assert records[types.index('partner') + 1]['data']['type'] in (
+            'admin', 'member')
+
+        compressed = client.get('/organizations/%d/export' % first,
+                                headers=dict(headers,
+                                             **{'Accept-Encoding': 'gzip'}))
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(compressed.get_data()) == response.get_data()
+
+        for accept_encoding in ('gzip;q=0', 'identity'):
+            response = client.get('/organizations/%d/export' % first,
+                                  headers=dict(headers, **{
+                                      'Accept-Encoding': accept_encoding}))
+            assert 'Content-Encoding' not in response.headers
+
+        assert client.get('/organizations/0/export',
+                          headers=headers).status == '404 NOT FOUND'
@@ -0,0 +1,246 @@
+"""
+Test the import of an organization.
+
+"""
+import gzip
+import json
+
+import pytest
+
+import sqlalchemy
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.common import importer
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.organization_deletion import \
+    OrganizationDeletion as OrganizationDeletionModel
+from swarm_intelligence_app.models.outbox_message import OutboxMessage as \
+    OutboxMessageModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.role_closure import role_closure
+from swarm_intelligence_app.resources import user
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestOrganizationImport:
+    """
+    Class for testing the import of an organization.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def get_export(self, client, headers, id):
+        """
+        Export an organization.
+
+        """
+        response = client.get('/organizations/%d/export' % id,
+                              headers=headers)
+        assert response.status == '200 OK'
+
+        return response.get_data()
+
+    def get_shape(self, data):
+        """
+        Describe an export without its ids.
+
+        """
+        records = [json.loads(line) for line in data.decode().splitlines()]
+        rows = {}
+        roles = {}
+
+        for record in records:
+            rows.setdefault(record['type'], []).append(record['data'])
+
+        for role in rows['role']:
+            roles[role['id']] = role
+
+        return {
+            'counts': {record_type: len(items)
+                       for record_type, items in rows.items()},
+            'roles': sorted((role['type'], role['name'], role['purpose'],
+                             roles[role['parent_circle_id']]['name']
+                             if role['parent_circle_id'] else None)
+                            for role in rows['role']),
+            'policies': sorted((policy['title'], policy['description'])
+                               for policy in rows['policy']),
+            'members': sorted(roles[member['role_id']]['name']
+                              for member in rows['role_member'])
+        }
+
+    def count_closure(self, client, id):
+        """
+        Count the closure rows of an organization.
+
+        """
+        with client.application.app_context():
+            return db.session.query(role_closure).filter(
+                role_closure.c.descendant_id.in_(
+                    db.select([RoleModel.id]).where(
+                        RoleModel.organization_id == id))).count()
+
+    def test_import(self, client, generate):
+        """
+        Test if an exported organization is copied.
+
+        """
+        self.helper.set_up(test_helper, client)
+        config = client.application.config
+        config['SI_RESPONSE_CACHE'] = 'none'
+        config['SI_IMPORT_BATCH_SIZE'] = 4
+        config['SI_IMPORT_CHECKPOINT'] = 10
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        user_id = client.get('/me', headers=headers).json['id']
+
+        [id] = generate(partners=15, depth=2, branching=2, user_id=user_id)
+        data = self.get_export(client, headers, id)
+
+        response = client.post('/me/organizations/import?name=Copy',
+                               headers=headers, data=data,
+                               content_type='application/x-ndjson')
+        assert response.status == '201 CREATED'
+        copy = response.json['id']
+        assert copy != id
+        assert response.json['name'] == 'Copy'
+        assert response.json['rows']['partner'] == 15
+
+        shape = self.get_shape(data)
+        copied = self.get_shape(self.get_export(client, headers, copy))
+        assert copied['roles'] == shape['roles']
+        assert copied['policies'] == shape['policies']
+        assert self.count_closure(client, copy) == \
+            self.count_closure(client, id)
+
+        # the user keeps its partner and the other partners are invited
+        assert copied['counts']['partner'] == 1
+        assert copied['counts']['invitation'] == \
+            shape['counts']['invitation'] + 14
+        assert copied['members'] == ['General']
+
+        organizations = client.get('/me/organizations',
+                                   headers=headers).json
+        assert copy in [organization['id'] for organization in organizations]
+
+        with client.application.app_context():
+            partners = PartnerModel.query.filter_by(organization_id=copy)
+            assert [partner.user_id for partner in partners] == [user_id]
+            assert OutboxMessageModel.query.count() == 14
+
+        results = client.get('/organizations/%d/search?q=general' % copy,
+                             headers=headers).json
+        assert [result['title'] for result in results] == ['General']
+
+        response = client.post('/me/organizations/import',
+                               headers=dict(headers,
+                                            **{'Content-Encoding': 'gzip'}),
+                               data=gzip.compress(data),
+                               content_type='application/x-ndjson')
+        assert response.status == '201 CREATED'
+        assert response.json['name'] == 'Generated 0-0'
+
+        # an operator matches the partners with the existing users
+        with client.application.app_context():
+            copy, rows = importer.import_organization(
+                data.decode().splitlines(), 4, 10, match_users=True)
+            assert PartnerModel.query.filter_by(
+                organization_id=copy).count() == 15
+
+        copied = self.get_export(client, headers, copy)
+        assert self.get_shape(copied) == shape
+
+    def test_import_exceptions(self, client, generate, monkeypatch):
+        """
+        Test if an export that is not well-formed is rejected and its rows
+        are deleted.
+
+        """
+        self.helper.set_up(test_helper, client)
+        config = client.application.config
+        config['SI_IMPORT_BATCH_SIZE'] = 4
+        config['SI_IMPORT_CHECKPOINT'] = 10
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+
+        [id] = generate(partners=15, depth=2, branching=2)
+        lines = self.get_export(client, headers, id).splitlines(True)
+
+        def post(data):
+            return client.post('/me/organizations/import', headers=headers,
+                               data=data,
+                               content_type='application/x-ndjson')
+
+        response = post(b''.join(lines[1:]))
+        assert response.status == '400 BAD REQUEST'
+        assert response.json['message'] == \
+            'The export does not start with a header of version 1.'
+
+        assert post(lines[0] + b'{"type": "role"}\n').status == \
+            '400 BAD REQUEST'
+        assert post(b''.join(lines[:1] + lines[2:])).json['message'] == \
+            'The export has no organization.'
+
+        # a policy of an unknown domain fails after the first checkpoints
+        index = next(i for i, line in enumerate(lines) if b'"policy"' in line)
+        policy = lines[index].replace(b'"domain_id":', b'"domain_id":0,"x":')
+        response = post(b''.join(lines[:index]) + policy)
+        assert response.status == '400 BAD REQUEST'
+        assert response.json['message'] == \
+            'A policy row refers to the unknown domain 0.'
+
+        with client.application.app_context():
+            organization = OrganizationModel.query.order_by(
+                OrganizationModel.id.desc()).first()
+            assert organization.id != id
+            assert organization.is_deleted
+            assert OrganizationDeletionModel.query.filter_by(
+                organization_id=organization.id).count() == 1
+
+        # rows with invalid values are rejected
+        index = next(i for i, line in enumerate(lines) if b'"role"' in line)
+        role = lines[index].replace(b'"name":', b'"name":null,"x":')
+        assert post(b''.join(lines[:index]) + role).json['message'] == \
+            'A role row has an invalid name.'
+
+        index = next(i for i, line in enumerate(lines)
+                     if b'"partner"' in line)
+        partner = lines[index].replace(
+            b'"email":', b'"email":"jack@example.org\\nBcc: eve","x":')
+        assert post(b''.join(lines[:index]) + partner).json['message'] == \
+            'A partner row has an invalid email.'
+
+        assert post(b'\x1f\x8b').status == '400 BAD REQUEST'
+
+        # database errors are conflicts, other errors are not handled
+        def fail(error):
+            def import_organization(*args):
+                raise error
+
+            return import_organization
+
+        monkeypatch.setattr(user, 'import_organization', fail(
+            sqlalchemy.exc.IntegrityError('INSERT', {}, None)))
+        assert post(b''.join(lines)).status == '409 CONFLICT'
+
+        monkeypatch.setattr(user, 'import_organization',
+                            fail(RuntimeError()))
+        with pytest.raises(RuntimeError):
+            post(b''.join(lines))
+
+        monkeypatch.undo()
+
+        # the user is not a partner in the export and becomes an admin
+        copy = post(b''.join(lines)).json['id']
+        assert 'donald@gmail.de' in [admin['email'] for admin in client.get(
+            '/organizations/%d/admins' % copy, headers=headers).json]
@@ -0,0 +1,94 @@
+"""
+Test the bulk assignment of partners to roles.
+
+"""
+import json
+
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestOrganizationRoleMembers:
+    """
+    Class for testing the role members edge of the organization node.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_role_members(self, client):
+        """
+        Test if operations are applied in bulk and validated.
+
+        """
+        self.helper.set_up(test_helper, client)
+
+        organizations = []
+        for token in self.tokens:
+            self.user.me_post(test_me, client, token)
+            jwt_token = self.helper.login(test_helper, client, token)
+            self.user.me_organizations_post(test_me, client, jwt_token)
+            organizations.append(self.get_organization(client, jwt_token))
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id, partner_id, role_ids = organizations[-1]
+        url = '/organizations/' + id + '/role_members'
+
+        response = self.post_operations(client, url, headers, [
+            {'role_id': role_ids[2], 'partner_id': partner_id,
+             'action': 'add'},
+            {'role_id': role_ids[3], 'partner_id': partner_id,
+             'action': 'add'},
+            {'role_id': role_ids[1], 'partner_id': partner_id,
+             'action': 'remove'}])
+        assert response.status == '200 OK'
+        assert response.json == {'added': 2, 'removed': 1}
+
+        memberships = client.get('/partners/' + partner_id + '/memberships',
+                                 headers=headers).json
+        assert sorted(i['id'] for i in memberships) == \
+            sorted([role_ids[0], role_ids[2], role_ids[3]])
+
+        response = self.post_operations(client, url, headers, [
+            {'role_id': role_ids[2], 'partner_id': partner_id,
+             'action': 'add'}])
+        assert response.json == {'added': 0, 'removed': 0}
+
+        other_role_id = organizations[0][2][0]
+        response = self.post_operations(client, url, headers, [
+            {'role_id': other_role_id, 'partner_id': partner_id,
+             'action': 'add'}])
+        assert response.status == '409 CONFLICT'
+
+        response = self.post_operations(client, url, headers, [
+            {'role_id': role_ids[2], 'partner_id': partner_id,
+             'action': 'replace'}])
+        assert response.status == '400 BAD REQUEST'
+
+    def get_organization(self, client, token):
+        """
+        Return the ids of an organization, its admin and the roles of its
+        anchor circle.
+
+        """
+        headers = {'Authorization': 'Bearer ' + token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        partner_id = str(client.get('/organizations/' + id + '/members',
+                                    headers=headers).json[0]['id'])
+        circle_id = client.get('/organizations/' + id + '/anchor_circle',
+                               headers=headers).json['id']
+        roles = client.get('/circles/' + str(circle_id) + '/roles',
+                           headers=headers).json
+        return id, partner_id, [circle_id] + [i['id'] for i in roles]
+
+    def post_operations(self, client, url, headers, operations):
+        """
+        Post a list of operations.
+
+        """
+        return client.post(url, headers=headers,
+                           data=json.dumps({'operations': operations}),
+                           content_type='application/json')
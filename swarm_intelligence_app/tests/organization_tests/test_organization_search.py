@@ -0,0 +1,134 @@
+"""
+Test the search of the governance of an organization.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestOrganizationSearch:
+    """
+    Class for testing the search of an organization.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def search(self, client, headers, id, query):
+        """
+        List the type and the id of the search results.
+
+        """
+        response = client.get('/organizations/' + id + '/search?q=' + query,
+                              headers=headers)
+        assert response.status == '200 OK'
+
+        return [(item['type'], item['id']) for item in response.json]
+
+    def test_search(self, client):
+        """
+        Test if the search index follows the changes of the entities.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_RESPONSE_CACHE'] = 'none'
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        circle_id = client.get('/organizations/' + id + '/anchor_circle',
+                               headers=headers).json['id']
+
+        # the anchor circle and its core roles are indexed on creation
+        assert self.search(client, headers, id, 'general') == [
+            ('role', circle_id)]
+        assert len(self.search(client, headers, id, 'purpose')) == 4
+
+        role_id = client.post('/circles/%d/roles' % circle_id,
+                              headers=headers,
+                              data={'name': 'Marketing Lead',
+                                    'purpose': 'Grow the audience'}).json['id']
+        domain_id = client.post('/roles/%d/domains' % role_id,
+                                headers=headers,
+                                data={'title': 'Social media'}).json['id']
+        policy_id = client.post('/domains/%d/policies' % domain_id,
+                                headers=headers,
+                                data={'title': 'Posting rules',
+                                      'description': 'Only approved media'}
+                                ).json['id']
+        accountability_id = client.post(
+            '/roles/%d/accountabilities' % role_id, headers=headers,
+            data={'title': 'Publish the newsletter'}).json['id']
+
+        assert self.search(client, headers, id, 'market') == [
+            ('role', role_id)]
+        assert self.search(client, headers, id, 'audience gro') == [
+            ('role', role_id)]
+        assert self.search(client, headers, id, 'audience sales') == []
+        assert self.search(client, headers, id, 'MEDIA') == [
+            ('domain', domain_id), ('policy', policy_id)]
+        assert self.search(client, headers, id, 'newsletter') == [
+            ('accountability', accountability_id)]
+
+        response = client.get('/organizations/' + id + '/search?q=media',
+                              headers=headers)
+        assert response.json[0] == {'type': 'domain', 'id': domain_id,
+                                    'title': 'Social media'}
+
+        client.put('/roles/%d' % role_id, headers=headers,
+                   data={'name': 'Sales Lead', 'purpose': 'Sell'})
+        client.put('/policies/%d' % policy_id, headers=headers,
+                   data={'title': 'Posting rules', 'description': 'None'})
+        assert self.search(client, headers, id, 'marketing') == []
+        assert self.search(client, headers, id, 'sales lead') == [
+            ('role', role_id)]
+        assert self.search(client, headers, id, 'lead ' * 20 + 'sales') == [
+            ('role', role_id)]
+        query = '+'.join('word%d' % i for i in range(9))
+        assert client.get('/organizations/' + id + '/search?q=' + query,
+                          headers=headers).status == '400 BAD REQUEST'
+        assert self.search(client, headers, id, 'media') == [
+            ('domain', domain_id)]
+
+        client.delete('/domains/%d' % domain_id, headers=headers)
+        assert self.search(client, headers, id, 'posting') == []
+
+        client.delete('/roles/%d' % role_id, headers=headers)
+        assert self.search(client, headers, id, 'newsletter') == []
+        assert self.search(client, headers, id, 'sales') == []
+
+        assert client.get('/organizations/' + id + '/search?q=+',
+                          headers=headers).status == '400 BAD REQUEST'
+        assert client.get('/organizations/0/search?q=general',
+                          headers=headers).status == '404 NOT FOUND'
+
+    def test_search_generated(self, client, generate):
+        """
+        Test if generated organizations are indexed.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_RESPONSE_CACHE'] = 'none'
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        user_id = client.get('/me', headers=headers).json['id']
+
+        first, second = generate(organizations=2, partners=10, depth=3,
+                                 branching=2, user_id=user_id)
+
+        results = self.search(client, headers, str(first), 'budget')
+        assert results
+        assert len(self.search(client, headers, str(first),
+                               'budget&limit=3')) == 3
+        assert not set(results) & set(self.search(client, headers,
+                                                  str(second), 'budget'))
@@ -0,0 +1,95 @@
+"""
+Test the number of queries of the partner listings.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.organization import Organization as \
+    OrganizationModel
+from swarm_intelligence_app.models.partner import Partner as PartnerModel
+from swarm_intelligence_app.models.partner import PartnerType
+from swarm_intelligence_app.models.role import Role as RoleModel
+from swarm_intelligence_app.models.user import User as UserModel
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestPartnersQueries:
+    """
+    Class for testing that partner listings do not load partners lazily.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_partners_queries(self, client):
+        """
+        Test if the number of queries is constant in the number of partners.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_RESPONSE_CACHE'] = 'none'
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        organization_id = client.get('/me/organizations', headers={
+            'Authorization': 'Bearer ' + jwt_token}).json[0]['id']
+        circle_id = client.get(
+            '/organizations/' + str(organization_id) + '/anchor_circle',
+            headers={'Authorization': 'Bearer ' + jwt_token}).json['id']
+
+        urls = [
+            '/organizations/' + str(organization_id) + '/members',
+            '/organizations/' + str(organization_id) + '/admins',
+            '/circles/' + str(circle_id) + '/members',
+            '/roles/' + str(circle_id) + '/members'
+        ]
+
+        self.add_partners(organization_id, circle_id, 2)
+        counts = self.count_queries(client, jwt_token, urls)
+
+        self.add_partners(organization_id, circle_id, 20)
+        assert self.count_queries(client, jwt_token, urls) == counts
+
+    def add_partners(self, organization_id, role_id, number):
+        """
+        Add admins to an organization and a role.
+
+        """
+        organization = OrganizationModel.query.get(organization_id)
+        role = RoleModel.query.get(role_id)
+        offset = UserModel.query.count()
+
+        for i in range(offset, offset + number):
+            user = UserModel('google_' + str(i), 'John', 'Doe',
+                             'john' + str(i) + '@example.org')
+            partner = PartnerModel(PartnerType.admin, 'John', 'Doe',
+                                   'john' + str(i) + '@example.org', user,
+                                   organization)
+            role.members.append(partner)
+
+        db.session.commit()
+        db.session.remove()
+
+    def count_queries(self, client, token, urls):
+        """
+        Count the queries per listing.
+
+        """
+        counts = []
+
+        for url in urls:
+            client.get(url, headers={'Authorization': 'Bearer ' + token})
+
+            with test_helper.count_queries() as statements:
+                response = client.get(url, headers={
+                    'Authorization': 'Bearer ' + token})
+
+            assert response.status == '200 OK'
+            counts.append(len(statements))
+
+        return counts
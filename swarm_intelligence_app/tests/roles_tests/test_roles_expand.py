@@ -0,0 +1,89 @@
+"""
+Test the expanded relationships of the role api.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestRoleExpand:
+    """
+    Class for testing the expand parameter.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_expand(self, client):
+        """
+        Test if expanded relationships are read with a fixed number of queries.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_RESPONSE_CACHE'] = 'none'
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        circle_id = str(client.get('/organizations/' + id + '/anchor_circle',
+                                   headers=headers).json['id'])
+        url = '/roles/' + circle_id + \
+            '?expand=domains.policies,accountabilities,members'
+
+        self.add_domains(client, headers, circle_id, 1)
+        with test_helper.count_queries() as statements:
+            response = client.get(url, headers=headers)
+        counts = len(statements)
+
+        assert response.status == '200 OK'
+        assert len(response.json['domains']) == 1
+        assert len(response.json['domains'][0]['policies']) == 2
+        assert len(response.json['accountabilities']) == 1
+        assert len(response.json['members']) == 1
+
+        etag = response.headers['ETag']
+        self.add_domains(client, headers, circle_id, 5)
+        with test_helper.count_queries() as statements:
+            response = client.get(url, headers=dict(headers, **{
+                'If-None-Match': etag}))
+
+        assert response.status == '200 OK'
+        assert len(statements) == counts
+        assert len(response.json['domains']) == 6
+        assert response.headers['ETag'] != etag
+
+        response = client.get('/circles/%s?expand=roles,members' % circle_id,
+                              headers=headers)
+        assert len(response.json['roles']) == 3
+        assert len(response.json['members']) == 1
+
+        for expand in ('secrets', 'domains.secrets',
+                       'members.memberships.members.memberships'):
+            assert client.get('/roles/' + circle_id + '?expand=' + expand,
+                              headers=headers).status == '400 BAD REQUEST'
+
+    def add_domains(self, client, headers, role_id, number):
+        """
+        Add domains with policies and accountabilities to a role.
+
+        """
+        for i in range(number):
+            domain_id = str(client.post(
+                '/roles/' + role_id + '/domains', headers=headers,
+                data={'title': 'Domain %d' % i}).json['id'])
+
+            for j in range(2):
+                client.post('/domains/' + domain_id + '/policies',
+                            headers=headers,
+                            data={'title': 'Policy %d' % j,
+                                  'description': 'Description'})
+
+            client.post('/roles/' + role_id + '/accountabilities',
+                        headers=headers, data={'title': 'Accountability'})
@@ -0,0 +1,68 @@
+"""
+Test the sparse fieldsets of the role api.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestRoleFields:
+    """
+    Class for testing the fields parameter.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_fields(self, client):
+        """
+        Test if only the selected fields are read and returned.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_RESPONSE_CACHE'] = 'none'
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        circle_id = str(client.get('/organizations/' + id + '/anchor_circle',
+                                   headers=headers).json['id'])
+
+        with test_helper.count_queries() as statements:
+            response = client.get('/circles/%s/roles?fields=name' % circle_id,
+                                  headers=headers)
+        assert response.status == '200 OK'
+        assert sorted(response.json[0]) == ['id', 'name']
+        assert not any('purpose' in i for i in statements)
+
+        url = '/roles/' + str(response.json[0]['id'])
+        response = client.get(url + '?fields=name,type', headers=headers)
+        assert sorted(response.json) == ['id', 'name', 'type']
+        assert response.json['type'] == 'lead_link'
+
+        etag = response.headers['ETag']
+        full = client.get(url, headers=dict(headers, **{
+            'If-None-Match': etag}))
+        assert full.status == '200 OK'
+        assert full.headers['ETag'] != etag
+        assert client.get(url + '?fields=type,name', headers=dict(headers, **{
+            'If-None-Match': etag})).status == '304 NOT MODIFIED'
+
+        response = client.get('/circles/%s?fields=strategy' % circle_id,
+                              headers=headers)
+        assert response.json == {'id': int(circle_id), 'strategy': None}
+
+        response = client.get(
+            '/circles/%s/descendants?fields=depth' % circle_id,
+            headers=headers)
+        assert sorted(response.json[0]) == ['depth', 'id']
+
+        assert client.get(url + '?fields=name,secret',
+                          headers=headers).status == '400 BAD REQUEST'
@@ -0,0 +1,62 @@
+"""
+Test the assignment of partners to roles.
+
+"""
+from swarm_intelligence_app.common import authentication
+from swarm_intelligence_app.models import db
+from swarm_intelligence_app.models.role_member import role_member
+from swarm_intelligence_app.tests import test_helper
+from swarm_intelligence_app.tests.user_tests import test_me
+
+
+class TestRoleMembers:
+    """
+    Class for testing the members association of roles.
+
+    """
+    user = test_me.TestUser
+    helper = test_helper.TestHelper
+    tokens = authentication.get_mock_user()
+
+    def test_members(self, client):
+        """
+        Test if assigning a partner twice keeps a single membership.
+
+        """
+        self.helper.set_up(test_helper, client)
+        client.application.config['SI_RESPONSE_CACHE'] = 'none'
+
+        token = list(self.tokens)[0]
+        self.user.me_post(test_me, client, token)
+        jwt_token = self.helper.login(test_helper, client, token)
+        self.user.me_organizations_post(test_me, client, jwt_token)
+
+        headers = {'Authorization': 'Bearer ' + jwt_token}
+        id = str(client.get('/me/organizations',
+                            headers=headers).json[0]['id'])
+        circle_id = str(client.get('/organizations/' + id + '/anchor_circle',
+                                   headers=headers).json['id'])
+        role_id = str(client.get('/circles/' + circle_id + '/roles',
+                                 headers=headers).json[0]['id'])
+        partner_id = str(client.get('/organizations/' + id + '/members',
+                                    headers=headers).json[0]['id'])
+        url = '/roles/' + role_id + '/members'
+
+        for i in range(2):
+            with test_helper.count_queries() as statements:
+                response = client.put(url + '/' + partner_id,
+                                      headers=headers)
+            assert response.status == '204 NO CONTENT'
+            assert not any('FROM role_member' in statement
+                           for statement in statements)
+
+        response = client.get(url, headers=headers)
+        assert [item['id'] for item in response.json] == [int(partner_id)]
+        assert db.session.query(role_member).filter(
+            role_member.c.role_id == int(role_id)).count() == 1
+
+        for i in range(2):
+            assert client.delete(url + '/' + partner_id,
+                                 headers=headers).status == '204 NO CONTENT'
+
+        assert client.get(url, headers=headers).json == []
@@ -1,11 +1,35 @@
 """
 Use for Setting Up tests.
 """
+from contextlib import contextmanager
+
 from flask import url_for
+from sqlalchemy import event
 
+from swarm_intelligence_app.common import generator
+from swarm_intelligence_app.models import db
 from swarm_intelligence_app.models import organization
 
 
+@contextmanager
+def count_queries():
+    """
+    Collect the SQL statements that are executed within the context.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context,
+                              executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute',
+                     before_cursor_execute)
+
+
 class TestHelper:
     """
     Class for cleaning the database for each test.
@@ -23,11 +47,13 @@ class TestHelper:
         """
         client.get(url_for('setup'))
 
-    def populate(self, client):
+    def populate(self, client, **kwargs):
         """
-        Helper Method for populating the database.
+        Helper Method for populating the database with organizations.
         """
-        client.get(url_for('populate'))
+        organization_ids = generator.generate(**kwargs)
+        db.session.commit()
+        return organization_ids
 
     def login(self, client, token):
         """
@@ -0,0 +1,122 @@
+"""
+Test the verification of Google ID tokens.
+
+"""
+import json
+import time
+
+import jwt
+import requests
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import rsa
+from swarm_intelligence_app.common import google
+
+
+class TestGoogleToken:
+    """
+    Class for testing the verification of Google ID tokens.
+
+    """
+    def create_key(self, tmpdir, kid):
+        """
+        Create a signing key and a key set file.
+
+        """
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048,
+                                       backend=default_backend())
+        jwk = json.loads(
+            jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key()))
+        jwk['kid'] = kid
+        path = tmpdir.join('certs.json')
+        path.write(json.dumps({'keys': [jwk]}))
+        return key, str(path)
+
+    def create_token(self, app, key, kid, **claims):
+        """
+        Create a signed ID token.
+
+        """
+        payload = {
+            'iss': 'accounts.google.com',
+            'aud': app.config['SI_GOOGLE_CLIENT_ID'],
+            'sub': 'google_user_001',
+            'given_name': 'Donald',
+            'family_name': 'Duck',
+            'email': 'donald@gmail.de',
+            'exp': int(time.time()) + 3600
+        }
+        payload.update(claims)
+        return jwt.encode(payload, key, algorithm='RS256',
+                          headers={'kid': kid}).decode('utf-8')
+
+    def test_verify_locally(self, app, tmpdir):
+        """
+        Test if valid tokens are accepted and invalid tokens are rejected.
+
+        """
+        key, path = self.create_key(tmpdir, 'key_001')
+        app.config['SI_GOOGLE_TOKEN_VERIFICATION'] = 'local'
+        app.config['SI_GOOGLE_CERTS_URL'] = 'file://' + path
+
+        with app.app_context():
+            token = self.create_token(app, key, 'key_001')
+            data = google.verify_google_token(token)
+            assert data['sub'] == 'google_user_001'
+            assert data['given_name'] == 'Donald'
+
+            token = self.create_token(app, key, 'key_001', aud='other')
+            assert google.verify_google_token(token) is None
+
+            token = self.create_token(app, key, 'key_001', iss='example.org')
+            assert google.verify_google_token(token) is None
+
+            token = self.create_token(app, key, 'key_001',
+                                      exp=int(time.time()) - 10)
+            assert google.verify_google_token(token) is None
+
+            token = self.create_token(app, key, 'key_002')
+            assert google.verify_google_token(token) is None
+
+            assert google.verify_google_token('not_a_token') is None
+
+    def test_key_set_lifetime(self, tmpdir):
+        """
+        Test if the key set is only refetched when its lifetime is over.
+
+        """
+        _, path = self.create_key(tmpdir, 'key_001')
+        source = google.FileKeySource(path, default_max_age=3600)
+        fetches = []
+        fetch = source.fetch
+
+        def counting_fetch():
+            fetches.append(1)
+            return fetch()
+
+        source.fetch = counting_fetch
+        key_set = google.KeySet(source)
+
+        assert key_set.get('key_001') is not None
+        assert key_set.get('key_001') is not None
+        assert len(fetches) == 1
+
+        source.default_max_age = 0
+        key_set.refresh()
+        assert key_set.get('key_001') is not None
+        assert len(fetches) == 3
+
+    def test_verify_remotely_timeout(self, app, monkeypatch):
+        """
+        Test if a tokeninfo request that times out rejects the token.
+
+        """
+        def get(url, **kwargs):
+            assert kwargs['timeout'] > 0
+            raise requests.Timeout('timed out')
+
+        monkeypatch.setattr(google.requests, 'get', get)
+        app.config['SI_GOOGLE_TOKEN_VERIFICATION'] = 'tokeninfo'
+
+        with app.app_context():
+            assert google.verify_google_token('token') is None